@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Mode batch non interactif : plusieurs niches en parallèle, une par process.
+Les caches disque (métadonnées, analyses IA, index des chaînes) sont partagés entre les process,
+donc deux niches qui se recoupent ne récupèrent / ne scorent pas deux fois la même vidéo.
+
+Usage :
+    python prospector_batch.py jobs.csv --workers 4 --out batch_output
+
+jobs.csv (ou .jsonl) : colonnes niche, language, subs_min, subs_max, max_analyze
+(seule 'niche' est obligatoire).
+"""
+
+import os
+import re
+import csv
+import sys
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import youtube_prospector as yp
+from prospector_scheduler import RateLimitScheduler
+from prospector_warehouse import LeadWarehouse, warehouse_available
+
+DEFAULT_BATCH_WORKERS = 4
+
+def load_jobs(path: str, defaults: dict) -> list[dict]:
+    """Lit le fichier de jobs (CSV avec en-tête ou JSON Lines) et complète avec les valeurs par défaut."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw = list(csv.DictReader(f))
+
+    jobs = []
+    for entry in raw:
+        niche = (entry.get("niche") or "").strip()
+        if not niche:
+            continue
+        job = dict(defaults, niche=niche)
+        for key in ("language", "subs_min", "subs_max", "max_analyze"):
+            value = entry.get(key)
+            if value not in (None, ""):
+                job[key] = value if key == "language" else int(value)
+        jobs.append(job)
+    return jobs
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "niche"
+
+def split_quotas(workers: int):
+    """Les quotas Groq sont par compte : chaque process (ou worker de file) n'en reçoit qu'une part."""
+    yp.GROQ_SCHEDULER = RateLimitScheduler(
+        "groq", yp.GROQ_REQUESTS_PER_MINUTE / workers, yp.GROQ_TOKENS_PER_MINUTE / workers, max_concurrency=16
+    )
+    yp.GROQ_TRIAGE_SCHEDULER = RateLimitScheduler(
+        "groq-triage", yp.GROQ_TRIAGE_REQUESTS_PER_MINUTE / workers, yp.GROQ_TRIAGE_TOKENS_PER_MINUTE / workers,
+        max_concurrency=16
+    )
+    yp.YOUTUBE_SCHEDULER = RateLimitScheduler(
+        "youtube", yp.YOUTUBE_REQUESTS_PER_MINUTE / workers, max_concurrency=yp.YTDLP_MAX_WORKERS,
+        max_retries=3, base_delay=2.0
+    )
+
+def run_job(job: dict, out_dir: str, options: dict) -> dict:
+    """Exécute une niche dans le process courant ; les leads sont écrits au fil de l'eau dans son CSV."""
+    path = os.path.join(out_dir, f"{_slug(job['niche'])}_{job['language']}.csv")
+    if os.path.exists(path):
+        os.remove(path)
+
+    def logger(msg):
+        print(f"[{job['niche']}] {msg.strip()}", flush=True)
+
+    summary = {}
+    # Historique : l'entrepôt Parquet reçoit aussi le run (si pandas / pyarrow sont installés)
+    warehouse = LeadWarehouse().writer(job["niche"]) if warehouse_available() else None
+    try:
+        with yp.LeadSink(path, job["niche"]) as sink:
+            for kind, payload in yp.iter_prospector(
+                niche=job["niche"],
+                language=job["language"],
+                max_analyze=job["max_analyze"],
+                subs_min=job["subs_min"],
+                subs_max=job["subs_max"],
+                logger=logger,
+                **options
+            ):
+                if kind == "summary":
+                    summary = payload
+                else:
+                    sink.write(kind, payload)
+                    if warehouse:
+                        warehouse.write(kind, payload)
+    finally:
+        # Niche en échec : le fichier Parquet partiel est finalisé quand même
+        if warehouse:
+            warehouse.close()
+    return {**job, "file": path, "summary": summary}
+
+def consolidate(results: list[dict], out_dir: str) -> str:
+    """Concatène les CSV par niche en un seul leads.csv (ligne à ligne, sans tout charger)."""
+    path = os.path.join(out_dir, "leads.csv")
+    with open(path, "w", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=yp.CSV_FIELDNAMES)
+        writer.writeheader()
+        for result in results:
+            if not result.get("file") or not os.path.exists(result["file"]):
+                continue
+            with open(result["file"], encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    writer.writerow(row)
+    return path
+
+def run_batch(jobs: list[dict], out_dir: str, workers: int = DEFAULT_BATCH_WORKERS, **options) -> dict:
+    """Lance les jobs sur un pool de process et écrit leads.csv + summaries.json dans out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, min(workers, len(jobs) or 1))
+    # Rangés dans l'ordre du fichier de jobs, quel que soit l'ordre de fin
+    results = [None] * len(jobs)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=split_quotas, initargs=(workers,)) as pool:
+        futures = {pool.submit(run_job, job, out_dir, options): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            job = jobs[i]
+            try:
+                result = future.result()
+                s = result["summary"]
+                print(f"✅ {job['niche']} ({job['language']}) : {s.get('qualified', 0)} qualifiés / {s.get('analyzed', 0)} analysés")
+            except Exception as e:
+                result = {**job, "error": str(e)}
+                print(f"❌ {job['niche']} ({job['language']}) : {e}")
+            results[i] = result
+
+    leads_path = consolidate(results, out_dir)
+    summaries_path = os.path.join(out_dir, "summaries.json")
+    report = {
+        "run_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "leads_file": leads_path,
+        "jobs": results,
+    }
+    with open(summaries_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube Prospector - mode batch multi-niches")
+    parser.add_argument("jobs", help="Fichier de jobs (.csv avec en-tête ou .jsonl)")
+    parser.add_argument("--out", default="batch_output", help="Dossier de sortie (leads.csv, summaries.json)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_BATCH_WORKERS, help="Nombre de process")
+    parser.add_argument("--language", default="fr", help="Langue par défaut (fr/en)")
+    parser.add_argument("--max-analyze", type=int, default=10, help="Max vidéos analysées par niche (défaut)")
+    parser.add_argument("--subs-min", type=int, default=0)
+    parser.add_argument("--subs-max", type=int, default=500000)
+    parser.add_argument("--fetch-workers", type=int, default=yp.DEFAULT_FETCH_WORKERS)
+    parser.add_argument("--llm-workers", type=int, default=yp.DEFAULT_LLM_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=yp.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--cascade-band", type=int, default=yp.DEFAULT_CASCADE_BAND,
+                        help="Bande d'incertitude autour de 70 renotée par le grand modèle")
+    parser.add_argument("--no-cascade", action="store_true", help="Grand modèle pour tous les candidats")
+    parser.add_argument("--rank-factor", type=float, default=yp.DEFAULT_RANK_FACTOR,
+                        help="Candidats filtrés par candidat envoyé à l'IA (classement local, ex. 2 ; 1 = désactivé)")
+    parser.add_argument("--no-rank", action="store_true", help="Ordre de la recherche, sans classement local")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("GROQ_API_KEY"):
+        print("❌ CRITIQUE : Variable GROQ_API_KEY manquante.")
+        return 1
+
+    defaults = {"language": args.language, "subs_min": args.subs_min, "subs_max": args.subs_max,
+                "max_analyze": args.max_analyze}
+    jobs = load_jobs(args.jobs, defaults)
+    if not jobs:
+        print("❌ Aucun job dans le fichier.")
+        return 1
+
+    print(f"🚀 Batch : {len(jobs)} niches sur {min(args.workers, len(jobs))} process")
+    report = run_batch(jobs, args.out, workers=args.workers, fetch_workers=args.fetch_workers,
+                       llm_workers=args.llm_workers, batch_size=args.batch_size,
+                       cascade_band=None if args.no_cascade else args.cascade_band,
+                       rank_factor=None if args.no_rank else args.rank_factor)
+    failed = sum(1 for r in report["jobs"] if "error" in r)
+    print(f"🏁 Fini ! Leads : {report['leads_file']} ({failed} niche(s) en erreur)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,806 @@
+#!/usr/bin/env python3
+"""
+Benchmark hors-ligne du Prospector : rejoue des payloads yt-dlp (--dump-json) enregistrés et des
+réponses Groq préparées, avec latences et taux d'erreur simulés. Tout le vrai pipeline tourne
+(pré-filtres, gates, ordonnanceurs, parsing, index des chaînes) ; seuls le moteur yt-dlp et le
+client Groq sont remplacés. Aucun accès réseau.
+
+Usage :
+    python prospector_bench.py run --sizes 10,100,1000 --json bench.json
+    python prospector_bench.py run --sizes 100 --yt-error-rate 0.05 --compare bench.json
+    python prospector_bench.py record "montage vidéo" --count 30   (réseau : capture de vrais payloads)
+    python prospector_bench.py records --count 1000   (extraction complète vs allégée, par 1000 candidats)
+    python prospector_bench.py startup --runs 5        (démarrage à froid du mode headless)
+    python prospector_bench.py queue --size 200 --workers 1,2,4   (mode distribué, reprise des baux d'un worker mort)
+
+Rapport par taille de run : débit par étage, latence p50/p95 par lead (du début de sa récupération
+à sa sortie du pipeline), pic mémoire Python (tracemalloc).
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import argparse
+import subprocess
+import tempfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import prospector_cache
+import youtube_prospector as yp
+from prospector_scheduler import RateLimitScheduler
+
+# --- CONFIGURATION ---
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_fixtures")
+DEFAULT_SIZES = "10,100,1000"
+# Latences "réelles" typiques (secondes), multipliées par --time-scale
+YT_SEARCH_PAGE_LATENCY = 1.0 # par page de 20 résultats
+YT_EXTRACT_LATENCY = 1.5
+LLM_LATENCY = 0.4
+LLM_SECONDS_PER_TOKEN = 0.004 # ~250 tokens/s en sortie pour le 70B
+TRIAGE_LLM_LATENCY = 0.15
+TRIAGE_SECONDS_PER_TOKEN = 0.0013 # ~750 tokens/s en sortie pour le 8B
+TRIAGE_NOISE = 15 # Écart max du jugement du petit modèle par rapport au grand
+# Info dict "complet" synthétique pour la mesure des enregistrements (ordre de grandeur d'une vraie vidéo)
+SYNTHETIC_FORMATS = 40
+SYNTHETIC_THUMBNAILS = 40
+SYNTHETIC_DESCRIPTION_CHARS = 3000
+# Tarifs Groq ($ par million de tokens : entrée, sortie)
+GROQ_PRICES = {yp.GROQ_MODEL_ID: (0.59, 0.79), yp.GROQ_TRIAGE_MODEL_ID: (0.05, 0.08)}
+DEFAULT_TIME_SCALE = 0.05
+RANK_COMPARE_FACTOR = 2.0 # Classement mesuré par --rank-compare quand il est désactivé par défaut
+
+def load_fixtures(directory: str = FIXTURES_DIR) -> tuple[list[dict], list[dict], list[dict]]:
+    """(payloads --dump-json, analyses préparées, messages préparés) depuis videos.jsonl, completions.jsonl et messages.jsonl."""
+    def read(name):
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return read("videos.jsonl"), read("completions.jsonl"), read("messages.jsonl")
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+class Timeline:
+    """Intervalles (début, fin) des appels simulés d'un étage : débit = appels / durée couverte."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, start: float, end: float, items: int = 1):
+        with self._lock:
+            self.spans.append((start, end, items))
+
+    def throughput(self) -> float:
+        if not self.spans:
+            return 0.0
+        items = sum(s[2] for s in self.spans)
+        elapsed = max(s[1] for s in self.spans) - min(s[0] for s in self.spans)
+        return items / elapsed if elapsed > 0 else 0.0
+
+class FakeLatency:
+    """Latence et erreurs simulées (graine fixe : deux runs identiques tirent les mêmes valeurs)."""
+
+    def __init__(self, time_scale: float, error_rate: float, seed: int):
+        self.time_scale = time_scale
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            jitter = self.rng.uniform(0.5, 1.5)
+        time.sleep(seconds * jitter * self.time_scale)
+
+    def chance(self, rate: float) -> bool:
+        with self._lock:
+            return self.rng.random() < rate
+
+    def fails(self) -> bool:
+        return self.chance(self.error_rate)
+
+class FakeEngine:
+    """Remplace YtDlpEngine : recherche et extraction servies depuis les payloads enregistrés."""
+
+    def __init__(self, payloads: list[dict], latency: FakeLatency):
+        self.latency = latency
+        self.videos = {}
+        self.fetch_started = {}
+        self.search_timeline = Timeline()
+        self.fetch_timeline = Timeline()
+        self._payloads = [self._rebase(p) for p in payloads]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rebase(payload: dict) -> dict:
+        """Décale les dates comme si le payload venait d'être enregistré (même âge relatif)."""
+        payload = dict(payload)
+        recorded = datetime.fromtimestamp(payload.get("epoch") or time.time())
+        age = recorded - datetime.strptime(payload["upload_date"], "%Y%m%d")
+        uploaded = datetime.now() - age
+        payload["upload_date"] = uploaded.strftime("%Y%m%d")
+        payload["timestamp"] = int(uploaded.timestamp())
+        return payload
+
+    def _clone(self, i: int) -> dict:
+        """i-ème vidéo synthétique : un payload enregistré avec un ID vidéo / chaîne unique."""
+        payload = dict(self._payloads[i % len(self._payloads)])
+        payload["id"] = f"{payload['id']}-{i}"
+        payload["channel_id"] = f"{payload['channel_id']}-{i}"
+        payload["webpage_url"] = f"https://www.youtube.com/watch?v={payload['id']}"
+        return payload
+
+    def _entry(self, i: int) -> dict:
+        payload = self._clone(i)
+        with self._lock:
+            self.videos[payload["webpage_url"]] = payload
+        # Entrée 'flat' telle que rendue par extract_info(process=False)
+        return {
+            "_type": "url", "ie_key": "Youtube", "id": payload["id"], "url": payload["webpage_url"],
+            "title": payload["title"], "channel": payload["channel"], "uploader": payload["uploader"],
+            "channel_id": payload["channel_id"], "duration": payload["duration"],
+            "view_count": payload["view_count"], "timestamp": payload["timestamp"],
+        }
+
+    def search_range(self, start: int, stop: int) -> list[dict]:
+        """Résultats start..stop d'une recherche, une latence par page de 20 résultats."""
+        began = time.perf_counter()
+        self.latency.sleep(YT_SEARCH_PAGE_LATENCY * max(1, -(-(stop - start) // 20)))
+        if self.latency.fails():
+            raise Exception("HTTP Error 429: Too Many Requests")
+        entries = [self._entry(i) for i in range(start, stop)]
+        self.search_timeline.add(began, time.perf_counter(), len(entries))
+        return entries
+
+    def search(self, query: str, max_results: int, timeout: float = 120) -> list[dict]:
+        return self.search_range(0, max_results)
+
+    def open_search(self, query: str, limit: int, start: int = 0) -> "FakeSearchCursor":
+        return FakeSearchCursor(self, limit, start)
+
+    def extract_video(self, url: str, timeout: float = 30) -> dict:
+        start = time.perf_counter()
+        with self._lock:
+            self.fetch_started.setdefault(url, start)
+        self.latency.sleep(YT_EXTRACT_LATENCY)
+        if self.latency.fails():
+            raise Exception("HTTP Error 429: Too Many Requests")
+        # Copie : comme yt-dlp, un nouveau dict par extraction
+        payload = json.loads(json.dumps(self.videos[url]))
+        self.fetch_timeline.add(start, time.perf_counter())
+        return payload
+
+class FakeSearchCursor:
+    """Équivalent de SearchCursor sur FakeEngine."""
+
+    def __init__(self, engine: FakeEngine, limit: int, start: int = 0):
+        self.engine = engine
+        self.limit = limit
+        self.position = start
+        self.exhausted = False
+
+    def next_page(self, n: int, timeout: float = 60) -> list[dict]:
+        page = self.engine.search_range(self.position, min(self.position + n, self.limit))
+        self.position += len(page)
+        if len(page) < n:
+            self.exhausted = True
+        return page
+
+class FakeAPIError(Exception):
+    """Erreur HTTP façon SDK Groq (status_code + response.headers)."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": {"retry-after": "0"}})()
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class FakeGroq:
+    """
+    Remplace le client Groq : chat.completions.with_raw_response.create() renvoie une analyse
+    préparée (choisie par hash du prompt, donc stable), un tableau pour un prompt par lots, ou
+    deux messages pour un prompt de rédaction. La sortie est tronquée à max_tokens, comme l'API.
+    Le petit modèle de la cascade répond plus vite, avec un jugement bruité (±TRIAGE_NOISE).
+    """
+
+    def __init__(self, completions: list[dict], messages: list[dict], latency: FakeLatency, invalid_rate: float = 0.0):
+        self.completions = completions
+        self.messages = messages
+        self.latency = latency
+        self.invalid_rate = invalid_rate
+        self.timeline = Timeline()
+        self.calls = 0
+        self.tokens = 0
+        self.usage = {} # modèle -> {calls, prompt_tokens, completion_tokens}
+        self._lock = threading.Lock()
+        self.chat = _Namespace(completions=_Namespace(with_raw_response=_Namespace(create=self._create)))
+
+    def _completion(self, seed: int, k: int, model: str) -> dict:
+        completion = dict(self.completions[(seed + k) % len(self.completions)])
+        if model == yp.GROQ_TRIAGE_MODEL_ID:
+            noise = random.Random(seed + k).randint(-TRIAGE_NOISE, TRIAGE_NOISE)
+            completion["judgment_score"] = min(yp.JUDGMENT_MAX, max(0, completion["judgment_score"] + noise))
+        return completion
+
+    def _content(self, prompt: str, model: str) -> tuple[str, int]:
+        seed = zlib.crc32(prompt.encode("utf-8"))
+        if '"message_option_1"' in prompt:
+            return json.dumps(self.messages[seed % len(self.messages)], ensure_ascii=False), 1
+        ids = re.findall(r"\[id=(c\d+)\]", prompt)
+        if ids:
+            items = [dict(self._completion(seed, k, model), id=cid) for k, cid in enumerate(ids)]
+            return json.dumps(items, ensure_ascii=False), len(ids)
+        return json.dumps(self._completion(seed, 0, model), ensure_ascii=False), 1
+
+    def cost(self) -> float:
+        """Coût des appels au tarif Groq ($)."""
+        return sum((u["prompt_tokens"] * GROQ_PRICES[m][0] + u["completion_tokens"] * GROQ_PRICES[m][1]) / 1e6
+                   for m, u in self.usage.items() if m in GROQ_PRICES)
+
+    def _create(self, model, messages, temperature=None, max_tokens=None, **kwargs):
+        start = time.perf_counter()
+        prompt = messages[-1]["content"]
+        content, candidates = self._content(prompt, model)
+        triage = model == yp.GROQ_TRIAGE_MODEL_ID
+        if self.latency.fails():
+            self.latency.sleep(TRIAGE_LLM_LATENCY if triage else LLM_LATENCY)
+            raise FakeAPIError(429 if self.latency.chance(0.5) else 503)
+        if self.latency.chance(self.invalid_rate):
+            content = "Voici l'analyse demandée : le candidat semble intéressant."
+        if max_tokens:
+            content = content[:max_tokens * 4]
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        if triage:
+            self.latency.sleep(TRIAGE_LLM_LATENCY + completion_tokens * TRIAGE_SECONDS_PER_TOKEN)
+        else:
+            self.latency.sleep(LLM_LATENCY + completion_tokens * LLM_SECONDS_PER_TOKEN)
+        with self._lock:
+            self.calls += 1
+            self.tokens += prompt_tokens + completion_tokens
+            usage = self.usage.setdefault(model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["completion_tokens"] += completion_tokens
+        self.timeline.add(start, time.perf_counter(), candidates)
+
+        response = _Namespace(
+            choices=[_Namespace(message=_Namespace(content=content))],
+            usage=_Namespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                             total_tokens=prompt_tokens + completion_tokens),
+        )
+        return _Namespace(headers={}, parse=lambda: response)
+
+@contextmanager
+def _fake_backends(engine: "FakeEngine", client: "FakeGroq", args):
+    """Branche le faux moteur et le faux client Groq, avec un dossier de cache jetable ; restaure tout en sortie."""
+    cache_dir = tempfile.mkdtemp(prefix="prospector-bench-")
+    saved = (prospector_cache.CACHE_DIR, yp._ENGINE, yp.get_groq_client, yp.GROQ_SCHEDULER, yp.GROQ_TRIAGE_SCHEDULER,
+             yp.YOUTUBE_SCHEDULER)
+    prospector_cache.CACHE_DIR = cache_dir
+    yp._ENGINE = engine
+    yp.get_groq_client = lambda api_key=None: client
+    # Quotas hors jeu par défaut : on mesure le pipeline, pas l'attente des seaux
+    yp.GROQ_SCHEDULER = RateLimitScheduler("groq", args.groq_rpm or 1e9, args.groq_tpm or None, max_concurrency=16,
+                                           base_delay=args.retry_delay, max_delay=args.retry_delay * 10)
+    yp.GROQ_TRIAGE_SCHEDULER = RateLimitScheduler("groq-triage", 1e9, None, max_concurrency=16,
+                                                  base_delay=args.retry_delay, max_delay=args.retry_delay * 10)
+    yp.YOUTUBE_SCHEDULER = RateLimitScheduler("youtube", args.youtube_rpm or 1e9, max_concurrency=yp.YTDLP_MAX_WORKERS,
+                                              max_retries=3, base_delay=args.retry_delay, max_delay=args.retry_delay * 10)
+    try:
+        yield cache_dir
+    finally:
+        (prospector_cache.CACHE_DIR, yp._ENGINE, yp.get_groq_client,
+         yp.GROQ_SCHEDULER, yp.GROQ_TRIAGE_SCHEDULER, yp.YOUTUBE_SCHEDULER) = saved
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+def run_size(size: int, payloads: list[dict], completions: list[dict], messages: list[dict], args,
+             cascade_band: int | None = None, rank_factor: float | None = None) -> dict:
+    """Un run complet de max_analyze=size candidats dans un dossier de cache jetable."""
+    yt_latency = FakeLatency(args.time_scale, args.yt_error_rate, args.seed)
+    llm_latency = FakeLatency(args.time_scale, args.llm_error_rate, args.seed + 1)
+    engine = FakeEngine(payloads, yt_latency)
+    client = FakeGroq(completions, messages, llm_latency, args.llm_invalid_rate)
+
+    latencies = []
+    summary = {}
+    with _fake_backends(engine, client, args):
+        if not args.no_tracemalloc:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            for kind, payload in yp.iter_prospector(
+                niche=f"bench {size}", language="fr", max_analyze=size, logger=lambda msg: None,
+                fetch_workers=args.fetch_workers, llm_workers=args.llm_workers, batch_size=args.batch_size,
+                channel_policy=args.channel_policy, cache_ttl_hours=0, use_llm_cache=False, resume=False,
+                cascade_band=cascade_band, rank_factor=rank_factor,
+            ):
+                if kind == "lead":
+                    fetched = engine.fetch_started.get(payload["url"])
+                    if fetched is not None:
+                        latencies.append(time.perf_counter() - fetched)
+                elif kind == "summary":
+                    summary = payload
+            wall = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    return {
+        "size": size,
+        "wall_seconds": round(wall, 3),
+        "leads": summary.get("analyzed", 0),
+        "qualified": summary.get("qualified", 0),
+        "rejected": summary.get("rejected", 0),
+        "searched": summary.get("total_found", 0),
+        "pass_rate": summary.get("pass_rate", 0.0),
+        "throughput": {
+            "search_entries_per_s": round(engine.search_timeline.throughput(), 2),
+            "fetch_per_s": round(engine.fetch_timeline.throughput(), 2),
+            "llm_candidates_per_s": round(client.timeline.throughput(), 2),
+            "leads_per_s": round(summary.get("analyzed", 0) / wall, 2) if wall else 0.0,
+        },
+        "lead_latency_p50": round(_percentile(latencies, 50), 3),
+        "lead_latency_p95": round(_percentile(latencies, 95), 3),
+        "peak_memory_mb": round(peak / 1e6, 2),
+        "fetches": len(engine.fetch_timeline.spans),
+        "llm_calls": client.calls,
+        "llm_tokens": client.tokens,
+        "tokens_per_lead": round(client.tokens / summary["analyzed"]) if summary.get("analyzed") else 0,
+        "llm_usage": client.usage,
+        "llm_cost_usd": round(client.cost(), 5),
+        "cascade": summary.get("cascade", {}),
+        "ranking": summary.get("ranking", {}),
+        "two_phase": summary.get("two_phase", {}),
+        "rate_limits": summary.get("rate_limits", {}),
+        "stages": summary.get("performance", {}).get("stages", {}),
+    }
+
+def print_report(results: list[dict], baseline: list[dict] | None = None):
+    by_size = {r["size"]: r for r in baseline or []}
+    header = f"{'taille':>6} {'durée(s)':>9} {'leads':>6} {'fetch/s':>8} {'ia/s':>7} {'leads/s':>8} {'p50(s)':>7} {'p95(s)':>7} {'tok/lead':>9} {'mém(MB)':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        t = r["throughput"]
+        print(f"{r['size']:>6} {r['wall_seconds']:>9.2f} {r['leads']:>6} {t['fetch_per_s']:>8.1f} "
+              f"{t['llm_candidates_per_s']:>7.1f} {t['leads_per_s']:>8.1f} {r['lead_latency_p50']:>7.2f} "
+              f"{r['lead_latency_p95']:>7.2f} {r.get('tokens_per_lead', 0):>9} {r['peak_memory_mb']:>8.1f}")
+        old = by_size.get(r["size"])
+        if old:
+            def delta(new, prev):
+                return f"{(new - prev) / prev * 100:+.0f}%" if prev else "n/a"
+            print(f"{'':>6} vs base : durée {delta(r['wall_seconds'], old['wall_seconds'])}, "
+                  f"p95 {delta(r['lead_latency_p95'], old['lead_latency_p95'])}, "
+                  f"tokens/lead {delta(r.get('tokens_per_lead', 0), old.get('tokens_per_lead', 0))}, "
+                  f"mémoire {delta(r['peak_memory_mb'], old['peak_memory_mb'])}")
+
+def print_cascade_report(results: list[dict], references: list[dict]):
+    """Cascade comparée au grand modèle seul (mêmes fixtures, même graine)."""
+    print("\nCascade vs grand modèle seul :")
+    header = (f"{'taille':>6} {'renotés':>8} {'accord':>7} {'qualifiés':>10} {'ia p50(s)':>10} "
+              f"{'ia total(s)':>12} {'coût($)':>9} {'économie':>9}")
+    print(header)
+    print("-" * len(header))
+    for r, ref in zip(results, references):
+        c = r["cascade"]
+        decided = c.get("triage", 0) + c.get("escalated", 0)
+        llm, ref_llm = r["stages"].get("llm", {}), ref["stages"].get("llm", {})
+        agreement = f"{c['agreement']:.0%}" if c.get("agreement") is not None else "n/a"
+        saved = f"{(1 - r['llm_cost_usd'] / ref['llm_cost_usd']) * 100:.0f}%" if ref["llm_cost_usd"] else "n/a"
+        print(f"{r['size']:>6} {c.get('escalated', 0) / decided if decided else 0:>8.0%} {agreement:>7} "
+              f"{r['qualified']:>4}/{ref['qualified']:<5} "
+              f"{llm.get('p50', 0):>4.2f}/{ref_llm.get('p50', 0):<5.2f} "
+              f"{llm.get('total_seconds', 0):>5.1f}/{ref_llm.get('total_seconds', 0):<6.1f} "
+              f"{r['llm_cost_usd']:>9.4f} {saved:>9}")
+    print("(valeurs cascade/grand modèle seul ; accord = même verdict des deux modèles sur les cas renotés)")
+
+def run_queue(size: int, workers: int, payloads: list[dict], completions: list[dict], messages: list[dict], args) -> dict:
+    """
+    Mode distribué : size résultats de recherche mis en file, `workers` workers (threads, une connexion
+    SQLite chacun) et un worker "mort" qui réserve un paquet puis disparaît sans rien rendre : ses
+    candidats doivent être repris à l'expiration du bail. Chrono : jusqu'à ce que la file soit vide.
+    """
+    import prospector_queue as pq
+    engine = FakeEngine(payloads, FakeLatency(args.time_scale, args.yt_error_rate, args.seed))
+    client = FakeGroq(completions, messages, FakeLatency(args.time_scale, args.llm_error_rate, args.seed + 1),
+                      args.llm_invalid_rate)
+    with _fake_backends(engine, client, args) as cache_dir:
+        path = os.path.join(cache_dir, "queue.sqlite")
+        producer = pq.CandidateQueue(path)
+        pq.enqueue_niche(producer, f"bench queue {size}", max_analyze=size, max_results=size, logger=lambda msg: None)
+        abandoned = len(producer.claim("worker-mort", args.claim_size, args.lease))
+
+        stop = threading.Event()
+        summaries = [None] * workers
+
+        def work(i):
+            queue = pq.CandidateQueue(path)
+            worker = pq.QueueWorker(queue, f"worker-{i}", claim_size=args.claim_size, lease_seconds=args.lease,
+                                    fetch_workers=args.fetch_workers, llm_workers=args.llm_workers,
+                                    batch_size=args.batch_size, cascade_band=yp.DEFAULT_CASCADE_BAND,
+                                    cache_ttl_hours=0, use_llm_cache=False, logger=lambda msg: None)
+            summaries[i] = worker.run(idle_exit=0, stop=stop)
+            queue.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=work, args=(i,), name=f"bench-worker-{i}") for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        while True:
+            status = producer.status()[0]
+            if not status[pq.PENDING] and not status[pq.LEASED]:
+                break
+            time.sleep(0.05)
+        wall = time.perf_counter() - started
+        stop.set()
+        for thread in threads:
+            thread.join()
+        producer.close()
+
+    processed = sum(s["claimed"] for s in summaries) - sum(s["released"] for s in summaries)
+    return {
+        "size": size,
+        "workers": workers,
+        "wall_seconds": round(wall, 3),
+        "candidates_per_s": round(processed / wall, 2) if wall else 0.0,
+        "leads": status[pq.LEAD],
+        "qualified": sum(s["qualified"] for s in summaries),
+        "rejected": status[pq.REJECTED],
+        "failed": status[pq.FAILED],
+        "abandoned": abandoned,
+        "reclaimed": sum(s["reclaimed"] for s in summaries),
+        "lost_leases": sum(s["lost_leases"] for s in summaries),
+        "llm_calls": client.calls,
+    }
+
+def print_queue_report(results: list[dict]):
+    header = (f"{'workers':>7} {'durée(s)':>9} {'cand./s':>8} {'accél.':>7} {'leads':>6} {'rejets':>7} "
+              f"{'échecs':>7} {'repris':>8} {'baux perdus':>12}")
+    print(header)
+    print("-" * len(header))
+    base = results[0]["wall_seconds"] if results else 0
+    for r in results:
+        print(f"{r['workers']:>7} {r['wall_seconds']:>9.2f} {r['candidates_per_s']:>8.1f} "
+              f"{base / r['wall_seconds'] if r['wall_seconds'] else 0:>6.1f}x {r['leads']:>6} {r['rejected']:>7} "
+              f"{r['failed']:>7} {r['reclaimed']:>3}/{r['abandoned']:<4} {r['lost_leases']:>12}")
+    print("(repris = candidats du worker mort réservés à nouveau après expiration du bail / candidats abandonnés)")
+
+def print_ranking_report(results: list[dict], references: list[dict]):
+    """Classement local comparé à l'ordre de la recherche (mêmes fixtures, même graine)."""
+    print("\nClassement local vs ordre de la recherche :")
+    header = (f"{'taille':>6} {'qualifiés':>10} {'appels ia':>10} {'qualif./appel':>14} {'récupérations':>14} {'durée(s)':>12}")
+    print(header)
+    print("-" * len(header))
+    for r, ref in zip(results, references):
+        y, ref_y = r["ranking"].get("qualified_per_llm_call") or 0, ref["ranking"].get("qualified_per_llm_call") or 0
+        print(f"{r['size']:>6} {r['qualified']:>4}/{ref['qualified']:<5} {r['llm_calls']:>4}/{ref['llm_calls']:<5} "
+              f"{y:>6.2f}/{ref_y:<7.2f} {r['fetches']:>6}/{ref['fetches']:<7} "
+              f"{r['wall_seconds']:>5.1f}/{ref['wall_seconds']:<6.1f}")
+    print("(valeurs classement/ordre de la recherche ; le classement récupère rank_factor fois plus de candidats)")
+    print("(synthétique : les jugements des fixtures sont tirés par hash du prompt, indépendamment des caractéristiques\n"
+          " du classement ; le rendement mesure quelles fixtures sont favorisées, pas la qualité du classement)")
+
+def _full_info(payload: dict, i: int) -> dict:
+    """Payload de fixture complété comme une extraction complète : formats, miniatures, longue description."""
+    info = dict(payload, id=f"{payload['id']}-{i}")
+    info["description"] = (payload.get("description", "") + "\n") * (SYNTHETIC_DESCRIPTION_CHARS // (len(payload.get("description", "")) + 1) + 1)
+    info["formats"] = [{
+        "format_id": str(n), "ext": "mp4" if n % 2 else "webm", "protocol": "https",
+        "url": f"https://rr{n}---sn-synthetic.googlevideo.com/videoplayback?id={info['id']}&itag={n}&" + "x" * 900,
+        "width": 256 * (n % 8 + 1), "height": 144 * (n % 8 + 1), "fps": 30, "tbr": 100.0 * (n + 1),
+        "vcodec": "avc1.4d401f" if n % 3 else "none", "acodec": "mp4a.40.2" if n % 3 == 0 else "none",
+        "filesize": 1_000_000 * (n + 1), "http_headers": {"User-Agent": "Mozilla/5.0", "Accept": "*/*"},
+    } for n in range(SYNTHETIC_FORMATS)]
+    info["thumbnails"] = [{"id": str(n), "url": f"https://i.ytimg.com/vi/{info['id']}/{n}.jpg", "width": 120 * (n % 10 + 1),
+                           "height": 90 * (n % 10 + 1), "preference": -n} for n in range(SYNTHETIC_THUMBNAILS)]
+    return info
+
+def _legacy_details(data: dict, url: str) -> dict:
+    """Détails tels qu'extraits avant les enregistrements compacts (dict, description complète)."""
+    subs = data.get("uploader_subscriber_count")
+    if subs is None:
+        subs = data.get("channel_follower_count")
+    return {
+        "title": data.get("title", ""), "channel": data.get("channel", data.get("uploader", "")),
+        "channel_id": data.get("channel_id"), "description": data.get("description", ""),
+        "view_count": data.get("view_count", 0), "like_count": data.get("like_count", 0),
+        "duration": data.get("duration", 0), "upload_date": data.get("upload_date", ""),
+        "subscriber_count": subs, "url": url,
+    }
+
+def measure_records(payloads: list[dict], count: int) -> dict:
+    """
+    Pour `count` candidats : temps de traitement de l'info dict (résolution des formats par yt-dlp
+    + extraction des champs, contre extraction seule en mode lean) et mémoire retenue par les
+    détails et les leads (dicts, contre VideoDetails / Lead). Info dicts synthétiques, hors réseau.
+    """
+    import copy
+    import yt_dlp
+    from prospector_records import VideoDetails, Lead
+
+    infos = [_full_info(payloads[i % len(payloads)], i) for i in range(count)]
+    ydl = yt_dlp.YoutubeDL(dict(yp.YTDLP_OPTIONS, simulate=True))
+    analysis = {"lead_score": 80, "needs_editor": True, "reason": "N/A", "evidence": [], "red_flags": []}
+
+    def timed(extract) -> float:
+        copies = [copy.deepcopy(info) for info in infos] # Hors chrono : yt-dlp travaille sur son propre dict
+        started = time.perf_counter()
+        for info in copies:
+            extract(info)
+        return time.perf_counter() - started
+
+    full_seconds = timed(lambda info: _legacy_details(ydl.process_ie_result(info, download=False), info["webpage_url"]))
+    lean_seconds = timed(lambda info: VideoDetails.from_info(info, info["webpage_url"]))
+
+    def retained(build) -> int:
+        # Seul ce qui survit à l'extraction est compté : les info dicts sont libérés au fil de l'eau
+        source = [json.dumps(info) for info in infos]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [build(json.loads(raw)) for raw in source]
+        size = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del kept
+        return size
+
+    def legacy(info):
+        details = _legacy_details(info, info["webpage_url"])
+        return details, {"channel": details["channel"], "channel_id": details["channel_id"], "video_title": details["title"],
+                         "url": details["url"], "upload_date": details["upload_date"],
+                         "subscriber_count": details["subscriber_count"], "view_count": details["view_count"],
+                         "analysis": analysis}
+
+    def compact(info):
+        details = VideoDetails.from_info(info, info["webpage_url"])
+        return details, Lead(channel=details.channel, channel_id=details.channel_id, video_title=details.title,
+                             url=details.url, upload_date=details.upload_date, subscriber_count=details.subscriber_count,
+                             view_count=details.view_count, analysis=analysis)
+
+    full_bytes, lean_bytes = retained(legacy), retained(compact)
+    per_1000 = 1000 / count
+    return {
+        "count": count,
+        "full_parse_ms_per_1000": round(full_seconds * per_1000 * 1000, 1),
+        "lean_parse_ms_per_1000": round(lean_seconds * per_1000 * 1000, 1),
+        "full_memory_kb_per_1000": round(full_bytes * per_1000 / 1024, 1),
+        "lean_memory_kb_per_1000": round(lean_bytes * per_1000 / 1024, 1),
+    }
+
+def measure_engine(payloads: list[dict], count: int) -> dict:
+    """
+    Coût fixe par vidéo, hors réseau, pour `count` vidéos : un interpréteur `python -m yt_dlp` par
+    vidéo (chemin d'avant YtDlpEngine, info dict rechargé par --load-info-json) contre une instance
+    YoutubeDL longue durée qui traite les mêmes info dicts. La latence réseau s'ajoute à l'identique
+    des deux côtés, hors session HTTP réutilisée (keep-alive) qui n'est pas mesurée ici.
+    """
+    import copy
+    import tempfile
+    import yt_dlp
+
+    infos = [_full_info(payloads[i % len(payloads)], i) for i in range(count)]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i, info in enumerate(infos):
+            paths.append(os.path.join(directory, f"{i}.info.json"))
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                json.dump(info, f)
+        started = time.perf_counter()
+        for path in paths:
+            subprocess.run([sys.executable, "-m", "yt_dlp", "--load-info-json", path, "--dump-json",
+                            "--skip-download", "--no-warnings"], capture_output=True, text=True, check=True, timeout=30)
+        subprocess_seconds = time.perf_counter() - started
+
+    copies = [copy.deepcopy(info) for info in infos]
+    started = time.perf_counter()
+    ydl = yt_dlp.YoutubeDL(dict(yp.YTDLP_OPTIONS, simulate=True))
+    for info in copies:
+        ydl.process_ie_result(info, download=False)
+    engine_seconds = time.perf_counter() - started
+    return {
+        "count": count,
+        "subprocess_seconds": round(subprocess_seconds, 2),
+        "engine_seconds": round(engine_seconds, 2),
+        "subprocess_ms_per_video": round(subprocess_seconds / count * 1000, 1),
+        "engine_ms_per_video": round(engine_seconds / count * 1000, 1),
+    }
+
+HEAVY_MODULES = ("groq", "yt_dlp", "numpy", "pandas", "pyarrow")
+
+def measure_startup(runs: int) -> dict:
+    """
+    Démarrage à froid du mode headless, dans des process neufs (médiane sur `runs`) : durée de
+    l'import de prospector_cli, durée totale du process (interpréteur compris) et modules
+    lourds chargés par ce seul import (idéalement aucun).
+    """
+    code = ("import sys, time; t = time.perf_counter(); import prospector_cli; "
+            "print(time.perf_counter() - t); print(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,))
+    root = os.path.dirname(os.path.abspath(__file__))
+    imports, totals, heavy = [], [], ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+        totals.append(time.perf_counter() - started)
+        seconds, heavy = out.split("\n")[:2]
+        imports.append(float(seconds))
+    return {
+        "runs": runs,
+        "import_seconds": round(_percentile(imports, 50), 3),
+        "process_seconds": round(_percentile(totals, 50), 3),
+        "heavy_modules": [m for m in heavy.split(",") if m],
+    }
+
+def record(query: str, count: int, directory: str = FIXTURES_DIR):
+    """Capture de vrais payloads --dump-json (réseau requis) vers videos.jsonl."""
+    import yt_dlp
+    os.makedirs(directory, exist_ok=True)
+    engine = yp.YtDlpEngine(lean=False) # Payloads complets, comme --dump-json
+    entries = engine.search(query, count)
+    path = os.path.join(directory, "videos.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            url = entry.get("url") or f"https://www.youtube.com/watch?v={entry.get('id')}"
+            try:
+                data = yt_dlp.YoutubeDL.sanitize_info(engine.extract_video(url))
+            except Exception as e:
+                print(f"⚠️ {url} : {e}")
+                continue
+            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+            print(f"✅ {data.get('channel')} - {data.get('title')}")
+    print(f"💾 Payloads enregistrés dans {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube Prospector - benchmark hors-ligne")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    # Moteur yt-dlp et client Groq simulés (commun à run et queue)
+    fake = argparse.ArgumentParser(add_help=False)
+    fake.add_argument("--fixtures", default=FIXTURES_DIR)
+    fake.add_argument("--time-scale", type=float, default=DEFAULT_TIME_SCALE, help="Multiplicateur des latences simulées")
+    fake.add_argument("--yt-error-rate", type=float, default=0.0, help="Part d'appels yt-dlp en 429")
+    fake.add_argument("--llm-error-rate", type=float, default=0.0, help="Part d'appels Groq en 429/503")
+    fake.add_argument("--llm-invalid-rate", type=float, default=0.0, help="Part de réponses Groq non JSON")
+    fake.add_argument("--retry-delay", type=float, default=0.05, help="Backoff de base des ordonnanceurs (s)")
+    fake.add_argument("--groq-rpm", type=float, default=0, help="Quota requêtes/min simulé (0 = illimité)")
+    fake.add_argument("--groq-tpm", type=float, default=0, help="Quota tokens/min simulé (0 = illimité)")
+    fake.add_argument("--youtube-rpm", type=float, default=0, help="Quota YouTube requêtes/min (0 = illimité)")
+    fake.add_argument("--fetch-workers", type=int, default=yp.DEFAULT_FETCH_WORKERS)
+    fake.add_argument("--seed", type=int, default=42)
+
+    run = sub.add_parser("run", parents=[fake], help="Rejoue les fixtures et mesure le pipeline")
+    run.add_argument("--sizes", default=DEFAULT_SIZES, help="Tailles de run (max_analyze), séparées par des virgules")
+    run.add_argument("--llm-workers", type=int, default=yp.DEFAULT_LLM_WORKERS)
+    run.add_argument("--batch-size", type=int, default=yp.DEFAULT_BATCH_SIZE)
+    run.add_argument("--channel-policy", default=yp.DEFAULT_CHANNEL_POLICY, choices=yp.CHANNEL_POLICIES)
+    run.add_argument("--cascade-band", type=int, default=yp.DEFAULT_CASCADE_BAND,
+                     help="Bande d'incertitude de la cascade (100 = tout renoter, pour mesurer l'accord global)")
+    run.add_argument("--no-cascade", action="store_true", help="Grand modèle seul")
+    run.add_argument("--cascade-compare", action="store_true",
+                     help="Rejoue chaque taille avec le grand modèle seul et compare latence, coût et verdicts")
+    run.add_argument("--rank-factor", type=float, default=yp.DEFAULT_RANK_FACTOR,
+                     help="Candidats filtrés par candidat envoyé à l'IA (classement local)")
+    run.add_argument("--no-rank", action="store_true", help="Ordre de la recherche, sans classement local")
+    run.add_argument("--rank-compare", action="store_true",
+                     help=f"Rejoue chaque taille sans classement et compare le rendement en leads qualifiés par appel IA "
+                          f"(classement à --rank-factor, {RANK_COMPARE_FACTOR} si le classement est désactivé par défaut)")
+    run.add_argument("--no-tracemalloc", action="store_true", help="Sans mesure mémoire (tracemalloc ralentit le run)")
+    run.add_argument("--json", help="Écrit les résultats dans ce fichier")
+    run.add_argument("--compare", help="Résultats de référence (--json d'un run précédent)")
+
+    que = sub.add_parser("queue", parents=[fake], help="Mode distribué : débit selon le nombre de workers, reprise des baux")
+    que.add_argument("--size", type=int, default=200, help="Résultats de recherche mis en file")
+    que.add_argument("--workers", default="1,2,4", help="Nombres de workers à comparer, séparés par des virgules")
+    que.add_argument("--claim-size", type=int, default=8)
+    que.add_argument("--lease", type=float, default=1.0, help="Durée d'un bail (s)")
+    que.add_argument("--llm-workers", type=int, default=yp.DEFAULT_LLM_WORKERS)
+    que.add_argument("--batch-size", type=int, default=yp.DEFAULT_BATCH_SIZE, help="Candidats par appel IA")
+    que.add_argument("--json", help="Écrit les résultats dans ce fichier")
+
+    rec = sub.add_parser("record", help="Enregistre de vrais payloads yt-dlp (réseau)")
+    rec.add_argument("query")
+    rec.add_argument("--count", type=int, default=30)
+    rec.add_argument("--fixtures", default=FIXTURES_DIR)
+
+    recs = sub.add_parser("records", help="Extraction complète vs allégée : temps et mémoire par 1000 candidats")
+    recs.add_argument("--count", type=int, default=1000)
+    recs.add_argument("--fixtures", default=FIXTURES_DIR)
+
+    eng = sub.add_parser("engine", help="Un process yt-dlp par vidéo vs moteur en process : coût fixe par vidéo (hors réseau)")
+    eng.add_argument("--count", type=int, default=50)
+    eng.add_argument("--fixtures", default=FIXTURES_DIR)
+
+    start = sub.add_parser("startup", help="Démarrage à froid du mode headless (process neufs)")
+    start.add_argument("--runs", type=int, default=5)
+    start.add_argument("--json", help="Ajoute la mesure à ce fichier (une ligne JSON par mesure, pour le suivi)")
+
+    args = parser.parse_args(argv)
+    if args.command == "startup":
+        m = measure_startup(args.runs)
+        print(f"Démarrage à froid (médiane sur {m['runs']} process) : import {m['import_seconds']}s, "
+              f"process complet {m['process_seconds']}s, modules lourds chargés : {', '.join(m['heavy_modules']) or 'aucun'}")
+        if args.json:
+            with open(args.json, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"run_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **m}) + "\n")
+        return 0
+    if args.command == "record":
+        record(args.query, args.count, args.fixtures)
+        return 0
+    if args.command == "records":
+        m = measure_records(load_fixtures(args.fixtures)[0], args.count)
+        print(f"Par 1000 candidats ({m['count']} mesurés, info dicts synthétiques de {SYNTHETIC_FORMATS} formats) :")
+        print(f"  traitement : {m['full_parse_ms_per_1000']} ms (complet) -> {m['lean_parse_ms_per_1000']} ms (lean)")
+        print(f"  mémoire retenue : {m['full_memory_kb_per_1000']} KB (dicts) -> {m['lean_memory_kb_per_1000']} KB (enregistrements)")
+        return 0
+
+    if args.command == "engine":
+        m = measure_engine(load_fixtures(args.fixtures)[0], args.count)
+        print(f"{m['count']} vidéos, hors réseau :")
+        print(f"  un process yt-dlp par vidéo : {m['subprocess_seconds']}s ({m['subprocess_ms_per_video']} ms/vidéo)")
+        print(f"  moteur en process (YoutubeDL réutilisé) : {m['engine_seconds']}s ({m['engine_ms_per_video']} ms/vidéo)")
+        return 0
+
+    payloads, completions, messages = load_fixtures(args.fixtures)
+    if args.command == "queue":
+        results = []
+        for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+            print(f"⏱️ File de {args.size} candidats, {workers} worker(s) + 1 worker mort...", flush=True)
+            results.append(run_queue(args.size, workers, payloads, completions, messages, args))
+        print_queue_report(results)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"run_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "params": vars(args),
+                           "results": results}, f, ensure_ascii=False, indent=2)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    cascade_band = None if args.no_cascade else args.cascade_band
+    rank_factor = None if args.no_rank else args.rank_factor
+    if args.rank_compare and not (rank_factor and rank_factor > 1):
+        rank_factor = RANK_COMPARE_FACTOR
+    results, references, unranked = [], [], []
+    for size in sizes:
+        print(f"⏱️ Run de {size} candidats...", flush=True)
+        results.append(run_size(size, payloads, completions, messages, args, cascade_band, rank_factor))
+        if args.cascade_compare and cascade_band is not None:
+            print(f"⏱️ Run de {size} candidats (grand modèle seul)...", flush=True)
+            references.append(run_size(size, payloads, completions, messages, args, None, rank_factor))
+        if args.rank_compare and rank_factor:
+            print(f"⏱️ Run de {size} candidats (ordre de la recherche)...", flush=True)
+            unranked.append(run_size(size, payloads, completions, messages, args, cascade_band, None))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_report(results, baseline)
+    if references:
+        print_cascade_report(results, references)
+    if unranked:
+        print_ranking_report(results, unranked)
+
+    if args.json:
+        report = {"run_timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "params": vars(args), "results": results}
+        if references:
+            report["large_only"] = references
+        if unranked:
+            report["unranked"] = unranked
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Résultats : {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
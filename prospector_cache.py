@@ -0,0 +1,263 @@
+"""
+Caches persistants (SQLite) du Prospector.
+Évite de re-télécharger les métadonnées et de re-payer les analyses IA déjà faites lors des runs précédents.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+# --- CONFIGURATION ---
+CACHE_DIR = os.environ.get("PROSPECTOR_CACHE_DIR", ".prospector_cache")
+METADATA_TTL_HOURS = 6          # Vues / abonnés bougent : au-delà on re-télécharge
+METADATA_MAX_ENTRIES = 20000    # Au-delà, éviction LRU
+LLM_TTL_DAYS = 30               # Les critères de scoring évoluent : on ne garde pas indéfiniment
+LLM_MAX_ENTRIES = 20000
+CHANNEL_TTL_DAYS = 7            # Un nombre d'abonnés reste valable une semaine
+
+def cache_path(filename: str) -> str:
+    """Chemin d'un fichier de cache (le dossier est créé au besoin)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+class SqliteStore:
+    """Base commune : une connexion SQLite partagée entre threads, protégée par un verrou."""
+
+    SCHEMA = ""
+    JOURNAL_MODE = "WAL"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute(f"PRAGMA journal_mode={self.JOURNAL_MODE}")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _ensure_column(self, table: str, column: str, decl: str):
+        """Migration légère : ajoute la colonne si la base date d'une version antérieure."""
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+            self._conn.commit()
+
+    def _evict_lru(self, table: str, key: str, max_entries: int):
+        """Supprime les entrées les moins récemment lues au-delà de max_entries (verrou déjà pris)."""
+        self._conn.execute(
+            f"DELETE FROM {table} WHERE {key} IN ("
+            f" SELECT {key} FROM {table} ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (max_entries,),
+        )
+
+class MetadataCache(SqliteStore):
+    """
+    Cache des métadonnées vidéo (sortie de get_video_details), clé = ID vidéo.
+    - TTL : une entrée plus vieille que ttl_hours est considérée périmée (miss).
+    - Taille plafonnée : les entrées les moins récemment lues sont évincées (LRU).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS videos (
+        video_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS videos_last_access ON videos(last_access);
+    """
+
+    def __init__(self, path: str | None = None, ttl_hours: float = METADATA_TTL_HOURS,
+                 max_entries: int = METADATA_MAX_ENTRIES):
+        super().__init__(path or cache_path("metadata.sqlite"))
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, video_id: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, fetched_at FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                self.expired += 1
+                return None
+            self._conn.execute("UPDATE videos SET last_access = ? WHERE video_id = ?", (now, video_id))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, video_id: str, details: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, data, fetched_at, last_access) VALUES (?, ?, ?, ?)",
+                (video_id, json.dumps(details, ensure_ascii=False), now, now),
+            )
+            self._evict_lru("videos", "video_id", self.max_entries)
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "expired": self.expired}
+
+class LLMCache(SqliteStore):
+    """
+    Cache des analyses IA, adressé par contenu : clé = hash(modèle, prompt, langue).
+    Un même candidat avec des métadonnées inchangées ne repasse pas par Groq.
+    Éviction : TTL (ttl_days) + plafond LRU. Chaque entrée garde les tokens et la latence
+    de l'appel d'origine pour chiffrer ce que le cache a économisé pendant le run.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS analyses (
+        key TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        tokens INTEGER NOT NULL,
+        latency REAL NOT NULL,
+        created_at REAL NOT NULL,
+        last_access REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS analyses_last_access ON analyses(last_access);
+    """
+
+    def __init__(self, path: str | None = None, ttl_days: float = LLM_TTL_DAYS,
+                 max_entries: int = LLM_MAX_ENTRIES):
+        super().__init__(path or cache_path("llm.sqlite"))
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.seconds_saved = 0.0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, language: str) -> str:
+        return hashlib.sha256("\x00".join((model, prompt, language)).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, tokens, latency, created_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[3] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE analyses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            self.tokens_saved += row[1]
+            self.seconds_saved += row[2]
+        return json.loads(row[0])
+
+    def put(self, key: str, analysis: dict, tokens: int, latency: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, data, tokens, latency, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(analysis, ensure_ascii=False), int(tokens or 0), latency, now, now),
+            )
+            self._conn.execute("DELETE FROM analyses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._evict_lru("analyses", "key", self.max_entries)
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "tokens_saved": self.tokens_saved,
+            "seconds_saved": round(self.seconds_saved, 2),
+        }
+
+class ChannelIndex(SqliteStore):
+    """
+    Index des chaînes déjà rencontrées, clé = ID de chaîne, partagé entre les runs.
+    - Abonnés et dernière décision (gate ou score IA), valables ttl_days : évitent de
+      re-télécharger / re-scorer une chaîne déjà connue.
+    - Statut permanent ('lead' = déjà prospectée, 'contacted' = déjà contactée) : un lead
+      déjà obtenu n'est jamais repayé, ni en récupération ni en appel IA.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS channels (
+        channel_id TEXT PRIMARY KEY,
+        channel TEXT,
+        subscriber_count INTEGER,
+        decision TEXT,
+        reason TEXT,
+        lead_score INTEGER,
+        video_url TEXT,
+        updated_at REAL NOT NULL,
+        status TEXT
+    );
+    """
+    FIELDS = ("channel", "subscriber_count", "decision", "reason", "lead_score", "video_url")
+    STATUSES = ("lead", "contacted")
+
+    def __init__(self, path: str | None = None, ttl_days: float = CHANNEL_TTL_DAYS):
+        super().__init__(path or cache_path("channels.sqlite"))
+        self._ensure_column("channels", "status", "TEXT")
+        self.ttl_seconds = ttl_days * 86400
+
+    def get(self, channel_id: str) -> dict | None:
+        if not channel_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.FIELDS)}, status, updated_at FROM channels WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(self.FIELDS, row))
+        entry["status"] = row[-2]
+        if time.time() - row[-1] > self.ttl_seconds:
+            # Abonnés / décision périmés : seul le statut reste valable
+            if not entry["status"]:
+                return None
+            entry = dict.fromkeys(self.FIELDS, None) | {"channel": entry["channel"], "status": entry["status"]}
+        return entry
+
+    def record(self, channel_id: str, **fields):
+        """Met à jour la fiche de la chaîne ; les champs à None ne remplacent pas les valeurs connues."""
+        if not channel_id:
+            return
+        values = [fields.get(f) for f in self.FIELDS]
+        updates = ", ".join(f"{f} = COALESCE(excluded.{f}, {f})" for f in self.FIELDS)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO channels (channel_id, {', '.join(self.FIELDS)}, updated_at)"
+                f" VALUES (?, {', '.join('?' * len(self.FIELDS))}, ?)"
+                f" ON CONFLICT(channel_id) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+                (channel_id, *values, time.time()),
+            )
+            self._conn.commit()
+
+    def set_status(self, channel_id: str, status: str, channel: str | None = None):
+        """Marque la chaîne 'lead' ou 'contacted' ('contacted' n'est jamais rétrogradé)."""
+        if not channel_id:
+            return
+        if status not in self.STATUSES:
+            raise ValueError(f"Statut inconnu : {status}")
+        with self._lock:
+            # updated_at = 0 à la création : le statut ne rend pas les autres champs 'frais'
+            self._conn.execute(
+                "INSERT INTO channels (channel_id, channel, status, updated_at) VALUES (?, ?, ?, 0)"
+                " ON CONFLICT(channel_id) DO UPDATE SET channel = COALESCE(excluded.channel, channel),"
+                " status = CASE WHEN status = 'contacted' THEN status ELSE excluded.status END",
+                (channel_id, channel, status),
+            )
+            self._conn.commit()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Mode headless : un run piloté par arguments, résultats en JSON Lines sur la sortie standard.
+Une ligne par événement ({"type": "lead" | "rejection" | "summary", ...}), flushée aussitôt ;
+les logs partent sur stderr. Pensé pour les pipelines shell et les crons :
+
+    python prospector_cli.py "montage vidéo" --max-analyze 20 > leads.jsonl
+    python prospector_cli.py crypto --language en --only-qualified | jq -r .video_url
+
+Démarrage à froid : Groq, yt-dlp et NumPy ne sont importés qu'au premier appel qui en a besoin.
+La ligne summary donne "startup" : temps d'import et délai jusqu'à la première ligne émise.
+"""
+
+import time
+
+_STARTED = time.perf_counter() # Avant tout import du Prospector : base du délai de démarrage
+
+import os
+import sys
+import json
+import argparse
+
+import youtube_prospector as yp
+from prospector_warehouse import LeadWarehouse, warehouse_available
+
+_IMPORTED = time.perf_counter()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="YouTube Prospector - mode headless (JSON Lines sur stdout)")
+    parser.add_argument("niche", help="Niche / requête de recherche")
+    parser.add_argument("--language", default="fr", choices=["fr", "en"])
+    parser.add_argument("--max-analyze", type=int, default=10, help="Nombre de vidéos à analyser")
+    parser.add_argument("--subs-min", type=int, default=0)
+    parser.add_argument("--subs-max", type=int, default=500000)
+    parser.add_argument("--fetch-workers", type=int, default=yp.DEFAULT_FETCH_WORKERS)
+    parser.add_argument("--llm-workers", type=int, default=yp.DEFAULT_LLM_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=yp.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--channel-policy", default=yp.DEFAULT_CHANNEL_POLICY, choices=yp.CHANNEL_POLICIES)
+    parser.add_argument("--cascade-band", type=int, default=yp.DEFAULT_CASCADE_BAND,
+                        help="Bande d'incertitude autour de 70 renotée par le grand modèle")
+    parser.add_argument("--no-cascade", action="store_true", help="Grand modèle pour tous les candidats")
+    parser.add_argument("--rank-factor", type=float, default=yp.DEFAULT_RANK_FACTOR,
+                        help="Candidats filtrés par candidat envoyé à l'IA (classement local, ex. 2 ; 1 = désactivé)")
+    parser.add_argument("--no-rank", action="store_true", help="Ordre de la recherche, sans classement local")
+    parser.add_argument("--cache-ttl-hours", type=float, default=yp.METADATA_TTL_HOURS,
+                        help="Validité du cache métadonnées (0 = désactivé)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Force un nouvel appel Groq par candidat")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore le journal d'un run interrompu")
+    parser.add_argument("--include-known", action="store_true", help="Ne saute pas les chaînes déjà prospectées")
+    parser.add_argument("--only-qualified", action="store_true", help="N'émet que les leads qualifiés (ni rejets ni non-qualifiés)")
+    parser.add_argument("--performance", help="Écrit les mesures détaillées (spans compris) dans ce fichier JSON")
+    parser.add_argument("--quiet", action="store_true", help="Pas de logs sur stderr")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if not os.environ.get("GROQ_API_KEY"):
+        print("❌ CRITIQUE : Variable GROQ_API_KEY manquante.", file=sys.stderr)
+        return 1
+
+    def logger(msg):
+        if not args.quiet:
+            print(msg, file=sys.stderr, flush=True)
+
+    first_output = None
+    failed = False
+    # Historique : tous les événements y vont, --only-qualified ne filtre que la sortie standard
+    warehouse = LeadWarehouse().writer(args.niche) if warehouse_available() else None
+    events = yp.iter_prospector(
+        niche=args.niche,
+        language=args.language,
+        max_analyze=args.max_analyze,
+        subs_min=args.subs_min,
+        subs_max=args.subs_max,
+        logger=logger,
+        fetch_workers=args.fetch_workers,
+        llm_workers=args.llm_workers,
+        batch_size=args.batch_size,
+        channel_policy=args.channel_policy,
+        cascade_band=None if args.no_cascade else args.cascade_band,
+        rank_factor=None if args.no_rank else args.rank_factor,
+        cache_ttl_hours=args.cache_ttl_hours,
+        use_llm_cache=not args.no_llm_cache,
+        resume=not args.no_resume,
+        skip_known_leads=not args.include_known,
+    )
+    try:
+        with yp.LeadSink("-", args.niche) as sink:
+            for kind, payload in events:
+                if kind == "summary":
+                    performance = payload["performance"]
+                    if args.performance:
+                        with open(args.performance, "w", encoding="utf-8") as f:
+                            json.dump(performance, f, ensure_ascii=False, indent=2)
+                    summary = {**payload, "performance": {k: v for k, v in performance.items() if k != "spans"}}
+                    summary["startup"] = {
+                        "import_seconds": round(_IMPORTED - _STARTED, 3),
+                        "first_output_seconds": round(first_output, 3) if first_output is not None else None,
+                    }
+                    sys.stdout.write(json.dumps({"type": "summary", **summary}, ensure_ascii=False) + "\n")
+                    sys.stdout.flush()
+                    failed = bool(summary.get("errors"))
+                    continue
+                if warehouse:
+                    warehouse.write(kind, payload)
+                if args.only_qualified and not (kind == "lead" and payload["analysis"].get("needs_editor")):
+                    continue
+                sink.write(kind, payload)
+                if first_output is None:
+                    first_output = time.perf_counter() - _STARTED
+                    logger(f"⏱️ Première ligne émise après {first_output:.2f}s (imports {_IMPORTED - _STARTED:.2f}s)")
+    except BrokenPipeError:
+        # Lecteur fermé (| head, ...) : arrêt propre du pipeline, sans trace sur stderr
+        events.close()
+        # Redirige le descripteur (pas l'objet) : le flush final de l'interpréteur ne lève plus
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except KeyboardInterrupt:
+        events.close()
+        return 130
+    finally:
+        if warehouse:
+            warehouse.close()
+    return 1 if failed else 0 # Run écourté par une erreur d'étage : le summary est émis, le code le signale
+
+if __name__ == "__main__":
+    sys.exit(main())
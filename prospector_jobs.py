@@ -0,0 +1,154 @@
+"""
+Exécution des runs du Prospector en arrière-plan (pour l'app Streamlit).
+Un JobManager unique par process (st.cache_resource) : les runs survivent aux reruns du script,
+plusieurs jobs peuvent être mis en file et chacun peut être annulé. L'UI ne fait que lire
+l'état et les résultats partiels des jobs, sans jamais bloquer.
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from youtube_prospector import iter_prospector
+
+# --- CONFIGURATION ---
+JOB_WORKERS = int(os.environ.get("PROSPECTOR_JOB_WORKERS", 2)) # Runs simultanés, les autres attendent en file
+MAX_FINISHED_JOBS = 50 # Jobs terminés conservés en mémoire
+JOB_LOG_LINES = 10
+
+# États d'un job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+FINISHED = (DONE, CANCELLED, FAILED)
+
+class Job:
+    """Un run du Prospector : paramètres, état et résultats partiels (lus par l'UI pendant le run)."""
+
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex[:8]
+        self.params = params
+        self.status = QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.rows = []
+        self.rejections = []
+        self.summary = {}
+        self.logs = deque(maxlen=JOB_LOG_LINES)
+        self.cancel_requested = threading.Event()
+        self.future = None
+        self._lock = threading.Lock()
+
+    def log(self, msg: str):
+        with self._lock:
+            self.logs.append(msg)
+
+    def add(self, kind: str, payload: dict):
+        with self._lock:
+            if kind == "lead":
+                self.rows.append(payload)
+            elif kind == "rejection":
+                self.rejections.append(payload)
+            elif kind == "summary":
+                self.summary = payload
+
+    def snapshot(self) -> dict:
+        """Copie cohérente de l'état courant : {status, error, rows, rejections, summary, logs, ...}."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "params": dict(self.params),
+                "status": self.status,
+                "error": self.error,
+                "rows": list(self.rows),
+                "rejections": list(self.rejections),
+                "summary": dict(self.summary),
+                "logs": list(self.logs),
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+    def _set_status(self, status: str, error: str | None = None):
+        with self._lock:
+            self.status = status
+            if status == RUNNING:
+                self.started_at = time.time()
+            elif status in FINISHED:
+                self.finished_at = time.time()
+                self.error = error
+
+class JobManager:
+    """File de jobs exécutés sur un pool de threads partagé par toutes les sessions."""
+
+    def __init__(self, workers: int = JOB_WORKERS, warehouse=None):
+        # warehouse (LeadWarehouse, optionnel) reçoit les leads et rejets de chaque job
+        self.warehouse = warehouse
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prospector-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, **params) -> Job:
+        """Met un run en file ; params = arguments de iter_prospector (hors logger)."""
+        job = Job(params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, ids=None) -> list[Job]:
+        """Jobs (tous, ou ceux de `ids`), du plus récent au plus ancien."""
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if ids is None or j.id in ids]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """Annule un job en file (immédiat) ou en cours (au prochain événement du run)."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job.cancel_requested.set()
+        if job.future and job.future.cancel():
+            job._set_status(CANCELLED)
+        return True
+
+    def _run(self, job: Job):
+        if job.cancel_requested.is_set():
+            job._set_status(CANCELLED)
+            return
+        job._set_status(RUNNING)
+        events = iter_prospector(logger=job.log, **job.params)
+        sink = self.warehouse.writer(job.params["niche"]) if self.warehouse else None
+        try:
+            for kind, payload in events:
+                if job.cancel_requested.is_set():
+                    break
+                job.add(kind, payload)
+                if sink:
+                    sink.write(kind, payload)
+        except Exception as e:
+            job._set_status(FAILED, str(e))
+            return
+        finally:
+            # Arrêt du générateur : les étages du pipeline se vident sans nouveaux appels réseau
+            events.close()
+            if sink:
+                sink.close()
+        job._set_status(CANCELLED if job.cancel_requested.is_set() else DONE)
+
+    def _prune(self):
+        """Oublie les jobs terminés les plus anciens au-delà de MAX_FINISHED_JOBS (verrou déjà pris)."""
+        finished = sorted((j for j in self._jobs.values() if j.status in FINISHED), key=lambda j: j.created_at)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
@@ -0,0 +1,97 @@
+"""
+Journal de run (append-only, JSON Lines) pour reprendre un run interrompu.
+Chaque candidat y laisse son étage et son résultat ; au redémarrage avec les mêmes paramètres,
+la recherche, les rejets, les candidats déjà filtrés et les leads déjà scorés sont rejoués
+sans nouvel appel YouTube ni Groq.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+from prospector_cache import cache_path
+
+# Étages enregistrés
+SEARCH = "search"      # {"videos": [...], "position", "exhausted"} : une page de résultats de recherche
+REJECTED = "rejected"  # {"rejection": {...}}
+PASSED = "passed"      # {"details": {...}, "flags": [...]} : a passé les gates, en attente d'IA
+SCORED = "scored"      # {"lead": {...}}
+DONE = "done"          # {"summary": {...}} : run terminé
+
+def run_key(niche: str, language: str, max_analyze: int, subs_min: int, subs_max: int, day: str | None = None) -> str:
+    """Identifiant stable d'un run : mêmes paramètres le même jour = même journal."""
+    day = day or datetime.now().strftime("%Y-%m-%d")
+    raw = "|".join(str(v) for v in (niche.strip().lower(), language, max_analyze, subs_min, subs_max, day))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+class RunJournal:
+    """Journal d'un run ; append() est thread-safe et chaque ligne est flushée immédiatement."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._closed = False # Après close(), les étages encore en vol n'écrivent plus rien
+
+    @classmethod
+    def for_run(cls, niche, language, max_analyze, subs_min, subs_max) -> "RunJournal":
+        directory = cache_path("journal")
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, f"{run_key(niche, language, max_analyze, subs_min, subs_max)}.jsonl"))
+
+    def load(self) -> dict:
+        """
+        État reconstruit depuis le journal : {"videos", "search", "candidates", "done"}.
+        search = {"position", "exhausted"} : où le curseur de recherche s'était arrêté.
+        candidates = {video_id: dernier enregistrement}. Une ligne tronquée (crash en pleine écriture) est ignorée.
+        """
+        state = {"videos": None, "search": {"position": 0, "exhausted": False}, "candidates": {}, "done": False}
+        if not os.path.exists(self.path):
+            return state
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                stage = record.get("stage")
+                if stage == SEARCH:
+                    # Une ligne par page de recherche
+                    state["videos"] = (state["videos"] or []) + (record.get("videos") or [])
+                    # Journaux antérieurs sans position : au moins les vidéos gardées
+                    state["search"] = {"position": record.get("position", len(state["videos"])),
+                                       "exhausted": record.get("exhausted", False)}
+                elif stage == DONE:
+                    state["done"] = True
+                elif record.get("video_id"):
+                    state["candidates"][record["video_id"]] = record
+        return state
+
+    def reset(self):
+        """Nouveau run : on repart d'un journal vide."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._closed = False
+
+    def append(self, stage: str, video_id: str | None = None, **data):
+        record = {"stage": stage, "video_id": video_id, **data}
+        # Enregistrements compacts (VideoDetails, Lead) : sérialisés via to_dict()
+        line = json.dumps(record, ensure_ascii=False, default=lambda obj: obj.to_dict()) + "\n"
+        with self._lock:
+            if self._closed:
+                return
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._file:
+                self._file.close()
+                self._file = None
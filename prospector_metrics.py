@@ -0,0 +1,108 @@
+"""
+Instrumentation d'un run du Prospector : durée de chaque étage pour chaque candidat,
+compteurs et histogrammes de latence. Tout est exportable en JSON (summary["performance"]).
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Bornes hautes des classes d'histogramme (secondes) ; la dernière classe est "> 30s"
+HISTOGRAM_BOUNDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+PERCENTILE_SAMPLES = 4096 # Dernières mesures gardées par étage pour p50 / p95
+MAX_SPANS = 20000         # Derniers spans gardés pour l'export détaillé (mémoire bornée sur les longs runs)
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def _bucket_label(i: int) -> str:
+    if i == len(HISTOGRAM_BOUNDS):
+        return f">{HISTOGRAM_BOUNDS[-1]}s"
+    return f"<={HISTOGRAM_BOUNDS[i]}s"
+
+class RunMetrics:
+    """
+    Mesures d'un run, alimentées par tous les threads du pipeline (thread-safe).
+    - span(stage, video_id) : chronomètre un étage pour un candidat (ou un lot : liste d'IDs)
+    - record(stage, seconds, video_id) : durée mesurée ailleurs (ex. latence de bout en bout d'un lead)
+    - count(name, n) : compteur libre
+    Nombre, total, max et histogramme sont cumulés sur tout le run ; p50 / p95 portent sur les
+    PERCENTILE_SAMPLES dernières mesures de l'étage et l'export détaillé sur les MAX_SPANS derniers spans.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = deque(maxlen=MAX_SPANS)
+        self.spans_dropped = 0
+        self.counters = {}
+        self._stages = {} # stage -> {"count", "total", "max", "histogram", "samples"}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, video_id=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, video_id, start=start)
+
+    def record(self, stage: str, seconds: float, video_id=None, start: float | None = None):
+        offset = (start if start is not None else time.perf_counter() - seconds) - self.started
+        bucket = next((i for i, b in enumerate(HISTOGRAM_BOUNDS) if seconds <= b), len(HISTOGRAM_BOUNDS))
+        with self._lock:
+            if len(self.spans) == MAX_SPANS:
+                self.spans_dropped += 1
+            self.spans.append((stage, video_id, offset, seconds))
+            agg = self._stages.get(stage)
+            if agg is None:
+                agg = self._stages[stage] = {"count": 0, "total": 0.0, "max": 0.0,
+                                             "histogram": [0] * (len(HISTOGRAM_BOUNDS) + 1),
+                                             "samples": deque(maxlen=PERCENTILE_SAMPLES)}
+            agg["count"] += 1
+            agg["total"] += seconds
+            agg["max"] = max(agg["max"], seconds)
+            agg["histogram"][bucket] += 1
+            agg["samples"].append(seconds)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stages(self) -> dict:
+        """Par étage : nombre de mesures, temps cumulé, p50 / p95 / max et histogramme."""
+        with self._lock:
+            aggregates = {stage: {**agg, "histogram": list(agg["histogram"]), "samples": sorted(agg["samples"])}
+                          for stage, agg in self._stages.items()}
+
+        stages = {}
+        for stage, agg in aggregates.items():
+            stages[stage] = {
+                "count": agg["count"],
+                "total_seconds": round(agg["total"], 3),
+                "p50": round(_percentile(agg["samples"], 50), 3),
+                "p95": round(_percentile(agg["samples"], 95), 3),
+                "max": round(agg["max"], 3),
+                "histogram": {_bucket_label(i): n for i, n in enumerate(agg["histogram"])},
+            }
+        return stages
+
+    def to_dict(self, **counters) -> dict:
+        """Export complet ; les compteurs passés en argument (caches, quotas...) complètent ceux du run."""
+        with self._lock:
+            spans = [
+                {"stage": stage, "video_id": video_id, "start": round(offset, 4), "seconds": round(seconds, 4)}
+                for stage, video_id, offset, seconds in self.spans
+            ]
+            all_counters = {**self.counters, **counters}
+            dropped = self.spans_dropped
+        stages = self.stages()
+        return {
+            "wall_seconds": round(time.perf_counter() - self.started, 3),
+            "stages": stages,
+            "counters": all_counters,
+            "spans": spans,
+            "spans_dropped": dropped,
+        }
@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+Mode distribué : une file de candidats durable (SQLite) partagée entre producteurs et workers.
+- enqueue : cherche une niche et met ses candidats en file (pré-filtre 'flat' et index des chaînes appliqués)
+- worker  : réserve des candidats avec un bail, les récupère, les filtre et les score ; leads et rejets
+            sont écrits dans la file, qui sert de sink partagé (et, au choix, dans un fichier local)
+- status / export : avancement par run, export CSV / JSON Lines des leads (LeadSink)
+Si pandas / pyarrow sont installés, rejets de mise en file, leads et rejets des workers sont aussi
+versés dans l'entrepôt historique (prospector_warehouse), comme un run de l'interface ou du batch.
+Un worker renouvelle ses baux tant qu'il tourne ; s'il meurt, ses candidats redeviennent réservables
+à l'expiration du bail et sont retentés (au plus MAX_ATTEMPTS réservations). Pour monter en charge,
+il suffit de lancer d'autres workers sur la même base.
+
+Usage :
+    python prospector_queue.py enqueue "montage vidéo" --max-analyze 100
+    python prospector_queue.py worker --quota-share 4      (x4, sur une ou plusieurs machines)
+    python prospector_queue.py status
+    python prospector_queue.py export leads.csv
+
+Plusieurs machines : la base (--db) doit être sur un volume partagé où le verrouillage de fichiers
+fonctionne ; passez alors --shared-fs (journal classique : le WAL suppose que tous les accès sont locaux).
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import youtube_prospector as yp
+from prospector_cache import SqliteStore, MetadataCache, LLMCache, ChannelIndex, cache_path
+from prospector_journal import run_key
+from prospector_metrics import RunMetrics
+from prospector_records import Lead
+from prospector_warehouse import LeadWarehouse, warehouse_available
+
+# --- CONFIGURATION ---
+QUEUE_PATH = os.environ.get("PROSPECTOR_QUEUE") # Défaut : queue.sqlite dans le dossier de cache
+DEFAULT_LEASE_SECONDS = 300 # Sans renouvellement pendant ce délai (worker mort), le candidat redevient réservable
+DEFAULT_CLAIM_SIZE = 8      # Candidats réservés d'un coup par un worker
+MAX_ATTEMPTS = 3            # Réservations au plus par candidat (crashs, récupérations en échec) avant 'failed'
+POLL_INTERVAL = 2.0         # s, attente d'un worker quand la file est vide
+DEFAULT_IDLE_EXIT = 30      # s sans candidat avant l'arrêt d'un worker (0 = attend indéfiniment)
+
+# États d'un candidat
+PENDING = "pending"
+LEASED = "leased"
+LEAD = "lead"
+REJECTED = "rejected"
+SKIPPED = "skipped" # Objectif du run atteint avant son tour
+FAILED = "failed"
+STATUSES = (PENDING, LEASED, LEAD, REJECTED, SKIPPED, FAILED)
+
+# Verdicts de CandidateQueue.admit
+ADMITTED = "admitted"
+CHANNEL_TAKEN = "channel"
+QUOTA_REACHED = "quota"
+LEASE_LOST = "lost"
+
+class CandidateQueue(SqliteStore):
+    """
+    File durable des candidats, un enregistrement par (run, vidéo).
+    Cycle : pending -> leased (bail daté, renouvelé par le worker) -> lead | rejected | skipped,
+    ou retour en pending (échec, bail expiré) jusqu'à MAX_ATTEMPTS réservations, puis failed.
+    Toutes les transitions se font sous BEGIN IMMEDIATE : deux workers, même sur deux machines,
+    ne réservent jamais le même candidat, et seul le détenteur du bail peut clore un candidat.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        niche TEXT NOT NULL,
+        language TEXT NOT NULL,
+        max_analyze INTEGER NOT NULL,
+        subs_min INTEGER NOT NULL,
+        subs_max INTEGER NOT NULL,
+        dedupe_channels INTEGER NOT NULL,
+        admitted INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS candidates (
+        run_id TEXT NOT NULL,
+        video_id TEXT NOT NULL,
+        channel_id TEXT,
+        video TEXT NOT NULL,
+        status TEXT NOT NULL,
+        admitted INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        lease_until REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        result TEXT,
+        error TEXT,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (run_id, video_id)
+    );
+    CREATE INDEX IF NOT EXISTS candidates_status ON candidates(status, lease_until);
+    CREATE INDEX IF NOT EXISTS candidates_channel ON candidates(run_id, channel_id);
+    """
+    RUN_FIELDS = ("niche", "language", "max_analyze", "subs_min", "subs_max", "dedupe_channels")
+
+    def __init__(self, path: str | None = None, shared_fs: bool = False):
+        if shared_fs:
+            self.JOURNAL_MODE = "DELETE"
+        super().__init__(path or QUEUE_PATH or cache_path("queue.sqlite"))
+
+    @contextmanager
+    def _transaction(self):
+        """Transaction d'écriture exclusive (verrou pris dès le début, y compris entre process)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    # --- Producteurs ---
+    def add_run(self, niche: str, language: str = "fr", max_analyze: int = 10, subs_min: int = 0,
+                subs_max: int = 500000, dedupe_channels: bool = True) -> str:
+        """Déclare un run (mêmes paramètres le même jour = même run, comme le journal) ; retourne son ID."""
+        run_id = run_key(niche, language, max_analyze, subs_min, subs_max)
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT OR IGNORE INTO runs (run_id, {', '.join(self.RUN_FIELDS)}, created_at)"
+                f" VALUES (?, {', '.join('?' * len(self.RUN_FIELDS))}, ?)",
+                (run_id, niche, language, max_analyze, subs_min, subs_max, int(dedupe_channels), time.time()),
+            )
+        return run_id
+
+    def enqueue(self, run_id: str, videos: list[dict]) -> int:
+        """
+        Met des candidats 'flat' en file ; retourne le nombre réellement ajouté. Une vidéo déjà en
+        file est ignorée (producteurs concurrents, recherche relancée), comme une chaîne déjà présente
+        dans le run si celui-ci dédoublonne les chaînes.
+        """
+        now = time.time()
+        added = 0
+        with self._transaction() as conn:
+            dedupe = conn.execute("SELECT dedupe_channels FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0]
+            for video in videos:
+                channel_id = video.get("channel_id")
+                if dedupe and channel_id and conn.execute(
+                    "SELECT 1 FROM candidates WHERE run_id = ? AND channel_id = ?", (run_id, channel_id)
+                ).fetchone():
+                    continue
+                added += conn.execute(
+                    "INSERT OR IGNORE INTO candidates (run_id, video_id, channel_id, video, status, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, video["id"], channel_id, json.dumps(video, ensure_ascii=False), PENDING, now),
+                ).rowcount
+        return added
+
+    def add_rejection(self, run_id: str, video: dict, rejection: dict):
+        """Candidat écarté dès la mise en file (pré-filtre) : enregistré directement comme rejet."""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO candidates (run_id, video_id, channel_id, video, status, result, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, video["id"], video.get("channel_id"), json.dumps(video, ensure_ascii=False), REJECTED,
+                 json.dumps(rejection, ensure_ascii=False), time.time()),
+            )
+
+    # --- Workers ---
+    def claim(self, worker: str, n: int = DEFAULT_CLAIM_SIZE, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> list[dict]:
+        """
+        Réserve jusqu'à n candidats (en attente, ou dont le bail a expiré) pour `worker`.
+        Retourne des dicts {run_id, video_id, video, run, attempts, reclaimed}. Les runs dont
+        l'objectif est atteint ne sont plus servis : leurs candidats en attente ou au bail expiré
+        passent en 'skipped', sauf ceux déjà admis (worker mort avant le scoring), qui restent à scorer.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            self._skip_completed(conn, now)
+            # Bail expiré sur un candidat déjà réservé MAX_ATTEMPTS fois : on abandonne
+            conn.execute(
+                "UPDATE candidates SET status = ?, worker = NULL, lease_until = NULL,"
+                " error = COALESCE(error, 'Bail expiré'), updated_at = ?"
+                " WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, MAX_ATTEMPTS),
+            )
+            rows = conn.execute(
+                f"SELECT c.run_id, c.video_id, c.video, c.attempts, c.status, {', '.join('r.' + f for f in self.RUN_FIELDS)}"
+                " FROM candidates c JOIN runs r ON r.run_id = c.run_id"
+                " WHERE (c.status = ? OR (c.status = ? AND c.lease_until < ?)) AND (r.admitted < r.max_analyze OR c.admitted = 1)"
+                " ORDER BY c.rowid LIMIT ?",
+                (PENDING, LEASED, now, n),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE candidates SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE run_id = ? AND video_id = ?",
+                [(LEASED, worker, now + lease_seconds, now, row[0], row[1]) for row in rows],
+            )
+        return [{
+            "run_id": row[0],
+            "video_id": row[1],
+            "video": json.loads(row[2]),
+            "attempts": row[3] + 1,
+            "reclaimed": row[4] == LEASED,
+            "run": dict(zip(self.RUN_FIELDS, row[5:])),
+        } for row in rows]
+
+    def _skip_completed(self, conn, now: float, run_id: str | None = None):
+        """Clôt en 'skipped' les candidats non admis, en attente ou au bail expiré, des runs complets (transaction ouverte)."""
+        where = " AND run_id = ?" if run_id else ""
+        conn.execute(
+            "UPDATE candidates SET status = ?, worker = NULL, lease_until = NULL, updated_at = ?"
+            " WHERE admitted = 0 AND (status = ? OR (status = ? AND lease_until < ?))"
+            f" AND run_id IN (SELECT run_id FROM runs WHERE admitted >= max_analyze{where})",
+            (SKIPPED, now, PENDING, LEASED, now, *((run_id,) if run_id else ())),
+        )
+
+    def renew(self, worker: str, keys: list[tuple[str, str]], lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """Prolonge les baux (run_id, video_id) encore détenus par `worker` ; retourne le nombre prolongé."""
+        if not keys:
+            return 0
+        lease_until = time.time() + lease_seconds
+        with self._transaction() as conn:
+            return sum(conn.execute(
+                "UPDATE candidates SET lease_until = ? WHERE run_id = ? AND video_id = ? AND worker = ? AND status = ?",
+                (lease_until, run_id, video_id, worker, LEASED),
+            ).rowcount for run_id, video_id in keys)
+
+    def admit(self, run_id: str, video_id: str, worker: str, channel_id: str | None) -> str:
+        """
+        Le candidat a passé les gates : le compte dans l'objectif du run, une fois pour toutes
+        (un candidat retenté après un crash reste admis). Retourne ADMITTED, CHANNEL_TAKEN (chaîne
+        déjà retenue par un autre worker), QUOTA_REACHED ou LEASE_LOST (bail repris entre-temps).
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT admitted FROM candidates WHERE run_id = ? AND video_id = ? AND worker = ? AND status = ?",
+                (run_id, video_id, worker, LEASED),
+            ).fetchone()
+            if row is None:
+                return LEASE_LOST
+            if row[0]:
+                return ADMITTED
+            dedupe, admitted, max_analyze = conn.execute(
+                "SELECT dedupe_channels, admitted, max_analyze FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if dedupe and channel_id and conn.execute(
+                "SELECT 1 FROM candidates WHERE run_id = ? AND channel_id = ? AND admitted = 1 AND video_id != ?",
+                (run_id, channel_id, video_id),
+            ).fetchone():
+                return CHANNEL_TAKEN
+            if admitted >= max_analyze:
+                return QUOTA_REACHED
+            conn.execute("UPDATE candidates SET admitted = 1, channel_id = ? WHERE run_id = ? AND video_id = ?",
+                         (channel_id, run_id, video_id))
+            conn.execute("UPDATE runs SET admitted = admitted + 1 WHERE run_id = ?", (run_id,))
+            if admitted + 1 >= max_analyze:
+                # Objectif atteint : le reste du run est clos tout de suite, sans attendre une réservation
+                self._skip_completed(conn, time.time(), run_id)
+        return ADMITTED
+
+    def finish(self, run_id: str, video_id: str, worker: str, status: str, result: dict | None = None) -> bool:
+        """Clôt un candidat (lead, rejet, skipped) ; False si le bail a été repris par un autre worker."""
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE candidates SET status = ?, result = ?, worker = NULL, lease_until = NULL, updated_at = ?"
+                " WHERE run_id = ? AND video_id = ? AND worker = ? AND status = ?",
+                (status, json.dumps(result, ensure_ascii=False, default=lambda obj: obj.to_dict()) if result else None,
+                 time.time(), run_id, video_id, worker, LEASED),
+            ).rowcount == 1
+
+    def release(self, run_id: str, video_id: str, worker: str, error: str | None = None, count_attempt: bool = True) -> bool:
+        """
+        Rend un candidat à la file (échec, arrêt du worker). Sur échec, il passe en 'failed' après
+        MAX_ATTEMPTS réservations ; un arrêt propre (count_attempt=False) ne consomme pas d'essai.
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE candidates SET status = CASE WHEN ? AND attempts >= ? THEN ? ELSE ? END,"
+                " attempts = attempts - ?, worker = NULL, lease_until = NULL, error = COALESCE(?, error), updated_at = ?"
+                " WHERE run_id = ? AND video_id = ? AND worker = ? AND status = ?",
+                (count_attempt, MAX_ATTEMPTS, FAILED, PENDING, 0 if count_attempt else 1, error, time.time(),
+                 run_id, video_id, worker, LEASED),
+            ).rowcount == 1
+
+    # --- Lecture ---
+    def status(self) -> list[dict]:
+        """Avancement par run : paramètres, candidats admis et nombre de candidats par état."""
+        with self._lock:
+            runs = self._conn.execute(
+                f"SELECT run_id, {', '.join(self.RUN_FIELDS)}, admitted FROM runs ORDER BY created_at"
+            ).fetchall()
+            counts = self._conn.execute("SELECT run_id, status, COUNT(*) FROM candidates GROUP BY run_id, status").fetchall()
+        report = {row[0]: {"run_id": row[0], **dict(zip(self.RUN_FIELDS, row[1:-1])), "admitted": row[-1],
+                           **dict.fromkeys(STATUSES, 0)} for row in runs}
+        for run_id, status, n in counts:
+            report[run_id][status] = n
+        return list(report.values())
+
+    def results(self, run_id: str | None = None) -> list[tuple[str, str, object]]:
+        """Leads et rejets enregistrés par les workers : [(niche, "lead" | "rejection", payload)], run par run."""
+        where = "AND c.run_id = ?" if run_id else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.niche, c.status, c.result FROM candidates c JOIN runs r ON r.run_id = c.run_id"
+                f" WHERE c.status IN (?, ?) AND c.result IS NOT NULL {where} ORDER BY r.created_at, c.updated_at",
+                (LEAD, REJECTED, *((run_id,) if run_id else ())),
+            ).fetchall()
+        return [(niche, "lead", Lead.from_dict(json.loads(result))) if status == LEAD
+                else (niche, "rejection", json.loads(result)) for niche, status, result in rows]
+
+def enqueue_niche(queue: CandidateQueue, niche: str, language: str = "fr", max_analyze: int = 10, subs_min: int = 0,
+                  subs_max: int = 500000, max_results: int | None = None, channel_policy: str = yp.DEFAULT_CHANNEL_POLICY,
+                  skip_known_leads: bool = True, warehouse: LeadWarehouse | None = None, logger=None) -> dict:
+    """
+    Producteur : recherche la niche (max_results résultats, par défaut max_analyze x SEARCH_MAX_FACTOR)
+    et met en file les candidats qui passent le pré-filtre 'flat' et l'index des chaînes.
+    Les candidats écartés vont aussi dans warehouse (optionnel). Retourne {run_id, found, queued, rejected}.
+    """
+    log = logger or print
+    if channel_policy not in yp.CHANNEL_POLICIES:
+        raise ValueError(f"Politique chaîne inconnue : {channel_policy}")
+    dedupe_channels = channel_policy != "all"
+    run_id = queue.add_run(niche, language, max_analyze, subs_min, subs_max, dedupe_channels)
+    log(f"🔍 Recherche de candidats pour '{niche}' (run {run_id})...")
+    videos = yp.search_search_videos(niche, max_results or max_analyze * yp.SEARCH_MAX_FACTOR)
+
+    channel_index = ChannelIndex()
+    writer = warehouse.writer(niche) if warehouse else None
+    candidates, rejected = [], 0
+    for video in yp.select_videos_per_channel(videos, channel_policy):
+        is_allowed, reason, _ = yp.prequalify_flat(video, days=30)
+        if is_allowed:
+            reason = yp.indexed_channel_reason(channel_index.get(video.get("channel_id")), subs_min, subs_max,
+                                               dedupe_channels, skip_known_leads)
+        if reason:
+            rejected += 1
+            rejection = {"channel": video.get("channel", "Inconnu"), "reason": reason, "url": video["url"]}
+            queue.add_rejection(run_id, video, rejection)
+            if writer:
+                writer.write("rejection", rejection)
+            continue
+        candidates.append(video)
+    channel_index.close()
+    if writer:
+        writer.close()
+
+    queued = queue.enqueue(run_id, candidates)
+    log(f"📥 {queued} candidats mis en file ({len(videos)} trouvés, {rejected} écartés sans récupération)")
+    return {"run_id": run_id, "found": len(videos), "queued": queued, "rejected": rejected}
+
+class QueueWorker:
+    """
+    Worker de la file : réserve des candidats par paquets, les récupère en parallèle, applique les
+    gates puis score les admis (cascade + messages des leads qualifiés, comme iter_prospector) par lots
+    de batch_size candidats, indépendamment de claim_size : mêmes prompts, donc mêmes scores, qu'en mode local.
+    Un thread de fond renouvelle les baux des candidats détenus toutes les lease_seconds / 3.
+    Leads et rejets vont dans la file, dans sink (copie locale) et dans warehouse (un writer par niche).
+    """
+
+    def __init__(self, queue: CandidateQueue, worker_id: str | None = None, api_key=None,
+                 claim_size: int = DEFAULT_CLAIM_SIZE, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 fetch_workers: int = yp.DEFAULT_FETCH_WORKERS, llm_workers: int = yp.DEFAULT_LLM_WORKERS,
+                 batch_size: int = yp.DEFAULT_BATCH_SIZE, cascade_band=yp.DEFAULT_CASCADE_BAND,
+                 cache_ttl_hours: float = yp.METADATA_TTL_HOURS, use_llm_cache: bool = True,
+                 skip_known_leads: bool = True, sink: yp.LeadSink | None = None,
+                 warehouse: LeadWarehouse | None = None, logger=None):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.client = yp.get_groq_client(api_key)
+        if not self.client:
+            raise ValueError("Clé API Groq manquante")
+        self.claim_size = max(1, int(claim_size))
+        self.lease_seconds = lease_seconds
+        self.fetch_workers = max(1, min(int(fetch_workers), yp.YTDLP_MAX_WORKERS))
+        self.llm_workers = max(1, int(llm_workers))
+        self.batch_size = max(1, int(batch_size))
+        self.cascade_band = cascade_band
+        self.skip_known_leads = skip_known_leads
+        self.sink = sink
+        self.warehouse = warehouse
+        self._writers = {} # niche -> WarehouseWriter
+        self.log = logger or print
+        self.metadata_cache = MetadataCache(ttl_hours=cache_ttl_hours) if cache_ttl_hours else None
+        self.llm_cache = LLMCache() if use_llm_cache else None
+        self.channel_index = ChannelIndex()
+        self.metrics = RunMetrics()
+        self._held = {} # (run_id, video_id) -> candidat réservé
+        self._held_lock = threading.Lock()
+
+    def _hold(self, item: dict):
+        with self._held_lock:
+            self._held[(item["run_id"], item["video_id"])] = item
+
+    def _drop(self, item: dict):
+        with self._held_lock:
+            self._held.pop((item["run_id"], item["video_id"]), None)
+
+    def _heartbeat(self, stop: threading.Event):
+        while not stop.wait(self.lease_seconds / 3):
+            with self._held_lock:
+                keys = list(self._held)
+            try:
+                self.queue.renew(self.worker_id, keys, self.lease_seconds)
+            except Exception as e:
+                self.log(f"⚠️ Renouvellement des baux impossible : {e}")
+
+    def _finish(self, item: dict, status: str, result=None):
+        if not self.queue.finish(item["run_id"], item["video_id"], self.worker_id, status, result):
+            self.metrics.count("lost_leases")
+            self.log(f"   ⚠️ Bail perdu : {item['video']['url']} (repris par un autre worker)")
+        self._drop(item)
+
+    def _release(self, item: dict, error: str):
+        self.queue.release(item["run_id"], item["video_id"], self.worker_id, error)
+        self.metrics.count("released")
+        self._drop(item)
+
+    def _emit(self, kind: str, payload, niche: str):
+        """Copie locale et entrepôt historique d'un lead ou d'un rejet (la file a déjà le résultat)."""
+        if self.sink:
+            self.sink.write(kind, payload, query=niche)
+        if self.warehouse:
+            if niche not in self._writers:
+                self._writers[niche] = self.warehouse.writer(niche)
+            self._writers[niche].write(kind, payload)
+
+    def _reject(self, item: dict, details: dict, reason: str):
+        rejection = {"channel": details.get("channel", "Inconnu"), "reason": reason, "url": item["video"]["url"]}
+        self._finish(item, REJECTED, rejection)
+        self.metrics.count("rejected")
+        self._emit("rejection", rejection, item["run"]["niche"])
+
+    def _fetch(self, item: dict):
+        with self.metrics.span("fetch", item["video_id"]):
+            return yp.get_video_details_cached(item["video"], self.metadata_cache)
+
+    def _score(self, batch: list[tuple], language: str) -> list[tuple[dict, Lead]]:
+        """Un lot d'admis : un appel IA par modèle de la cascade, puis messages et fiches (yp.build_lead)."""
+        for _, details, _ in batch:
+            self.log(f"   Running AI on: {details.get('channel')}...")
+        with self.metrics.span("llm", [item["video_id"] for item, _, _ in batch]):
+            analyses = yp.analyze_cascade([details for _, details, _ in batch], language, self.client,
+                                          cache=self.llm_cache, band=self.cascade_band)
+        return [(item, yp.build_lead(item["video"], details, gates_flags, analysis, language, self.client,
+                                     self.channel_index, cache=self.llm_cache, metrics=self.metrics))
+                for (item, details, gates_flags), analysis in zip(batch, analyses)]
+
+    def process_run(self, items: list[dict]):
+        """Un paquet de candidats d'un même run : récupération parallèle, gates, puis scoring par lots de batch_size."""
+        run = items[0]["run"]
+        with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="queue-fetch") as pool:
+            fetched = list(pool.map(self._fetch, items))
+        self.metrics.count("fetches", len(items))
+
+        admitted = []
+        for item, details in zip(items, fetched):
+            if not details:
+                self._release(item, "Récupération impossible")
+                continue
+            channel_id = item["video"].get("channel_id") or details.get("channel_id")
+            reason, gates_flags = yp.gate_details(details, channel_id, self.channel_index, run["subs_min"],
+                                                  run["subs_max"], self.skip_known_leads)
+            if reason:
+                self._reject(item, details, reason)
+                continue
+            verdict = self.queue.admit(item["run_id"], item["video_id"], self.worker_id, channel_id)
+            if verdict == CHANNEL_TAKEN:
+                self._reject(item, details, "Chaîne déjà retenue dans ce run")
+            elif verdict == QUOTA_REACHED:
+                self._finish(item, SKIPPED)
+                self.metrics.count("skipped")
+            elif verdict == LEASE_LOST:
+                self.metrics.count("lost_leases")
+                self._drop(item)
+            else:
+                admitted.append((item, details, gates_flags))
+        if not admitted:
+            return
+
+        # Lots en parallèle (llm_workers) ; clôture et écritures restent dans ce thread
+        batches = [admitted[i:i + self.batch_size] for i in range(0, len(admitted), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.llm_workers, thread_name_prefix="queue-llm") as pool:
+            for leads in pool.map(lambda batch: self._score(batch, run["language"]), batches):
+                for item, lead in leads:
+                    analysis = lead["analysis"]
+                    self._finish(item, LEAD, lead)
+                    self.metrics.count("leads")
+                    if analysis.get("needs_editor"):
+                        self.metrics.count("qualified")
+                    status = "✅" if analysis.get("needs_editor") else "❌"
+                    self.log(f"      {status} Score: {analysis.get('lead_score')} - {lead['channel']}")
+                    self._emit("lead", lead, run["niche"])
+
+    def run(self, idle_exit: float = DEFAULT_IDLE_EXIT, stop: threading.Event | None = None) -> dict:
+        """
+        Boucle du worker jusqu'à `stop`, ou idle_exit secondes sans candidat (0 = sans fin).
+        Un arrêt (Ctrl+C, exception) rend immédiatement les candidats détenus, sans consommer d'essai.
+        Retourne les compteurs et mesures du worker.
+        """
+        stop = stop or threading.Event()
+        heartbeat_stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(heartbeat_stop,), name="lease-heartbeat", daemon=True).start()
+        self.log(f"🚀 Worker {self.worker_id} : baux de {self.lease_seconds:.0f}s, {self.claim_size} candidats par réservation, "
+                 f"lots IA de {self.batch_size}")
+        idle_since = time.monotonic()
+        try:
+            while not stop.is_set():
+                claimed = self.queue.claim(self.worker_id, self.claim_size, self.lease_seconds)
+                if not claimed:
+                    if idle_exit and time.monotonic() - idle_since >= idle_exit:
+                        break
+                    stop.wait(POLL_INTERVAL)
+                    continue
+                idle_since = time.monotonic()
+                self.metrics.count("claimed", len(claimed))
+                self.metrics.count("reclaimed", sum(item["reclaimed"] for item in claimed))
+                for item in claimed:
+                    self._hold(item)
+                runs = {}
+                for item in claimed:
+                    runs.setdefault(item["run_id"], []).append(item)
+                for items in runs.values():
+                    try:
+                        self.process_run(items)
+                    except Exception as e:
+                        self.log(f"⚠️ Erreur worker ({items[0]['run']['niche']}) : {e}")
+                        # Candidats non clos du paquet : rendus à la file (un essai consommé)
+                        with self._held_lock:
+                            unfinished = [item for item in items if (item["run_id"], item["video_id"]) in self._held]
+                        for item in unfinished:
+                            self._release(item, str(e))
+        finally:
+            heartbeat_stop.set()
+            with self._held_lock:
+                held = list(self._held.values())
+                self._held.clear()
+            for item in held:
+                self.queue.release(item["run_id"], item["video_id"], self.worker_id, count_attempt=False)
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+            for store in (self.metadata_cache, self.llm_cache, self.channel_index):
+                if store:
+                    store.close()
+
+        summary = {"worker": self.worker_id, **{k: self.metrics.counters.get(k, 0) for k in
+                   ("claimed", "reclaimed", "leads", "qualified", "rejected", "skipped", "released", "lost_leases")}}
+        performance = self.metrics.to_dict()
+        summary["performance"] = {k: v for k, v in performance.items() if k != "spans"}
+        self.log(f"🏁 Worker {self.worker_id} : {summary['leads']} leads ({summary['qualified']} qualifiés), "
+                 f"{summary['rejected']} rejets, {summary['reclaimed']} candidats repris d'un worker mort")
+        return summary
+
+def export(queue: CandidateQueue, path: str, run_id: str | None = None) -> int:
+    """Écrit leads (et rejets en .jsonl) de la file dans path via LeadSink ; retourne le nombre de lignes."""
+    if path != "-" and os.path.exists(path):
+        os.remove(path)
+    with yp.LeadSink(path, "queue") as sink:
+        for niche, kind, payload in queue.results(run_id):
+            sink.write(kind, payload, query=niche)
+    return sink.written
+
+def print_status(queue: CandidateQueue):
+    runs = queue.status()
+    if not runs:
+        print("File vide.")
+        return
+    for run in runs:
+        reached = " (objectif atteint)" if run["admitted"] >= run["max_analyze"] else ""
+        print(f"[{run['run_id']}] {run['niche']} ({run['language']}) : {run['admitted']}/{run['max_analyze']} admis{reached}")
+        print("   " + " | ".join(f"{status} {run[status]}" for status in STATUSES))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube Prospector - file de candidats distribuée")
+    parser.add_argument("--db", help="Base de la file (défaut : PROSPECTOR_QUEUE ou queue.sqlite du dossier de cache)")
+    parser.add_argument("--shared-fs", action="store_true", help="Base sur un volume réseau partagé (sans WAL)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enq = sub.add_parser("enqueue", help="Recherche une niche et met ses candidats en file")
+    enq.add_argument("niche")
+    enq.add_argument("--language", default="fr", choices=["fr", "en"])
+    enq.add_argument("--max-analyze", type=int, default=10, help="Objectif : candidats admis à l'analyse IA")
+    enq.add_argument("--subs-min", type=int, default=0)
+    enq.add_argument("--subs-max", type=int, default=500000)
+    enq.add_argument("--max-results", type=int, help=f"Résultats de recherche (défaut : max-analyze x {yp.SEARCH_MAX_FACTOR})")
+    enq.add_argument("--channel-policy", default=yp.DEFAULT_CHANNEL_POLICY, choices=yp.CHANNEL_POLICIES)
+    enq.add_argument("--include-known", action="store_true", help="Ne saute pas les chaînes déjà prospectées")
+
+    work = sub.add_parser("worker", help="Traite les candidats de la file (un process par worker)")
+    work.add_argument("--worker-id", help="Identifiant du worker (défaut : machine-pid)")
+    work.add_argument("--claim-size", type=int, default=DEFAULT_CLAIM_SIZE, help="Candidats réservés d'un coup")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Durée d'un bail (s)")
+    work.add_argument("--idle-exit", type=float, default=DEFAULT_IDLE_EXIT, help="Arrêt après N s sans candidat (0 = jamais)")
+    work.add_argument("--fetch-workers", type=int, default=yp.DEFAULT_FETCH_WORKERS)
+    work.add_argument("--llm-workers", type=int, default=yp.DEFAULT_LLM_WORKERS, help="Lots IA en parallèle")
+    work.add_argument("--batch-size", type=int, default=yp.DEFAULT_BATCH_SIZE,
+                      help="Candidats par appel IA (indépendant de --claim-size, comme en mode local)")
+    work.add_argument("--quota-share", type=int, default=1,
+                      help="Nombre de workers se partageant le compte Groq / l'IP : chacun prend 1/N des quotas")
+    work.add_argument("--cascade-band", type=int, default=yp.DEFAULT_CASCADE_BAND,
+                      help="Bande d'incertitude autour de 70 renotée par le grand modèle")
+    work.add_argument("--no-cascade", action="store_true", help="Grand modèle pour tous les candidats")
+    work.add_argument("--cache-ttl-hours", type=float, default=yp.METADATA_TTL_HOURS,
+                      help="Validité du cache métadonnées (0 = désactivé)")
+    work.add_argument("--no-llm-cache", action="store_true", help="Force un nouvel appel Groq par candidat")
+    work.add_argument("--include-known", action="store_true", help="Ne saute pas les chaînes déjà prospectées")
+    work.add_argument("--out", help="Copie locale des leads du worker (.csv ou .jsonl)")
+
+    sub.add_parser("status", help="Avancement des runs en file")
+
+    exp = sub.add_parser("export", help="Exporte les leads de la file (.csv, ou .jsonl avec les rejets ; - = stdout)")
+    exp.add_argument("out")
+    exp.add_argument("--run", help="Un seul run (ID affiché par status)")
+
+    args = parser.parse_args(argv)
+    queue = CandidateQueue(args.db, shared_fs=args.shared_fs)
+    warehouse = LeadWarehouse() if warehouse_available() else None
+    try:
+        if args.command == "status":
+            print_status(queue)
+        elif args.command == "export":
+            written = export(queue, args.out, args.run)
+            print(f"💾 {written} lignes exportées dans {args.out}", file=sys.stderr)
+        elif args.command == "enqueue":
+            enqueue_niche(queue, args.niche, args.language, args.max_analyze, args.subs_min, args.subs_max,
+                          max_results=args.max_results, channel_policy=args.channel_policy,
+                          skip_known_leads=not args.include_known, warehouse=warehouse)
+        else:
+            if not os.environ.get("GROQ_API_KEY"):
+                print("❌ CRITIQUE : Variable GROQ_API_KEY manquante.")
+                return 1
+            if args.quota_share > 1:
+                from prospector_batch import split_quotas
+                split_quotas(args.quota_share)
+            sink = yp.LeadSink(args.out, "queue") if args.out else None
+            worker = QueueWorker(queue, args.worker_id, claim_size=args.claim_size, lease_seconds=args.lease,
+                                 fetch_workers=args.fetch_workers, llm_workers=args.llm_workers,
+                                 batch_size=args.batch_size, cascade_band=None if args.no_cascade else args.cascade_band,
+                                 cache_ttl_hours=args.cache_ttl_hours, use_llm_cache=not args.no_llm_cache,
+                                 skip_known_leads=not args.include_known, sink=sink, warehouse=warehouse)
+            try:
+                worker.run(idle_exit=args.idle_exit)
+            except KeyboardInterrupt:
+                print("⏹️ Worker arrêté : candidats en cours rendus à la file.")
+            finally:
+                if sink:
+                    sink.close()
+    finally:
+        queue.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Classement local des candidats, avant tout appel IA.
+Les candidats qui ont passé les gates sont notés par fenêtres sur une matrice de caractéristiques
+calculée en NumPy, sans réseau : TF-IDF du titre, de la chaîne et de la description (pertinence pour
+la niche, mots-clés de créateur solo ou de chaîne pro), durée, vues, rapport vues/abonnés et taille
+de chaîne. Seuls les mieux classés partent au scoring Groq : le budget IA va aux leads les plus
+probables plutôt qu'à l'ordre de la recherche YouTube.
+Optionnel (rank_factor > 1) : le vivier plus large coûte des récupérations supplémentaires.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import TYPE_CHECKING
+
+from prospector_rules import DURATION_BAND, VIEWS_BAND, BIG_CHANNEL_SUBS, _column
+
+if TYPE_CHECKING:
+    import numpy as np # Importé au premier classement, comme dans prospector_rules
+
+# --- CONFIGURATION ---
+DEFAULT_RANK_FACTOR = 1.0 # Candidats filtrés pour un candidat envoyé à l'IA (None ou 1 = ordre de la recherche)
+RANK_WINDOW = 40          # Candidats classés ensemble au plus ; chaque fenêtre garde son 1/rank_factor
+RANK_MIN_WINDOW = 8       # En dessous, une fenêtre incomplète attend la suite au lieu d'être classée
+RANK_WINDOWS_PER_RUN = 4  # Fenêtres au moins par vivier : les premiers appels IA recouvrent les récupérations
+RANK_MAX_WAIT = 5.0       # s : une fenêtre incomplète (>= RANK_MIN_WINDOW) est classée si rien n'arrive pendant ce délai
+
+# Signaux lexicaux (titre + chaîne + description, minuscules)
+SOLO_KEYWORDS = ("je", "j'ai", "mon", "ma", "mes", "moi", "vlog", "routine", "tuto", "tutoriel", "débutant",
+                 "testé", "honnête", "i", "i'm", "i've", "my", "me", "tutorial", "beginner", "tried", "honest")
+PRO_KEYWORDS = ("officiel", "officielle", "official", "tv", "média", "media", "agence", "agency", "studio",
+                "podcast", "news", "actualités", "compilation", "topic", "masterclass", "formation")
+
+# Poids des caractéristiques (colonnes centrées réduites sur la fenêtre)
+RANK_WEIGHTS = {
+    "relevance": 1.0,   # Similarité TF-IDF avec la niche
+    "solo": 1.0,        # Masse TF-IDF des mots-clés de créateur solo
+    "pro": -1.5,        # Masse TF-IDF des mots-clés de chaîne pro / média
+    "duration": 1.0,    # Proximité de la bande de durée de la grille
+    "views": 0.75,      # Proximité de la bande de vues de la grille
+    "engagement": 0.5,  # log10(vues / abonnés) : vidéo qui performe au-delà de la taille de la chaîne
+    "size": 0.75,       # Petite chaîne (log des abonnés, 0 au-delà de BIG_CHANNEL_SUBS)
+}
+FEATURES = tuple(RANK_WEIGHTS)
+
+def window_size(pool: int) -> int:
+    """Taille des fenêtres pour un vivier de `pool` candidats (RANK_WINDOWS_PER_RUN fenêtres, bornées)."""
+    return max(RANK_MIN_WINDOW, min(RANK_WINDOW, math.ceil(pool / RANK_WINDOWS_PER_RUN)))
+
+_TOKEN = re.compile(r"[a-z0-9à-ÿ]+(?:'[a-z0-9à-ÿ]+)?")
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall((text or "").lower().replace("’", "'"))
+
+def _document(candidate: dict) -> list[str]:
+    return tokenize(" ".join(str(candidate.get(key) or "") for key in ("title", "channel", "description")))
+
+def tfidf(docs: list[list[str]], vocabulary: dict[str, int]) -> tuple[np.ndarray, np.ndarray]:
+    """Matrice TF-IDF (documents x vocabulaire, lignes normées L2) et vecteur IDF (lissé)."""
+    import numpy as np
+    counts = np.zeros((len(docs), len(vocabulary)))
+    for i, doc in enumerate(docs):
+        np.add.at(counts[i], [vocabulary[t] for t in doc], 1)
+    df = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1
+    weights = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.where(norms > 0, norms, 1), idf
+
+def _band_proximity(values: np.ndarray, band: tuple[float, float]) -> np.ndarray:
+    """
+    1 dans la bande (les points de la grille sont acquis), au plus 0,5 hors bande, décroissant avec
+    l'écart en log ; 0,5 si le champ est inconnu.
+    """
+    import numpy as np
+    with np.errstate(divide="ignore", invalid="ignore"):
+        clipped = np.clip(values, band[0], band[1])
+        outside = 0.5 * np.exp(-np.abs(np.log(np.maximum(values, 1) / clipped)))
+        proximity = np.where((values >= band[0]) & (values <= band[1]), 1.0, outside)
+    return np.where(np.isnan(values), 0.5, proximity)
+
+def feature_matrix(candidates: list[dict], niche: str) -> np.ndarray:
+    """Caractéristiques brutes d'une fenêtre de candidats : une ligne par candidat, colonnes FEATURES."""
+    import numpy as np
+
+    docs = [_document(c) for c in candidates]
+    query = tokenize(niche)
+    vocabulary = {}
+    for token in (t for doc in docs + [query, list(SOLO_KEYWORDS), list(PRO_KEYWORDS)] for t in doc):
+        vocabulary.setdefault(token, len(vocabulary))
+    X, idf = tfidf(docs, vocabulary)
+
+    profile = np.zeros(len(vocabulary))
+    for token in query:
+        profile[vocabulary[token]] = idf[vocabulary[token]]
+    norm = np.linalg.norm(profile)
+    relevance = X @ (profile / norm) if norm else np.zeros(len(docs))
+    solo = X[:, [vocabulary[t] for t in SOLO_KEYWORDS]].sum(axis=1)
+    pro = X[:, [vocabulary[t] for t in PRO_KEYWORDS]].sum(axis=1)
+
+    views = _column(candidates, "view_count")
+    subs = _column(candidates, "subscriber_count")
+    with np.errstate(invalid="ignore"):
+        engagement = np.clip(np.log10((views + 1) / (subs + 1)), -2, 1)
+        size = np.clip(1 - np.log10(subs + 1) / math.log10(BIG_CHANNEL_SUBS), 0, 1)
+    return np.column_stack([
+        relevance,
+        solo,
+        pro,
+        _band_proximity(_column(candidates, "duration"), DURATION_BAND),
+        _band_proximity(views, VIEWS_BAND),
+        np.nan_to_num(engagement, nan=0.0),
+        np.nan_to_num(size, nan=0.5),
+    ])
+
+def rank_scores(candidates: list[dict], niche: str) -> np.ndarray:
+    """Score de classement de chaque candidat : somme pondérée des caractéristiques centrées réduites."""
+    import numpy as np
+    if not candidates:
+        return np.zeros(0)
+    features = feature_matrix(candidates, niche)
+    std = features.std(axis=0)
+    standardized = (features - features.mean(axis=0)) / np.where(std > 0, std, 1)
+    return standardized @ np.array([RANK_WEIGHTS[name] for name in FEATURES])
+
+def select_top(candidates: list[dict], niche: str, k: int) -> tuple[list[int], list[int], np.ndarray]:
+    """
+    Les k mieux classés (indices dans l'ordre du classement), les autres (idem) et les scores.
+    À score égal, l'ordre d'arrivée (celui de la recherche) est conservé.
+    """
+    import numpy as np
+    scores = rank_scores(candidates, niche)
+    order = np.argsort(-scores, kind="stable").tolist()
+    return order[:k], order[k:], scores
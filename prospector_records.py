@@ -0,0 +1,98 @@
+"""
+Enregistrements compacts du pipeline : détails d'un candidat (VideoDetails) et leads (Lead).
+Des classes à __slots__ (pas de __dict__ par instance) qui se lisent comme des dicts
+(get, [], in, keys) : gates, prompts, UI et exports n'ont pas à changer. to_dict() sert au
+JSON (caches, journal) et from_dict() relit ces dicts, y compris ceux écrits avant ce format.
+"""
+
+from datetime import datetime, timezone
+
+DESCRIPTION_MAX_CHARS = 600 # Seule partie de la description lue par le prompt
+AUTO_GENERATED_MARKER = "Auto-generated" # En fin de description des chaînes "- Topic" : vérifié avant troncature
+
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class VideoDetails(_Record):
+    """Ce dont les gates et le prompt ont besoin, rien de plus (description tronquée)."""
+
+    __slots__ = ("title", "channel", "channel_id", "description", "view_count", "like_count",
+                 "duration", "upload_date", "subscriber_count", "url", "auto_generated")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VideoDetails":
+        fields = {name: data.get(name) for name in cls.__slots__}
+        description = fields["description"] or ""
+        if fields["auto_generated"] is None: # Dict d'avant ce format : description encore complète
+            fields["auto_generated"] = AUTO_GENERATED_MARKER in description
+        fields["description"] = description[:DESCRIPTION_MAX_CHARS]
+        return cls(**fields)
+
+    @classmethod
+    def from_info(cls, data: dict, url: str) -> "VideoDetails":
+        """Depuis un info dict yt-dlp, traité ou non (process=False : upload_date peut manquer)."""
+        # Récupération en cascade des abonnés
+        subs = data.get("uploader_subscriber_count")
+        if subs is None:
+            subs = data.get("channel_follower_count")
+        if subs is None:
+            subs = data.get("subscriber_count")
+
+        upload_date = data.get("upload_date")
+        timestamp = data.get("timestamp") or data.get("release_timestamp")
+        if not upload_date and timestamp:
+            upload_date = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y%m%d")
+
+        description = data.get("description") or ""
+        return cls(
+            title=data.get("title", ""),
+            channel=data.get("channel", data.get("uploader", "")),
+            channel_id=data.get("channel_id"),
+            description=description[:DESCRIPTION_MAX_CHARS],
+            view_count=data.get("view_count", 0),
+            like_count=data.get("like_count", 0),
+            duration=data.get("duration", 0),
+            upload_date=upload_date or "",
+            subscriber_count=subs,
+            url=url,
+            auto_generated=AUTO_GENERATED_MARKER in description,
+        )
+
+class Lead(_Record):
+    """Un candidat scoré, tel que produit par iter_prospector ; analysis reste un dict (champs variables)."""
+
+    __slots__ = ("channel", "channel_id", "video_title", "url", "upload_date", "subscriber_count",
+                 "view_count", "analysis")
@@ -0,0 +1,87 @@
+"""
+Moteur de règles local du scoring.
+La partie mécanique de la grille (durée, vues, abonnés, plafonds) est calculée ici en NumPy
+sur tout un lot de candidats ; le LLM ne note que ce qui demande du jugement (créateur solo,
+montage perfectible, chaîne pro, vidéo déjà très soignée). merge_scores() fusionne les deux :
+les plafonds sont toujours appliqués, quoi que réponde le modèle.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np # Importé au premier scoring : ni le démarrage ni les chemins sans IA ne le paient
+
+# --- GRILLE MÉCANIQUE ---
+DURATION_BAND = (8 * 60, 30 * 60)   # Durée idéale (s)
+DURATION_POINTS = 15
+VIEWS_BAND = (1000, 50000)          # Vues modérées
+VIEWS_POINTS = 10
+BIG_CHANNEL_SUBS = 500000           # Malus même si la chaîne a passé les filtres
+BIG_CHANNEL_MALUS = -50
+CAPPED_CHANNEL_SUBS = 200000        # Au-delà, score plafonné
+CAPPED_CHANNEL_MAX = 60
+POLISHED_MAX = 50                   # Vidéo déjà très "polished" / masterclass (jugement LLM)
+JUDGMENT_MAX = 75                   # Part subjective notée par le LLM (0-75), + 25 pts mécaniques au plus
+QUALIFIED_SCORE = 70                # needs_editor = true UNIQUEMENT si lead_score >= 70
+
+def _column(candidates: list[dict], key: str) -> np.ndarray:
+    """Champ numérique d'un lot de candidats (NaN si absent)."""
+    import numpy as np
+    return np.array([c.get(key) if c.get(key) is not None else np.nan for c in candidates], dtype=float)
+
+def rubric_points(candidates: list[dict]) -> dict[str, np.ndarray]:
+    """Composantes mécaniques de la grille pour chaque candidat : points, malus et plafond."""
+    import numpy as np
+    duration = _column(candidates, "duration")
+    views = _column(candidates, "view_count")
+    subs = _column(candidates, "subscriber_count")
+    # Les comparaisons avec NaN sont fausses : un champ inconnu ne rapporte ni ne coûte rien
+    return {
+        "duration": np.where((duration >= DURATION_BAND[0]) & (duration <= DURATION_BAND[1]), DURATION_POINTS, 0),
+        "views": np.where((views >= VIEWS_BAND[0]) & (views <= VIEWS_BAND[1]), VIEWS_POINTS, 0),
+        "malus": np.where(subs >= BIG_CHANNEL_SUBS, BIG_CHANNEL_MALUS, 0),
+        "cap": np.where(subs >= CAPPED_CHANNEL_SUBS, CAPPED_CHANNEL_MAX, 100),
+    }
+
+def merge_scores(candidates: list[dict], judgments: list[dict]) -> list[dict]:
+    """
+    Score final = jugement LLM (0-75) + points mécaniques + malus, borné par les plafonds, dans [0, 100].
+    Retourne des analyses complètes (lead_score, needs_editor, score_breakdown) ; une réponse IA
+    inexploitable (json_invalid) garde un score de 0.
+    """
+    if not candidates:
+        return []
+    import numpy as np
+    points = rubric_points(candidates)
+    judgment = np.clip(np.array([_judgment_score(j) for j in judgments], dtype=float), 0, JUDGMENT_MAX)
+    polished = np.array([bool(j.get("polished")) for j in judgments])
+    invalid = np.array(["json_invalid" in j.get("red_flags", []) for j in judgments])
+
+    cap = np.minimum(points["cap"], np.where(polished, POLISHED_MAX, 100))
+    raw = judgment + points["duration"] + points["views"] + points["malus"]
+    scores = np.where(invalid, 0, np.clip(np.minimum(raw, cap), 0, 100)).astype(int)
+
+    analyses = []
+    for i, j in enumerate(judgments):
+        analysis = dict(j)
+        analysis["lead_score"] = int(scores[i])
+        analysis["needs_editor"] = bool(scores[i] >= QUALIFIED_SCORE)
+        analysis["score_breakdown"] = {
+            "judgment": int(judgment[i]),
+            "duration": int(points["duration"][i]),
+            "views": int(points["views"][i]),
+            "malus": int(points["malus"][i]),
+            "cap": int(cap[i]),
+        }
+        if points["malus"][i]:
+            analysis["red_flags"] = analysis.get("red_flags", []) + ["big_channel"]
+        analyses.append(analysis)
+    return analyses
+
+def _judgment_score(judgment: dict) -> float:
+    try:
+        return float(judgment.get("judgment_score") or 0)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,196 @@
+"""
+Ordonnanceur des appels réseau (Groq, YouTube) sensible aux limites de débit.
+- Seaux à jetons : requêtes/minute et tokens/minute, recalés sur les en-têtes de l'API.
+- Retries avec backoff exponentiel + jitter sur 429 / erreurs transitoires.
+- Concurrence adaptative (AIMD) : divisée par deux sur throttling, remonte doucement ensuite.
+"""
+
+import re
+import time
+import random
+import threading
+
+# Catégories d'erreurs renvoyées par les fonctions `classify`
+THROTTLE = "throttle"    # 429 / quota : on ralentit
+TRANSIENT = "transient"  # 5xx, coupure réseau : on réessaie
+FATAL = "fatal"          # Le reste : on abandonne tout de suite
+
+class TokenBucket:
+    """Seau à jetons thread-safe, rechargé en continu (capacité par minute)."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """Bloque jusqu'à ce que `amount` jetons soient disponibles, puis les consomme."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 5.0))
+
+    def adjust(self, delta: float):
+        """Corrige après coup une consommation estimée (delta > 0 = consommé en plus)."""
+        with self.lock:
+            self._refill()
+            self.tokens -= delta
+
+    def sync(self, remaining: float, reset_seconds: float | None = None):
+        """Recale le seau sur le quota restant annoncé par le serveur."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+            if reset_seconds and remaining <= 0:
+                # Plus rien avant le reset : le seau sera de nouveau disponible à ce moment-là
+                self.tokens = -reset_seconds * self.rate
+
+class AdaptiveLimiter:
+    """Limite de concurrence AIMD : +1 toutes les `limit` réussites, /2 sur throttling."""
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, int(max_limit))
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def on_success(self):
+        with self.cond:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.cond.notify_all()
+
+    def on_throttle(self):
+        with self.cond:
+            self.limit = max(1.0, self.limit / 2)
+
+def parse_duration(value) -> float | None:
+    """Durées des en-têtes de quota : '7.66s', '2m59.56s', '250ms', '12' (secondes)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+class RateLimitScheduler:
+    """
+    Point de passage unique des appels vers un fournisseur (un par fournisseur, partagé par tous les threads).
+    `call(fn)` applique quotas, concurrence adaptative et retries ; `classify(exc)` dit quoi faire d'une erreur.
+    """
+
+    COUNTERS = ("calls", "retries", "throttled", "failures", "tokens")
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float | None = None,
+                 max_concurrency: int = 8, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Backoff exponentiel avec 'full jitter', borné ; Retry-After du serveur prioritaire."""
+        if retry_after:
+            return min(self.max_delay, retry_after + random.uniform(0, self.base_delay))
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, classify, estimated_tokens: int = 0, retry_after=None):
+        """
+        Exécute fn() sous quotas. Réessaie tant que classify(exc) != FATAL et qu'il reste des essais.
+        retry_after(exc) peut extraire un délai imposé par le serveur.
+        """
+        attempt = 0
+        while True:
+            self.requests.acquire()
+            if self.tokens and estimated_tokens:
+                self.tokens.acquire(estimated_tokens)
+            self.limiter.acquire()
+            self._count("calls")
+            try:
+                result = fn()
+            except Exception as e:
+                kind = classify(e)
+                if kind == THROTTLE:
+                    self._count("throttled")
+                    self.limiter.on_throttle()
+                if kind == FATAL or attempt >= self.max_retries:
+                    self._count("failures")
+                    raise
+                delay = self.backoff(attempt, retry_after(e) if retry_after else None)
+            else:
+                self.limiter.on_success()
+                return result
+            finally:
+                self.limiter.release()
+            self._count("retries")
+            attempt += 1
+            time.sleep(delay)
+
+    def observe_headers(self, headers):
+        """Recale les seaux sur les en-têtes x-ratelimit-* (format Groq / OpenAI)."""
+        if not headers:
+            return
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None:
+            self.requests.sync(float(remaining), parse_duration(headers.get("x-ratelimit-reset-requests")))
+        remaining = headers.get("x-ratelimit-remaining-tokens")
+        if remaining is not None and self.tokens:
+            self.tokens.sync(float(remaining), parse_duration(headers.get("x-ratelimit-reset-tokens")))
+
+    def record_tokens(self, estimated: int, actual: int):
+        """Corrige le seau de tokens avec la consommation réelle (champ usage) et la comptabilise."""
+        with self._lock:
+            self.counters["tokens"] += actual or 0
+        if self.tokens and actual:
+            self.tokens.adjust(actual - estimated)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+        stats["concurrency"] = round(self.limiter.limit, 1)
+        return stats
+
+    def stats_since(self, snapshot: dict) -> dict:
+        """Compteurs depuis un instantané stats() (pour un run donné)."""
+        stats = self.stats()
+        for key in self.COUNTERS:
+            stats[key] -= snapshot.get(key, 0)
+        return stats
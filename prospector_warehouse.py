@@ -0,0 +1,222 @@
+"""
+Entrepôt historique des leads (Parquet, append-only).
+Chaque run y ajoute ses leads et ses rejets, partitionnés par niche et par date de run :
+    prospector_warehouse/leads/niche=crypto/date=2026-10-16/part-<run>-<n>.parquet
+Les requêtes ne lisent que les partitions concernées puis filtrent en pandas (vectorisé).
+Dépendances optionnelles : pip install pandas pyarrow (sans elles, l'entrepôt est simplement désactivé).
+"""
+
+import os
+import re
+import uuid
+import threading
+import importlib.util
+from datetime import datetime
+
+from youtube_prospector import csv_row
+
+# pandas / pyarrow ne sont importés qu'au premier fichier écrit ou lu (_load) : importer ce module ou ouvrir
+# un writer ne coûte rien (le mode headless reste rapide à démarrer)
+pd = pa = ds = pq = None
+SCHEMAS = {}
+
+# --- CONFIGURATION ---
+WAREHOUSE_DIR = os.environ.get("PROSPECTOR_WAREHOUSE_DIR", "prospector_warehouse")
+WAREHOUSE_FLUSH_ROWS = 500 # Un fichier Parquet par tranche de leads (et à la fin du run)
+TABLES = ("leads", "rejections")
+
+_LOAD_LOCK = threading.Lock()
+
+def _load():
+    """Importe pandas / pyarrow et construit les schémas (une fois). Lève ImportError s'ils manquent."""
+    global pd, pa, ds, pq
+    with _LOAD_LOCK:
+        if SCHEMAS:
+            return
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+        # Schémas fixes : deux fichiers d'une même table restent lisibles ensemble même si une colonne est vide
+        SCHEMAS.update({
+            "leads": pa.schema([
+                ("run_id", pa.string()), ("run_timestamp", pa.timestamp("s")), ("niche", pa.string()),
+                ("query_used", pa.string()), ("channel", pa.string()), ("channel_id", pa.string()),
+                ("video_title", pa.string()), ("video_url", pa.string()), ("upload_date", pa.string()),
+                ("subscriber_count", pa.int64()), ("view_count", pa.int64()), ("lead_score", pa.int64()),
+                ("needs_editor", pa.bool_()), ("language_version", pa.string()), ("reason", pa.string()),
+                ("evidence", pa.string()), ("prospecting_message", pa.string()), ("red_flags", pa.string()),
+            ]),
+            "rejections": pa.schema([
+                ("run_id", pa.string()), ("run_timestamp", pa.timestamp("s")), ("niche", pa.string()),
+                ("channel", pa.string()), ("reason", pa.string()), ("url", pa.string()),
+            ]),
+        })
+
+def warehouse_available() -> bool:
+    """pandas et pyarrow sont-ils installés (sans les importer) ?"""
+    return all(importlib.util.find_spec(name) is not None for name in ("pandas", "pyarrow"))
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "niche"
+
+def _int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class LeadWarehouse:
+    """Accès à l'entrepôt : writer() pour alimenter un run, query() pour interroger l'historique."""
+
+    def __init__(self, root: str = WAREHOUSE_DIR):
+        if not warehouse_available():
+            raise ImportError("L'entrepôt de leads nécessite pandas et pyarrow (pip install pandas pyarrow)")
+        self.root = root
+
+    def _partition(self, table: str, niche: str, day: str) -> str:
+        return os.path.join(self.root, table, f"niche={_slug(niche)}", f"date={day}")
+
+    def write(self, table: str, records: list[dict], niche: str, day: str, name: str):
+        """Ajoute un fichier Parquet à la partition (écriture dans un .tmp puis renommage atomique)."""
+        if not records:
+            return
+        _load()
+        directory = self._partition(table, niche, day)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{name}.parquet")
+        pq.write_table(pa.Table.from_pylist(records, schema=SCHEMAS[table]), path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def writer(self, niche: str) -> "WarehouseWriter":
+        return WarehouseWriter(self, niche)
+
+    def niches(self) -> list[str]:
+        """Niches présentes dans l'historique (noms de partition)."""
+        directory = os.path.join(self.root, "leads")
+        if not os.path.isdir(directory):
+            return []
+        return sorted(d.split("=", 1)[1] for d in os.listdir(directory) if d.startswith("niche="))
+
+    def _files(self, table: str, niches=None, since: str | None = None, until: str | None = None) -> list[str]:
+        """Fichiers des partitions retenues : élagage par niche et date sans rien ouvrir."""
+        root = os.path.join(self.root, table)
+        if not os.path.isdir(root):
+            return []
+        slugs = {_slug(n) for n in niches} if niches else None
+        files = []
+        for niche_dir in os.listdir(root):
+            if not niche_dir.startswith("niche=") or (slugs and niche_dir[6:] not in slugs):
+                continue
+            for date_dir in os.listdir(os.path.join(root, niche_dir)):
+                day = date_dir[5:]
+                if not date_dir.startswith("date=") or (since and day < since) or (until and day > until):
+                    continue
+                directory = os.path.join(root, niche_dir, date_dir)
+                files.extend(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".parquet"))
+        return files
+
+    def query(self, table: str = "leads", niches=None, since: str | None = None, until: str | None = None,
+              min_score: int | None = None, min_subs: int | None = None, max_subs: int | None = None,
+              needs_editor: bool | None = None, columns: list[str] | None = None) -> "pd.DataFrame":
+        """
+        Leads (ou rejets) de l'historique. since / until : dates de run 'AAAA-MM-JJ' incluses.
+        Ex. leads >= 70 en crypto ce mois-ci, < 100k abonnés :
+            query(niches=["crypto"], since="2026-10-01", min_score=70, max_subs=100000)
+        """
+        if table not in TABLES:
+            raise ValueError(f"Table inconnue : {table}")
+        _load()
+        files = self._files(table, niches, since, until)
+        if not files:
+            return SCHEMAS[table].empty_table().to_pandas()
+        df = ds.dataset(files, schema=SCHEMAS[table], format="parquet").to_table(columns=columns).to_pandas()
+
+        mask = pd.Series(True, index=df.index)
+        if min_score is not None:
+            mask &= df["lead_score"] >= min_score
+        if min_subs is not None:
+            mask &= df["subscriber_count"] >= min_subs
+        if max_subs is not None:
+            mask &= df["subscriber_count"] < max_subs
+        if needs_editor is not None:
+            mask &= df["needs_editor"] == needs_editor
+        return df[mask].sort_values("run_timestamp", ascending=False, ignore_index=True)
+
+    def compact(self, table: str = "leads"):
+        """
+        Regroupe les petits fichiers de chaque partition en un seul (requêtes plus rapides).
+        À lancer hors run : un run en cours peut ajouter un fichier pendant la compaction, pas en retirer.
+        """
+        _load()
+        for path in {os.path.dirname(f) for f in self._files(table)}:
+            parts = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".parquet"))
+            if len(parts) < 2:
+                continue
+            merged = os.path.join(path, f"part-compact-{uuid.uuid4().hex[:8]}.parquet")
+            pq.write_table(ds.dataset(parts, schema=SCHEMAS[table], format="parquet").to_table(), merged + ".tmp")
+            os.replace(merged + ".tmp", merged)
+            for part in parts:
+                os.remove(part)
+
+class WarehouseWriter:
+    """
+    Même interface que LeadSink (write(kind, payload), context manager) : les événements d'un run
+    sont bufferisés et versés dans l'entrepôt par tranches de WAREHOUSE_FLUSH_ROWS et à la fermeture.
+    """
+
+    def __init__(self, warehouse: LeadWarehouse, niche: str):
+        self.warehouse = warehouse
+        self.niche = niche
+        self.run_id = uuid.uuid4().hex[:12]
+        now = datetime.now().replace(microsecond=0)
+        self.timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        self.day = now.strftime("%Y-%m-%d")
+        self._run_time = now
+        self._buffers = {table: [] for table in TABLES}
+        self._flushes = 0
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def write(self, kind: str, payload: dict):
+        if kind == "lead":
+            row = csv_row(payload, self.niche, self.timestamp)
+            record = {**row, "run_id": self.run_id, "run_timestamp": self._run_time,
+                      "channel_id": payload.get("channel_id"),
+                      "subscriber_count": _int(row["subscriber_count"]), "view_count": _int(row["view_count"]),
+                      "lead_score": _int(row["lead_score"]), "needs_editor": bool(row["needs_editor"])}
+            table = "leads"
+        elif kind == "rejection":
+            record = {"run_id": self.run_id, "run_timestamp": self._run_time, "niche": self.niche, **payload}
+            table = "rejections"
+        else:
+            return
+        with self._lock:
+            self._buffers[table].append(record)
+            self.written += 1
+            if len(self._buffers[table]) >= WAREHOUSE_FLUSH_ROWS:
+                self._flush(table)
+
+    def _flush(self, table: str):
+        """Verse le buffer d'une table dans un nouveau fichier (verrou déjà pris)."""
+        records, self._buffers[table] = self._buffers[table], []
+        self._flushes += 1
+        self.warehouse.write(table, records, self.niche, self.day, f"{self.run_id}-{self._flushes}")
+
+    def close(self):
+        with self._lock:
+            for table in TABLES:
+                self._flush(table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    # Maintenance : python prospector_warehouse.py (regroupe les fichiers de chaque partition)
+    warehouse = LeadWarehouse()
+    for table in TABLES:
+        warehouse.compact(table)
+    print(f"✅ Entrepôt compacté : {warehouse.root}")
@@ -1,8 +1,12 @@
 import streamlit as st
-import pandas as pd
 import time
 import os
-from youtube_prospector import run_prospector
+import json
+from datetime import date
+from youtube_prospector import generate_csv_string, DEFAULT_FETCH_WORKERS, DEFAULT_LLM_WORKERS, DEFAULT_BATCH_SIZE, YTDLP_MAX_WORKERS, CHANNEL_POLICIES, DEFAULT_CASCADE_BAND, GROQ_MODEL_ID, GROQ_TRIAGE_MODEL_ID, DEFAULT_RANK_FACTOR
+from prospector_cache import METADATA_TTL_HOURS, ChannelIndex
+from prospector_warehouse import LeadWarehouse, warehouse_available
+from prospector_jobs import JobManager, QUEUED, RUNNING, DONE, CANCELLED, FAILED, FINISHED
 
 # Configuration de la page
 st.set_page_config(
@@ -58,8 +62,29 @@ with st.sidebar:
     with col2:
         subs_max = st.number_input("Abonnés Max", value=500000, step=10000)
         
+    fetch_workers = st.number_input("Requêtes parallèles", min_value=1, max_value=YTDLP_MAX_WORKERS, value=DEFAULT_FETCH_WORKERS, help="Nombre de vidéos dont les métadonnées sont récupérées en même temps")
+    llm_workers = st.number_input("Appels IA parallèles", min_value=1, max_value=16, value=DEFAULT_LLM_WORKERS, help="Nombre d'analyses Groq menées en même temps")
+    batch_size = st.number_input("Vidéos par appel IA", min_value=1, max_value=20, value=DEFAULT_BATCH_SIZE, help="Score plusieurs vidéos dans une même requête Groq (1 = une requête par vidéo)")
+    cache_ttl_hours = st.number_input("Cache métadonnées (heures)", min_value=0, value=METADATA_TTL_HOURS, help="Durée de validité des vues/abonnés en cache. 0 = pas de cache")
+
     min_duration = st.number_input("Durée Min (minutes)", value=8, help="Pour le scoring (non bloquant sur le moteur actuel)")
     
+    channel_policy = st.selectbox(
+        "Vidéos par chaîne", options=CHANNEL_POLICIES,
+        format_func={"best": "Meilleure vidéo par chaîne", "first": "Première vidéo qualifiée", "all": "Toutes les vidéos"}.get,
+        help="Les chaînes déjà analysées lors des runs précédents sont ignorées (sauf 'Toutes les vidéos')"
+    )
+
+    use_cascade = st.checkbox("Tri rapide par petit modèle", value=True, help=f"{GROQ_TRIAGE_MODEL_ID} note tout ; {GROQ_MODEL_ID} ne renote que les cas limites")
+    cascade_band = st.slider("Bande d'incertitude autour de 70", min_value=0, max_value=50, value=DEFAULT_CASCADE_BAND, disabled=not use_cascade, help="Candidats renotés par le grand modèle si leur score est à ± cette valeur du seuil")
+
+    rank_factor = st.slider("Classement local (candidats filtrés par analyse IA)", min_value=1.0, max_value=4.0, value=DEFAULT_RANK_FACTOR, step=0.5, help="Seuls les mieux classés localement (pertinence, durée, vues, créateur solo) partent à l'IA ; 1 = ordre de la recherche YouTube")
+
+    use_llm_cache = st.checkbox("Réutiliser les analyses IA en cache", value=True, help="Décochez pour forcer une nouvelle analyse Groq de chaque vidéo")
+
+    resume = st.checkbox("Reprendre un run interrompu", value=True, help="Mêmes paramètres le même jour : les vidéos déjà traitées ne sont pas re-payées")
+    skip_known_leads = st.checkbox("Ignorer les leads déjà prospectés", value=True, help="Chaînes déjà qualifiées ou contactées lors des runs précédents")
+
     export_csv = st.checkbox("Générer CSV", value=True)
     
     st.divider()
@@ -68,67 +93,106 @@ with st.sidebar:
     if not final_api_key:
         st.caption("🔒 Veuillez entrer une clé API pour commencer.")
 
+@st.cache_resource
+def get_job_manager():
+    # Un seul pool de jobs par process : partagé par les sessions, conservé entre les reruns
+    return JobManager(warehouse=LeadWarehouse() if warehouse_available() else None)
+
+job_manager = get_job_manager()
+
 # Initialisation Session State
-if "results" not in st.session_state:
-    st.session_state.results = None
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = [] # Jobs lancés depuis cette session
+    st.session_state.selected_job = None
+    st.session_state.rendered_job = None # Dernier job terminé affiché en entier
 
-# Logique principale
+# Lancement : le run part en arrière-plan, l'interface reste utilisable pendant l'analyse
 if launch_btn:
     if not niche:
         st.error("Veuillez spécifier une niche.")
     else:
-        # Interface de logs
-        status_container = st.status("Analyse en cours...", expanded=True)
-        progress_bar = status_container.progress(0)
-        log_text = status_container.empty()
-        
-        logs = []
-        
-        def streamlit_logger(msg):
-            # Callback pour afficher les logs en temps réel
-            logs.append(msg)
-            # On affiche juste la dernière ligne ou tout le bloc
-            log_text.code("\n".join(logs[-10:])) # Garde les 10 dernières lignes pour propreté
-            
-            # Mise à jour barre de progression (estimation basique)
-            # On essaie de détecter le % basé sur "Analyse:"
-            if "Analyse:" in msg or "Recherche" in msg:
-                # Logique simplifiée : on incremente doucement
-                pass
-
-        try:
-            # Exécution du moteur
-            # Note: min_duration n'est pas encore accepté par run_prospector, on le garde pour future implémentation
-            results = run_prospector(
-                niche=niche,
-                language=language,
-                max_analyze=max_analyze,
-                subs_min=subs_min,
-                subs_max=subs_max,
-                api_key=final_api_key,
-                logger=streamlit_logger
-            )
-            
-            st.session_state.results = results
-            progress_bar.progress(100)
-            status_container.update(label="Analyse terminée !", state="complete", expanded=False)
-            
-        except Exception as e:
-            status_container.update(label="Erreur survenue", state="error")
-            st.error(f"Erreur critique : {str(e)}")
-
-# Affichage des Résultats
-if st.session_state.results:
-    res = st.session_state.results
-    summary = res["summary"]
+        # Note: min_duration n'est pas encore accepté par iter_prospector, on le garde pour future implémentation
+        job = job_manager.submit(
+            niche=niche,
+            language=language,
+            max_analyze=max_analyze,
+            subs_min=subs_min,
+            subs_max=subs_max,
+            api_key=final_api_key,
+            fetch_workers=fetch_workers,
+            llm_workers=llm_workers,
+            cache_ttl_hours=cache_ttl_hours,
+            use_llm_cache=use_llm_cache,
+            batch_size=batch_size,
+            channel_policy=channel_policy,
+            resume=resume,
+            skip_known_leads=skip_known_leads,
+            cascade_band=cascade_band if use_cascade else None,
+            rank_factor=rank_factor
+        )
+        st.session_state.job_ids.append(job.id)
+        st.session_state.selected_job = job.id
+
+STATUS_LABELS = {QUEUED: "⏳ En file", RUNNING: "🔄 En cours", DONE: "✅ Terminé", CANCELLED: "🛑 Annulé", FAILED: "❌ Erreur"}
+
+@st.fragment(run_every=2)
+def jobs_panel():
+    """Suivi des jobs de la session, rafraîchi toutes les 2 s sans relancer tout le script."""
+    session_jobs = job_manager.jobs(st.session_state.job_ids)
+    if not session_jobs:
+        return
+    st.subheader("📋 Analyses")
+    for job in session_jobs:
+        snap = job.snapshot()
+        params = snap["params"]
+        selected = job.id == st.session_state.selected_job
+        c1, c2, c3, c4 = st.columns([4, 2, 1, 1])
+        c1.write(f"{'👉 ' if selected else ''}**{params['niche']}** ({params['language']}) · "
+                 f"{len(snap['rows'])}/{params['max_analyze']} vidéos analysées")
+        c2.write(STATUS_LABELS[snap["status"]])
+        if snap["status"] not in FINISHED and c3.button("Annuler", key=f"cancel_{job.id}"):
+            job_manager.cancel(job.id)
+        if c4.button("Voir", key=f"show_{job.id}", disabled=selected):
+            st.session_state.selected_job = job.id
+            st.rerun()
+
+        if snap["status"] == FAILED and selected:
+            st.error(f"Erreur critique : {snap['error']}")
+        if snap["status"] == RUNNING and selected:
+            # Résultats partiels : progression, logs et leads qualifiés au fil de l'eau
+            st.progress(min(len(snap["rows"]) / params["max_analyze"], 1.0))
+            st.code("\n".join(snap["logs"]))
+            for q in snap["rows"]:
+                if q["analysis"].get("needs_editor"):
+                    st.success(f"⭐ {q['channel']} (Score: {q['analysis'].get('lead_score')}/100)")
+
+        # Le job affiché vient de se terminer : rerun complet pour afficher les résultats définitifs
+        if selected and snap["status"] in (DONE, CANCELLED) and st.session_state.rendered_job != job.id:
+            st.rerun()
+
+jobs_panel()
+
+# Affichage des Résultats (job sélectionné, une fois terminé ou annulé)
+selected_job = job_manager.get(st.session_state.selected_job) if st.session_state.selected_job else None
+res = selected_job.snapshot() if selected_job and selected_job.status in (DONE, CANCELLED) else None
+if res:
+    import pandas as pd # Seulement pour les tableaux de résultats : pas payé au démarrage de l'app
+    st.session_state.rendered_job = res["id"]
+    summary = res["summary"] # Vide si le job a été annulé
     rows = res["rows"]
+    niche = res["params"]["niche"]
+    res["csv_content"] = generate_csv_string(rows, niche) if export_csv else ""
+    st.divider()
     
     # 1. Métriques
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Vidéos Trouvées", summary["total_found"])
-    col2.metric("Analysées", summary["analyzed"])
-    col3.metric("Qualifiés", summary["qualified"])
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Vidéos Trouvées", summary.get("total_found", len(rows) + len(res["rejections"])))
+    col2.metric("Analysées", summary.get("analyzed", len(rows)))
+    col3.metric("Qualifiés", summary.get("qualified", sum(1 for r in rows if r["analysis"].get("needs_editor"))))
+    col4.metric("Taux de passage", f"{summary.get('pass_rate', 0):.0%}", help="Part des candidats examinés qui ont passé les filtres")
     
+    for error in summary.get("errors", []):
+        st.warning(f"Run écourté : {error}")
     st.divider()
     
     # 2. Tableau des Leads Qualifiés
@@ -151,6 +215,10 @@ if st.session_state.results:
                 with c2:
                     st.write(f"**Preuves :** {', '.join(a.get('evidence', []))}")
                     st.caption(f"upload: {q['upload_date']}")
+                    b = a.get("score_breakdown")
+                    if b:
+                        st.caption(f"Score : jugement IA {b['judgment']} + durée {b['duration']} + vues {b['views']}"
+                                   f" + malus {b['malus']} (plafond {b['cap']})")
                 
                 st.divider()
                 
@@ -160,6 +228,15 @@ if st.session_state.results:
                     st.text_area("Message Option 1", value=a.get("message_option_1"), height=100)
                 with m2:
                     st.text_area("Message Option 2", value=a.get("message_option_2"), height=100)
+
+                # Une chaîne contactée n'est plus jamais reproposée
+                if q.get("channel_id") and st.button("📨 Marquer comme contacté", key=f"contacted_{q['url']}"):
+                    index = ChannelIndex()
+                    try:
+                        index.set_status(q["channel_id"], "contacted", q["channel"])
+                    finally:
+                        index.close()
+                    st.toast(f"{q['channel']} marquée comme contactée")
     else:
         st.info("Aucun lead qualifié trouvé avec ces critères.")
 
@@ -179,3 +256,81 @@ if st.session_state.results:
             st.table(pd.DataFrame(res["rejections"]))
         else:
             st.write("Aucun rejet explicite enregistré.")
+
+    # 5. Performance (temps par étage, compteurs, histogrammes)
+    perf = summary.get("performance")
+    if perf:
+        with st.expander("⏱️ Performance"):
+            counters = perf["counters"]
+            p1, p2, p3, p4 = st.columns(4)
+            p1.metric("Durée totale", f"{perf['wall_seconds']:.1f}s")
+            p2.metric("Récupérations réseau", counters.get("network_fetches", 0))
+            p3.metric("Appels IA", counters.get("llm_calls", 0))
+            p4.metric("Tokens", counters.get("tokens", 0))
+            st.caption(f"Cache métadonnées : {counters.get('metadata_cache_hits', 0)} hits · "
+                       f"Cache IA : {counters.get('llm_cache_hits', 0)} hits · Retries : {counters.get('retries', 0)}")
+            cascade = summary.get("cascade")
+            if cascade and cascade["band"] is not None:
+                agreement = f" · accord des modèles {cascade['agreement']:.0%}" if cascade["agreement"] is not None else ""
+                st.caption(f"Cascade (±{cascade['band']}) : {cascade['triage']} décidés par le petit modèle · "
+                           f"{cascade['escalated']} renotés par le grand{agreement}")
+            ranking = summary.get("ranking")
+            if ranking and ranking["qualified_per_llm_call"] is not None:
+                ranked = (f"Classement local : {ranking['selected']} meilleurs sur {ranking['pool']} candidats filtrés · "
+                          if ranking["factor"] else "")
+                st.caption(f"{ranked}{ranking['qualified_per_llm_call']:.2f} lead qualifié par appel IA")
+            two_phase = summary.get("two_phase")
+            if two_phase:
+                st.caption(f"Messages rédigés : {two_phase['messages_written']} · non rédigés (non qualifiés) : "
+                           f"{two_phase['messages_skipped']} · ~{two_phase['output_tokens_saved']} tokens de sortie et "
+                           f"~{two_phase['seconds_saved']}s de génération économisés")
+
+            stages = perf["stages"]
+            if stages:
+                st.table(pd.DataFrame([
+                    {"Étape": name, "Mesures": s["count"], "Total (s)": s["total_seconds"],
+                     "p50 (s)": s["p50"], "p95 (s)": s["p95"], "Max (s)": s["max"]}
+                    for name, s in stages.items()
+                ]))
+                stage = st.selectbox("Histogramme des latences", options=list(stages))
+                st.bar_chart(pd.Series(stages[stage]["histogram"], name="Mesures"))
+
+            st.download_button(
+                label="📊 Exporter les mesures (JSON)",
+                data=json.dumps(perf, ensure_ascii=False, indent=2),
+                file_name=f"performance_{niche}_{int(time.time())}.json",
+                mime="application/json"
+            )
+
+# 6. Historique de tous les runs (entrepôt Parquet)
+if warehouse_available():
+    st.divider()
+    with st.expander("🗄️ Historique des leads"):
+        warehouse = LeadWarehouse()
+        h1, h2, h3, h4 = st.columns(4)
+        hist_niches = h1.multiselect("Niches", options=warehouse.niches())
+        hist_since = h2.date_input("Runs depuis le", value=date.today().replace(day=1))
+        hist_score = h3.slider("Score minimum", min_value=0, max_value=100, value=70)
+        hist_subs = h4.number_input("Abonnés max (0 = sans limite)", min_value=0, value=100000, step=10000)
+        hist_qualified = st.checkbox("Leads qualifiés uniquement", value=False)
+
+        history = warehouse.query(
+            niches=hist_niches or None,
+            since=hist_since.isoformat(),
+            min_score=hist_score,
+            max_subs=hist_subs or None,
+            needs_editor=True if hist_qualified else None
+        )
+        st.caption(f"{len(history)} leads")
+        st.dataframe(
+            history[["run_timestamp", "niche", "channel", "video_title", "video_url", "subscriber_count",
+                     "view_count", "lead_score", "needs_editor", "reason"]],
+            use_container_width=True,
+            hide_index=True
+        )
+        st.download_button(
+            label="💾 Exporter l'historique filtré (CSV)",
+            data=history.to_csv(index=False),
+            file_name=f"historique_leads_{int(time.time())}.csv",
+            mime="text/csv"
+        )
@@ -4,19 +4,58 @@ YouTube Prospector V1 - Gemini Product Edition
 Transforme la recherche de clients YouTube en un processus structuré et scoré.
 """
 
+from __future__ import annotations # Annotations non évaluées : Groq et yt_dlp ne sont importés qu'à l'usage
+
 import os
 import sys
 import json
 import csv
+import re
 import time
-import subprocess
+import threading
+import queue
+import math
+import itertools
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
-from groq import Groq
+from typing import TYPE_CHECKING
 import io
 
+from prospector_cache import MetadataCache, LLMCache, ChannelIndex, METADATA_TTL_HOURS
+from prospector_journal import RunJournal, SEARCH, REJECTED, PASSED, SCORED, DONE
+from prospector_metrics import RunMetrics
+from prospector_records import VideoDetails, Lead, DESCRIPTION_MAX_CHARS
+from prospector_ranking import select_top, window_size, DEFAULT_RANK_FACTOR, RANK_MIN_WINDOW, RANK_MAX_WAIT
+from prospector_rules import merge_scores, DURATION_BAND, DURATION_POINTS, VIEWS_BAND, VIEWS_POINTS, JUDGMENT_MAX, QUALIFIED_SCORE
+from prospector_scheduler import RateLimitScheduler, parse_duration, THROTTLE, TRANSIENT, FATAL
+
+if TYPE_CHECKING:
+    # Imports lourds (~0,4 s à eux deux) : différés jusqu'au premier appel Groq / yt-dlp
+    import yt_dlp
+    from groq import Groq
+
 # --- CONFIGURATION ---
 GROQ_MODEL_ID = "llama-3.3-70b-versatile" 
 
+# Quotas Groq (free tier du modèle ci-dessus), recalés en continu sur les en-têtes x-ratelimit-*
+GROQ_REQUESTS_PER_MINUTE = int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 30))
+GROQ_TOKENS_PER_MINUTE = int(os.environ.get("GROQ_TOKENS_PER_MINUTE", 12000))
+LLM_OUTPUT_TOKENS_ESTIMATE = 500 # Réservé sur le quota avant l'appel, corrigé avec usage ensuite
+# Scoring en deux temps : un appel court (score, raisons) pour tous, la rédaction des messages pour les seuls qualifiés
+SCORING_MAX_TOKENS = 250 # Plafond de sortie par candidat d'un appel de scoring
+MESSAGE_MAX_TOKENS = 400 # Plafond de sortie d'un appel de rédaction (deux messages)
+MESSAGE_TOKENS_ESTIMATE = 150 # Sortie typique d'un message, tant qu'aucun n'a été rédigé dans le run
+GROQ_OUTPUT_TOKENS_PER_SECOND = 250 # Débit de génération du modèle (estimation du temps économisé)
+GROQ_SCHEDULER = RateLimitScheduler("groq", GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE, max_concurrency=16)
+
+# Cascade : un petit modèle rapide note tous les candidats, le grand ne renote que les cas limites
+GROQ_TRIAGE_MODEL_ID = os.environ.get("GROQ_TRIAGE_MODEL_ID", "llama-3.1-8b-instant")
+GROQ_TRIAGE_REQUESTS_PER_MINUTE = int(os.environ.get("GROQ_TRIAGE_REQUESTS_PER_MINUTE", 30))
+GROQ_TRIAGE_TOKENS_PER_MINUTE = int(os.environ.get("GROQ_TRIAGE_TOKENS_PER_MINUTE", 6000))
+GROQ_TRIAGE_SCHEDULER = RateLimitScheduler("groq-triage", GROQ_TRIAGE_REQUESTS_PER_MINUTE, GROQ_TRIAGE_TOKENS_PER_MINUTE,
+                                           max_concurrency=16) # Quotas Groq propres à chaque modèle
+DEFAULT_CASCADE_BAND = 5  # Renote par le grand modèle si |score - 70| <= bande ; None = grand modèle pour tous
+
 def get_groq_client(api_key=None):
     """Configure et retourne le client Groq."""
     if not api_key:
@@ -24,27 +63,74 @@ def get_groq_client(api_key=None):
     
     if not api_key:
         # En mode CLI, on exit. En mode lib, on pourra gérer l'erreur plus haut.
-        print("❌ CRITIQUE : Variable GROQ_API_KEY manquante.")
-        print("   Exportez-la : export GROQ_API_KEY='votre_clé'")
+        print("❌ CRITIQUE : Variable GROQ_API_KEY manquante.", file=sys.stderr)
+        print("   Exportez-la : export GROQ_API_KEY='votre_clé'", file=sys.stderr)
         return None
-    return Groq(api_key=api_key)
+    from groq import Groq
+    # Les retries sont gérés par GROQ_SCHEDULER (backoff + quotas partagés)
+    return Groq(api_key=api_key, max_retries=0)
 
-def call_llm(prompt: str, client: Groq) -> str:
+def call_llm(prompt: str, client: Groq, model: str = GROQ_MODEL_ID) -> str:
     """Envoyer un prompt à Groq et récupérer le texte pur."""
-    try:
-        response = client.chat.completions.create(
-            model=GROQ_MODEL_ID,
+    return call_llm_with_usage(prompt, client, model=model)[0]
+
+def _classify_groq_error(exc: Exception) -> str:
+    status = getattr(exc, "status_code", None)
+    if status == 429:
+        return THROTTLE
+    if status is not None:
+        return TRANSIENT if status >= 500 else FATAL
+    from groq import APIConnectionError # Déjà importé : l'erreur vient d'un client Groq
+    if isinstance(exc, APIConnectionError): # Inclut les timeouts
+        return TRANSIENT
+    return FATAL
+
+def _groq_retry_after(exc: Exception) -> float | None:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    return parse_duration(response.headers.get("retry-after"))
+
+def call_llm_with_usage(prompt: str, client: Groq, max_tokens: int | None = None,
+                        model: str = GROQ_MODEL_ID) -> tuple[str, int]:
+    """Comme call_llm, mais retourne aussi le nombre total de tokens consommés (champ usage)."""
+    text, tokens, _ = _call_groq(prompt, client, max_tokens, model)
+    return text, tokens
+
+def _scheduler_for(model: str) -> RateLimitScheduler:
+    return GROQ_TRIAGE_SCHEDULER if model == GROQ_TRIAGE_MODEL_ID else GROQ_SCHEDULER
+
+def _call_groq(prompt: str, client: Groq, max_tokens: int | None = None,
+               model: str = GROQ_MODEL_ID) -> tuple[str, int, int]:
+    """Appel Groq via l'ordonnanceur du modèle : (texte, tokens au total, tokens de sortie). max_tokens plafonne la sortie."""
+    scheduler = _scheduler_for(model)
+    estimated = len(prompt) // 4 + (max_tokens or LLM_OUTPUT_TOKENS_ESTIMATE)
+    options = {"max_tokens": max_tokens} if max_tokens else {}
+
+    def request():
+        raw = client.chat.completions.with_raw_response.create(
+            model=model,
             messages=[
                 {"role": "system", "content": "You are a JSON-only response bot."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.1 # Plus précis pour le JSON
+            temperature=0.1, # Plus précis pour le JSON
+            **options
         )
-        return response.choices[0].message.content
+        scheduler.observe_headers(raw.headers)
+        return raw.parse()
+
+    try:
+        response = scheduler.call(request, _classify_groq_error, estimated_tokens=estimated,
+                                  retry_after=_groq_retry_after)
+        usage = getattr(response, "usage", None)
+        tokens = getattr(usage, "total_tokens", 0) or 0
+        scheduler.record_tokens(estimated, tokens)
+        return response.choices[0].message.content, tokens, getattr(usage, "completion_tokens", 0) or 0
     except Exception as e:
         # Gestion propre des erreurs API
-        print(f"\n⚠️ Erreur Groq: {e}")
-        return ""
+        print(f"\n⚠️ Erreur Groq: {e}", file=sys.stderr)
+        return "", 0, 0
 
 # --- UTILS DE DATE & FORMAT ---
 def is_video_recent(date_str: str, days: int = 30) -> bool:
@@ -65,45 +151,181 @@ def format_date(date_str: str) -> str:
     return "Date inconnue"
 
 # --- YOUTUBE & DATA ---
-def get_video_details(video_url: str) -> dict:
-    """Récupère métadonnées complètes incluant abonnés."""
-    cmd = [
-        sys.executable, "-m", "yt_dlp",
-        video_url,
-        "--dump-json",
-        "--no-download",
-        "--skip-download",
-        "--socket-timeout", "10",
-        "--no-warnings"
-    ]
-    
+YTDLP_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "noprogress": True,
+    "socket_timeout": 10,
+    # Date approximative ("il y a 3 semaines") sur les résultats de recherche, pour le pré-filtre
+    "extractor_args": {"youtubetab": {"approximate_date": [""]}},
+}
+# Extraction allégée des vidéos : ni manifestes DASH/HLS ni JS du player (inutiles sans téléchargement)
+YTDLP_LEAN_EXTRACTOR_ARGS = {"youtube": {"skip": ["dash", "hls", "translated_subs"], "player_skip": ["js"]}}
+YTDLP_MAX_WORKERS = 16
+DEFAULT_FETCH_WORKERS = 4
+# Recherche paginée : on commence petit et on n'ajoute des pages que si le taux de passage l'exige
+SEARCH_PAGE_MIN = 20      # YouTube renvoie ~20 résultats par page de continuation
+SEARCH_PAGE_MAX = 100
+SEARCH_MAX_FACTOR = 10    # Au plus max_analyze x 10 résultats de recherche par run
+SEARCH_PAGE_TIMEOUT = 60  # s, par page (et non plus pour toute la recherche)
+YOUTUBE_REQUESTS_PER_MINUTE = int(os.environ.get("YOUTUBE_REQUESTS_PER_MINUTE", 300))
+YOUTUBE_SCHEDULER = RateLimitScheduler("youtube", YOUTUBE_REQUESTS_PER_MINUTE, max_concurrency=YTDLP_MAX_WORKERS,
+                                       max_retries=3, base_delay=2.0)
+
+class EngineTimeout(Exception):
+    """Délai d'attente du moteur dépassé : l'extraction tourne encore dans son thread."""
+
+def _classify_ytdlp_error(exc: Exception) -> str:
+    # Timeout du moteur : l'extraction tourne encore, on ne la double pas
+    if isinstance(exc, EngineTimeout):
+        return FATAL
+    # Timeout réseau levé dans yt-dlp (TimeoutError = socket.timeout depuis Python 3.10)
+    if isinstance(exc, TimeoutError):
+        return TRANSIENT
+    msg = str(exc)
+    if "HTTP Error 429" in msg or "Too Many Requests" in msg or "confirm you're not a bot" in msg:
+        return THROTTLE
+    if re.search(r"HTTP Error 5\d\d|timed out|Connection|Temporary failure", msg):
+        return TRANSIENT
+    return FATAL
+
+class YtDlpEngine:
+    """
+    Moteur d'extraction yt-dlp en process.
+    Une instance YoutubeDL longue durée par thread de travail : yt-dlp n'est importé
+    qu'une fois, et cookies + session HTTP (keep-alive) sont réutilisés d'un appel à l'autre.
+    lean=True (défaut) : pas de résolution des formats ni du player, l'info dict brut de
+    l'extracteur suffit aux champs gardés (VideoDetails).
+    """
+
+    def __init__(self, options: dict | None = None, max_workers: int = YTDLP_MAX_WORKERS, lean: bool = True):
+        self.options = dict(options or YTDLP_OPTIONS)
+        self.lean = lean
+        if lean:
+            self.options["extractor_args"] = {**self.options.get("extractor_args", {}), **YTDLP_LEAN_EXTRACTOR_ARGS}
+        self._local = threading.local()
+        # Les threads sont créés à la demande : 1 seul tant qu'on reste séquentiel
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yt-dlp")
+
+    def _ydl(self) -> yt_dlp.YoutubeDL:
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            import yt_dlp
+            ydl = yt_dlp.YoutubeDL(self.options)
+            self._local.ydl = ydl
+        return ydl
+
+    def _extract_video(self, url: str) -> dict:
+        # process=False : ni tri / sélection des formats ni champs dérivés (upload_date vient de timestamp au besoin)
+        return self._ydl().extract_info(url, download=False, process=not self.lean)
+
+    def _search(self, query: str, max_results: int) -> list[dict]:
+        # process=False : pas de résolution des vidéos, équivalent de --flat-playlist
+        info = self._ydl().extract_info(f"ytsearch{max_results}:{query}", download=False, process=False)
+        # Les entrées sont paresseuses : on les consomme ici, dans le thread du moteur
+        return list(info.get("entries") or [])
+
+    @staticmethod
+    def _wait(future, timeout: float):
+        """Résultat de future ; EngineTimeout si le délai expire, les erreurs de yt-dlp passent telles quelles."""
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            if future.done():
+                raise # Timeout réseau levé dans yt-dlp, pas celui de l'attente
+            raise EngineTimeout(f"yt-dlp : pas de réponse en {timeout}s") from None
+
+    def extract_video(self, url: str, timeout: float = 30) -> dict:
+        """Métadonnées d'une vidéo (équivalent --dump-json, sans les formats en mode lean). Lève EngineTimeout."""
+        return self._wait(self._executor.submit(self._extract_video, url), timeout)
+
+    def search(self, query: str, max_results: int, timeout: float = 120) -> list[dict]:
+        """Entrées 'flat' d'une recherche YouTube. Lève EngineTimeout."""
+        return self._wait(self._executor.submit(self._search, query, max_results), timeout)
+
+    def open_search(self, query: str, limit: int, start: int = 0) -> "SearchCursor":
+        """Recherche paginée paresseuse (au plus `limit` résultats, à partir du rang `start`), voir SearchCursor."""
+        return SearchCursor(self, query, limit, start)
+
+class SearchCursor:
+    """
+    Recherche YouTube consommée page par page : next_page(n) ne télécharge que les pages de
+    continuation nécessaires pour n entrées de plus. Le curseur a sa propre instance YoutubeDL
+    (ses appels sont séquentiels) et reprend à la même position après une erreur.
+    start : position de départ (reprise d'un run journalisé) ; YouTube n'offrant pas d'offset, les
+    entrées précédentes sont parcourues dans le premier appel sans être renvoyées.
+    """
+
+    def __init__(self, engine: YtDlpEngine, query: str, limit: int, start: int = 0):
+        self.engine = engine
+        self.query = query
+        self.limit = limit
+        self.position = start
+        self.exhausted = False
+        self._ydl = None
+        self._entries = None
+
+    def _next_page(self, n: int) -> list[dict]:
+        try:
+            if self._entries is None:
+                if self._ydl is None:
+                    import yt_dlp
+                    self._ydl = yt_dlp.YoutubeDL(self.engine.options)
+                info = self._ydl.extract_info(f"ytsearch{self.limit}:{self.query}", download=False, process=False)
+                # Générateur paresseux : chaque page de continuation est téléchargée à la demande
+                self._entries = iter(info.get("entries") or [])
+                for _ in itertools.islice(self._entries, self.position):
+                    pass
+            page = list(itertools.islice(self._entries, n))
+        except Exception:
+            self._entries = None # Le générateur est mort : le prochain essai repart de self.position
+            raise
+        self.position += len(page)
+        if len(page) < n:
+            self.exhausted = True
+        return page
+
+    def next_page(self, n: int, timeout: float = SEARCH_PAGE_TIMEOUT) -> list[dict]:
+        """Jusqu'à n entrées 'flat' de plus (moins = fin des résultats). Lève EngineTimeout."""
+        return self.engine._wait(self.engine._executor.submit(self._next_page, n), timeout)
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+def get_engine() -> YtDlpEngine:
+    """Retourne le moteur yt-dlp partagé du process (créé au premier appel)."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = YtDlpEngine()
+        return _ENGINE
+
+def get_video_details(video_url: str) -> VideoDetails | dict:
+    """Récupère les métadonnées utiles incluant abonnés (VideoDetails ; dict vide si échec)."""
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0 and result.stdout.strip():
-            data = json.loads(result.stdout.strip())
-            
-            # Récupération en cascade des abonnés
-            subs = data.get("uploader_subscriber_count")
-            if subs is None:
-                subs = data.get("channel_follower_count")
-            if subs is None:
-                subs = data.get("subscriber_count")
-                
-            return {
-                "title": data.get("title", ""),
-                "channel": data.get("channel", data.get("uploader", "")),
-                "description": data.get("description", ""),
-                "view_count": data.get("view_count", 0),
-                "like_count": data.get("like_count", 0),
-                "duration": data.get("duration", 0),
-                "upload_date": data.get("upload_date", ""),
-                "subscriber_count": subs,
-                "url": video_url
-            }
+        data = YOUTUBE_SCHEDULER.call(lambda: get_engine().extract_video(video_url, timeout=30), _classify_ytdlp_error)
+        if data:
+            # L'info dict complet n'est pas gardé : seuls les champs utiles survivent à l'appel
+            return VideoDetails.from_info(data, video_url)
     except Exception:
         pass
     return {}
 
+def get_video_details_cached(video: dict, cache: MetadataCache | None = None) -> VideoDetails | dict:
+    """get_video_details précédé du cache disque (clé = ID vidéo)."""
+    video_id = video.get("id")
+    if cache is None or not video_id:
+        return get_video_details(video["url"])
+
+    cached = cache.get(video_id)
+    if cached is not None:
+        return VideoDetails.from_dict(cached)
+    details = get_video_details(video["url"])
+    if details:
+        cache.put(video_id, details.to_dict())
+    return details
+
 def prequalify(details: dict, subs_min: int = 0, subs_max: int = 500000) -> tuple[bool, str, list]:
     """Hard gates pour disqualifier AVANT appel IA."""
     subs = details.get("subscriber_count")
@@ -124,180 +346,695 @@ def prequalify(details: dict, subs_min: int = 0, subs_max: int = 500000) -> tupl
         return False, "Format masterclass (>60min)", ["masterclass"]
         
     # Règle 3: Auto-generated
-    if " - Topic" in channel or "Auto-generated" in details.get("description", ""):
+    if " - Topic" in channel or details.get("auto_generated") or "Auto-generated" in (details.get("description") or ""):
+        return False, "Contenu auto-généré/Topic", ["auto_generated"]
+
+    return True, "", []
+
+FLAT_DATE_MARGIN_DAYS = 7 # La date 'flat' est approximative : on ne rejette que les cas évidents
+
+def prequalify_flat(video: dict, days: int = 30) -> tuple[bool, str, list]:
+    """
+    Pré-filtre sur les seuls champs de la recherche 'flat', AVANT la récupération complète.
+    Chaque règle n'est appliquée que si le champ est présent ; le doute profite au candidat.
+    """
+    channel = video.get("channel") or ""
+    duration = video.get("duration")
+    upload_date = video.get("upload_date")
+
+    if " - Topic" in channel:
         return False, "Contenu auto-généré/Topic", ["auto_generated"]
 
+    if duration and duration >= 3600:
+        return False, "Format masterclass (>60min)", ["masterclass"]
+
+    if upload_date and not is_video_recent(upload_date, days=days + FLAT_DATE_MARGIN_DAYS):
+        return False, f"Trop vieux (~{format_date(upload_date)})", ["too_old"]
+
     return True, "", []
 
+def known_lead_reason(known: dict | None, skip_known_leads: bool = True) -> str | None:
+    """Lead déjà obtenu lors d'un run précédent (index des chaînes) : ni récupération ni appel IA."""
+    status = skip_known_leads and known and known.get("status")
+    if status == "contacted":
+        return "Chaîne déjà contactée"
+    if status == "lead":
+        return "Lead déjà prospecté"
+    return None
+
+def indexed_channel_reason(known: dict | None, subs_min: int = 0, subs_max: int = 500000,
+                           dedupe_channels: bool = True, skip_known_leads: bool = True) -> str | None:
+    """Rejet via la fiche de la chaîne dans l'index, sans récupération ; None si la vidéo doit être récupérée."""
+    if not known:
+        return None
+    reason = known_lead_reason(known, skip_known_leads)
+    if reason:
+        return reason
+    subs = known.get("subscriber_count")
+    if subs is not None and subs > subs_max:
+        return f"Chaîne trop grosse (>{subs_max}, index)"
+    if subs is not None and subs < subs_min:
+        return f"Chaîne trop petite (<{subs_min}, index)"
+    if dedupe_channels and known.get("lead_score") is not None:
+        return f"Chaîne déjà analysée (score {known['lead_score']})"
+    return None
+
+def gate_details(details: dict, channel_id: str | None, channel_index: ChannelIndex, subs_min: int = 0,
+                 subs_max: int = 500000, skip_known_leads: bool = True) -> tuple[str | None, list]:
+    """
+    Gates d'un candidat récupéré : date, hard gates (résultat noté dans l'index des chaînes), puis
+    lead déjà obtenu (chaîne inconnue avant la récupération). Retourne (raison du rejet ou None, red flags).
+    """
+    if not is_video_recent(details.get("upload_date"), days=30):
+        return f"Trop vieux ({format_date(details.get('upload_date', ''))})", []
+    is_allowed, reason, gates_flags = prequalify(details, subs_min, subs_max)
+    channel_index.record(channel_id, channel=details.get("channel"), subscriber_count=details.get("subscriber_count"),
+                         decision="passed" if is_allowed else "rejected", reason=reason or None)
+    if not is_allowed:
+        return reason, []
+    return known_lead_reason(channel_index.get(channel_id), skip_known_leads), gates_flags
+
+# Politique "une chaîne = un lead" :
+# - all   : toutes les vidéos sont analysées (comportement historique)
+# - first : première vidéo de la chaîne qui passe les gates
+# - best  : vidéo la plus prometteuse de la chaîne d'après les champs 'flat', seule récupérée
+CHANNEL_POLICIES = ("best", "first", "all")
+DEFAULT_CHANNEL_POLICY = "best"
+
+def _flat_appeal(video: dict) -> int:
+    """Note sommaire d'une vidéo sur ses champs 'flat' (mêmes bandes que la grille de scoring)."""
+    appeal = 0
+    duration = video.get("duration")
+    views = video.get("view_count")
+    if duration and DURATION_BAND[0] <= duration <= DURATION_BAND[1]:
+        appeal += DURATION_POINTS
+    if views and VIEWS_BAND[0] <= views <= VIEWS_BAND[1]:
+        appeal += VIEWS_POINTS
+    return appeal
+
+def select_videos_per_channel(videos: list[dict], policy: str = DEFAULT_CHANNEL_POLICY) -> list[dict]:
+    """Politique 'best' : ne garde que la meilleure vidéo de chaque chaîne (ordre de la recherche conservé)."""
+    if policy != "best":
+        return videos
+    best = {}
+    for video in videos:
+        # Sans channel_id, la chaîne n'est pas identifiable ("Inconnu" est commun) : la vidéo compte seule
+        key = video.get("channel_id") or video.get("id")
+        if key not in best or _flat_appeal(video) > _flat_appeal(best[key]):
+            best[key] = video
+    kept = {id(v) for v in best.values()}
+    return [v for v in videos if id(v) in kept]
+
+def _flat_video(data: dict) -> dict:
+    """Entrée 'flat' de recherche -> candidat minimal."""
+    timestamp = data.get("timestamp")
+    return {
+        "id": data.get("id"),
+        "title": data.get("title"),
+        "url": data.get("url") or f"https://www.youtube.com/watch?v={data.get('id')}",
+        "channel": data.get("uploader") or "Inconnu", # flat playlist use uploader
+        # Champs 'flat' optionnels (None si YouTube ne les fournit pas)
+        "channel_id": data.get("channel_id"),
+        "duration": data.get("duration"),
+        "view_count": data.get("view_count"),
+        "upload_date": datetime.fromtimestamp(timestamp).strftime("%Y%m%d") if timestamp else None
+    }
+
 def search_search_videos(query: str, max_results: int) -> list[dict]:
     """Recherche rapide initiale."""
-    cmd = [
-        sys.executable, "-m", "yt_dlp",
-        f"ytsearch{max_results}:{query}",
-        "--dump-json",
-        "--no-download",
-        "--skip-download",
-        "--flat-playlist",
-        "--no-warnings",
-        "--dateafter", "now-30days", # Pré-filtre large
-        "--extractor-args", "youtube:player_skip=configs",
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        videos = []
-        for line in result.stdout.strip().split('\n'):
-            if line:
-                try:
-                    data = json.loads(line)
-                    videos.append({
-                        "id": data.get("id"),
-                        "title": data.get("title"),
-                        "url": data.get("url", f"https://www.youtube.com/watch?v={data.get('id')}"),
-                        "channel": data.get("uploader", "Inconnu") # flat playlist use uploader
-                    })
-                except json.JSONDecodeError:
-                    continue
-        return videos
-    except subprocess.TimeoutExpired:
-        print("❌ Timeout recherche yt-dlp.")
+        entries = YOUTUBE_SCHEDULER.call(lambda: get_engine().search(query, max_results, timeout=120), _classify_ytdlp_error)
+        return [_flat_video(data) for data in entries if data and data.get("id")]
+    except EngineTimeout:
+        print("❌ Timeout recherche yt-dlp.", file=sys.stderr)
         return []
     except Exception as e:
-        print(f"❌ Erreur recherche: {e}")
+        print(f"❌ Erreur recherche: {e}", file=sys.stderr)
         return []
 
+def search_page(cursor: SearchCursor, n: int) -> list[dict]:
+    """Page suivante d'une recherche paginée ; une erreur définitive clôt le curseur."""
+    try:
+        entries = YOUTUBE_SCHEDULER.call(lambda: cursor.next_page(n), _classify_ytdlp_error)
+        return [_flat_video(data) for data in entries if data and data.get("id")]
+    except EngineTimeout:
+        print("❌ Timeout page de recherche yt-dlp.", file=sys.stderr)
+    except Exception as e:
+        print(f"❌ Erreur recherche: {e}", file=sys.stderr)
+    cursor.exhausted = True
+    return []
+
 # --- ANALYSE IA ---
-def analyze_candidate(details: dict, lang_version: str, client: Groq) -> dict:
-    """Logique de scoring et génération de message via Groq."""
-    
-    # Textes dynamiques selon la langue
-    if lang_version == "en":
-        role_desc = "You are an expert YouTube strategist and personalized outreach specialist."
-        task = "Analyze this channel for video editing service needs."
-        lang_instruction = "Write the prospecting message in ENGLISH."
-    else:
-        role_desc = "Tu es un expert en stratégie YouTube et prospection commerciale."
-        task = "Analyse cette chaîne pour détecter des besoins en montage vidéo."
-        lang_instruction = "Rédige le message de prospection en FRANÇAIS."
+DEFAULT_BATCH_SIZE = 1 # 1 = un appel Groq par candidat
 
-    prompt = f"""
-{role_desc}
-{task}
+# Seule la partie subjective de la grille est demandée au modèle : durée, vues, abonnés
+# et plafonds sont appliqués localement par prospector_rules.merge_scores
+JUDGMENT_RUBRIC = f"""JUGEMENT (judgment_score de 0 à {JUDGMENT_MAX}, uniquement sur ces critères):
+jusqu'à +35 pts : Créateur individuel / ton "solo" (ex: "my channel", vlog).
+jusqu'à +40 pts : Signes de montage perfectible (mentionnés dans desc ou format long sans timestamps).
+-30 pts : Chaîne très pro (branding TV, clips musicaux, bandes annonces).
+polished = true : vidéo déjà très "polished" / masterclass.
 
-INFO CANDIDAT:
-- Chaîne: {details.get('channel')}
+Durée, vues et abonnés sont notés à part par des règles fixes : ne les compte pas."""
+
+def _prompt_texts(lang_version: str) -> tuple[str, str, str]:
+    """Textes dynamiques selon la langue : (rôle, tâche, consigne de langue)."""
+    if lang_version == "en":
+        return ("You are an expert YouTube strategist and personalized outreach specialist.",
+                "Analyze this channel for video editing service needs.",
+                "Write the prospecting messages in ENGLISH.")
+    return ("Tu es un expert en stratégie YouTube et prospection commerciale.",
+            "Analyse cette chaîne pour détecter des besoins en montage vidéo.",
+            "Rédige les messages de prospection en FRANÇAIS.")
+
+def _candidate_info(details: dict) -> str:
+    return f"""- Chaîne: {details.get('channel')}
 - Vidéo: {details.get('title')}
 - Durée: {details.get('duration')}s
 - Vues: {details.get('view_count')}
 - Abonnés: {details.get('subscriber_count', 'N/A')}
 - Date: {details.get('upload_date')}
-- Description partielle: {details.get('description', '')[:600]}...
+- Description partielle: {(details.get('description') or '')[:DESCRIPTION_MAX_CHARS]}..."""
 
-SCORING STRICT (Base 0 pts):
-+20 pts : Créateur individuel / ton "solo" (ex: "my channel", vlog).
-+15 pts : Durée idéale (8 à 30 min).
-+10 pts : Vues modérées (1k - 50k).
-+15 pts : Signes de montage perfectible (mentionnés dans desc ou format long sans timestamps).
+def build_analysis_prompt(details: dict, lang_version: str) -> str:
+    """Prompt de scoring pour un seul candidat (sans message : voir build_message_prompt)."""
+    role_desc, task, _ = _prompt_texts(lang_version)
+    return f"""
+{role_desc}
+{task}
 
-MALUS & CAPS (Règles strictes):
--30 pts : Chaîne très pro (branding TV, clips musicaux, bandes annonces).
--50 pts : Abonnés >= 500k (Même si passé filtres).
-CAP MAX 60 : Si Abonnés >= 200k.
-CAP MAX 50 : Si vidéo déjà très "polished" / masterclass.
+INFO CANDIDAT:
+{_candidate_info(details)}
 
-RÈGLE D'OR : needs_editor = true UNIQUEMENT si lead_score >= 70.
+{JUDGMENT_RUBRIC}
 
 FORMAT DE RÉPONSE ATTENDU (JSON PUR):
 {{
-  "lead_score": int,
-  "needs_editor": boolean, 
+  "judgment_score": int,
+  "polished": boolean,
   "reason": "1-2 phrases max expliquant la décision",
   "evidence": ["Preuve précise 1 (ex: durée 12min)", "Preuve précise 2 (ex: créateur solo)"],
-  "prospecting_message": "Message court et personnalisé (si qualifié)",
   "red_flags": ["Liste", "des", "points", "négatifs"],
   "language_version": "{lang_version}"
 }}
 Obligation : 'evidence' doit contenir exactement 2 faits tirés des infos fournies.
+Réponds UNIQUEMENT le JSON.
+    """
+
+def build_batch_prompt(candidates: list[tuple[str, dict]], lang_version: str) -> str:
+    """Prompt de scoring pour plusieurs candidats : la grille n'est envoyée qu'une fois."""
+    role_desc, task, _ = _prompt_texts(lang_version)
+    blocks = "\n\n".join(f"[id={cid}]\n{_candidate_info(details)}" for cid, details in candidates)
+    return f"""
+{role_desc}
+{task} Chaque candidat est évalué indépendamment des autres.
+
+CANDIDATS ({len(candidates)}):
+{blocks}
+
+{JUDGMENT_RUBRIC}
+
+FORMAT DE RÉPONSE ATTENDU (JSON PUR) : un tableau avec exactement un objet par candidat.
+[
+  {{
+    "id": "id du candidat tel qu'indiqué entre crochets",
+    "judgment_score": int,
+    "polished": boolean,
+    "reason": "1-2 phrases max expliquant la décision",
+    "evidence": ["Preuve précise 1 (ex: durée 12min)", "Preuve précise 2 (ex: créateur solo)"],
+    "red_flags": ["Liste", "des", "points", "négatifs"],
+    "language_version": "{lang_version}"
+  }}
+]
+Obligation : 'evidence' doit contenir exactement 2 faits tirés des infos du candidat concerné.
+Réponds UNIQUEMENT le tableau JSON.
+    """
+
+def build_message_prompt(details: dict, analysis: dict, lang_version: str) -> str:
+    """Prompt de rédaction des deux messages de prospection d'un lead qualifié."""
+    role_desc, _, lang_instruction = _prompt_texts(lang_version)
+    return f"""
+{role_desc}
+Cette chaîne a besoin d'un monteur vidéo. Rédige deux messages de prospection personnalisés.
+
+INFO CANDIDAT:
+{_candidate_info(details)}
+
+ANALYSE:
+- Raison: {analysis.get('reason')}
+- Preuves: {'; '.join(analysis.get('evidence', []))}
+
+FORMAT DE RÉPONSE ATTENDU (JSON PUR):
+{{
+  "message_option_1": "Message court et personnalisé",
+  "message_option_2": "Variante avec un autre angle d'approche"
+}}
 
 {lang_instruction}
 Réponds UNIQUEMENT le JSON.
     """
+
+def analyze_candidate(details: dict, lang_version: str, client: Groq, cache: LLMCache | None = None,
+                      model: str = GROQ_MODEL_ID) -> dict:
+    """Logique de scoring via Groq (avec cache d'analyses optionnel) ; les messages sont rédigés par write_messages."""
+    return merge_scores([details], [_judge_candidate(details, lang_version, client, cache, model)])[0]
+
+def _judge_candidate(details: dict, lang_version: str, client: Groq, cache: LLMCache | None = None,
+                     model: str = GROQ_MODEL_ID) -> dict:
+    """Jugement IA d'un candidat, avant fusion avec les règles locales (c'est lui qui est mis en cache)."""
+    prompt = build_analysis_prompt(details, lang_version)
     
-    raw_response = call_llm(prompt, client)
-    
-    # Parsing robuste
+    cache_key = LLMCache.make_key(model, prompt, lang_version) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    started = time.perf_counter()
+    raw_response, tokens = call_llm_with_usage(prompt, client, max_tokens=SCORING_MAX_TOKENS, model=model)
+    analysis = parse_analysis(raw_response, lang_version)
+
+    # Une réponse non parsable n'est jamais mise en cache
+    if cache and "json_invalid" not in analysis["red_flags"]:
+        cache.put(cache_key, analysis, tokens, time.perf_counter() - started)
+    return analysis
+
+def analyze_batch(candidates: list[dict], lang_version: str, client: Groq, cache: LLMCache | None = None,
+                  model: str = GROQ_MODEL_ID) -> list[dict]:
+    """
+    Scoring de plusieurs candidats en un seul appel Groq.
+    Retourne les analyses dans l'ordre des candidats. Si la réponse est invalide, le lot est
+    coupé en deux et chaque moitié est rejouée ; un candidat seul repasse par le mode unitaire.
+    Les scores finaux sont calculés sur tout le lot par merge_scores (règles locales + jugement IA).
+    """
+    if len(candidates) == 1:
+        return [analyze_candidate(candidates[0], lang_version, client, cache=cache, model=model)]
+
+    results = [None] * len(candidates)
+    # Les clés de cache sont celles du mode unitaire : les deux modes partagent le cache
+    keys = [LLMCache.make_key(model, build_analysis_prompt(d, lang_version), lang_version) for d in candidates]
+    todo = []
+    for i, details in enumerate(candidates):
+        cached = cache.get(keys[i]) if cache else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            todo.append(i)
+
+    _score_batch(todo, candidates, keys, results, lang_version, client, cache, model)
+    return merge_scores(candidates, results)
+
+def analyze_cascade(candidates: list[dict], lang_version: str, client: Groq, cache: LLMCache | None = None,
+                    band: int | None = DEFAULT_CASCADE_BAND) -> list[dict]:
+    """
+    Cascade de modèles : GROQ_TRIAGE_MODEL_ID note tout le lot, puis seuls les candidats dont le score
+    tombe à ±band du seuil de qualification (ou dont la réponse est inexploitable) sont renotés par
+    GROQ_MODEL_ID. analysis["tier"] indique qui a décidé : "triage", "escalated" (score du petit
+    modèle gardé dans triage_score) ou "large" quand la cascade est désactivée (band=None).
+    """
+    # merge_scores renvoie des dicts neufs : tier est posé en place, sans nouvelle copie
+    if band is None:
+        analyses = analyze_batch(candidates, lang_version, client, cache)
+        for analysis in analyses:
+            analysis["tier"] = "large"
+        return analyses
+
+    analyses = analyze_batch(candidates, lang_version, client, cache, model=GROQ_TRIAGE_MODEL_ID)
+    for analysis in analyses:
+        analysis["tier"] = "triage"
+    escalate = [i for i, a in enumerate(analyses)
+                if abs(a["lead_score"] - QUALIFIED_SCORE) <= band or "json_invalid" in a["red_flags"]]
+    if escalate:
+        final = analyze_batch([candidates[i] for i in escalate], lang_version, client, cache)
+        for i, analysis in zip(escalate, final):
+            analysis["tier"] = "escalated"
+            analysis["triage_score"] = analyses[i]["lead_score"]
+            analyses[i] = analysis
+    return analyses
+
+def _score_batch(todo, candidates, keys, results, lang_version, client, cache, model=GROQ_MODEL_ID):
+    """Remplit results[i] pour chaque i de todo (découpage récursif sur réponse invalide)."""
+    if not todo:
+        return
+    if len(todo) == 1:
+        i = todo[0]
+        results[i] = _judge_candidate(candidates[i], lang_version, client, cache=cache, model=model)
+        return
+
+    ids = {f"c{n}": i for n, i in enumerate(todo)}
+    prompt = build_batch_prompt([(cid, candidates[i]) for cid, i in ids.items()], lang_version)
+    started = time.perf_counter()
+    raw_response, tokens = call_llm_with_usage(prompt, client, max_tokens=SCORING_MAX_TOKENS * len(todo), model=model)
+    elapsed = time.perf_counter() - started
+
+    for cid, analysis in parse_batch_analysis(raw_response, lang_version).items():
+        i = ids.get(cid)
+        if i is None or results[i] is not None:
+            continue
+        results[i] = analysis
+        if cache and "json_invalid" not in analysis["red_flags"]:
+            # Coût de l'appel réparti sur les candidats du lot
+            cache.put(keys[i], analysis, tokens // len(todo), elapsed / len(todo))
+
+    missing = [i for i in todo if results[i] is None]
+    if len(missing) == len(todo):
+        # Réponse inexploitable : on coupe le lot en deux
+        half = len(todo) // 2
+        _score_batch(todo[:half], candidates, keys, results, lang_version, client, cache, model)
+        _score_batch(todo[half:], candidates, keys, results, lang_version, client, cache, model)
+    else:
+        _score_batch(missing, candidates, keys, results, lang_version, client, cache, model)
+
+def write_messages(details: dict, analysis: dict, lang_version: str, client: Groq,
+                   cache: LLMCache | None = None) -> tuple[dict, int]:
+    """
+    Second temps du scoring, pour les leads qualifiés uniquement : rédaction des deux messages.
+    Retourne ({message_option_1, message_option_2}, tokens de sortie consommés ; 0 si cache).
+    """
+    prompt = build_message_prompt(details, analysis, lang_version)
+
+    cache_key = LLMCache.make_key(GROQ_MODEL_ID, prompt, lang_version) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached, 0
+
+    started = time.perf_counter()
+    raw_response, tokens, output_tokens = _call_groq(prompt, client, max_tokens=MESSAGE_MAX_TOKENS)
+    messages = parse_messages(raw_response)
+
+    if cache and messages["message_option_1"] != "N/A":
+        cache.put(cache_key, messages, tokens, time.perf_counter() - started)
+    return messages, output_tokens
+
+def build_lead(video: dict, details: dict, gates_flags: list, analysis: dict, lang_version: str, client: Groq,
+               channel_index: ChannelIndex, cache: LLMCache | None = None, metrics: RunMetrics | None = None,
+               write_message: bool = True) -> Lead:
+    """
+    Fin de traitement d'un candidat scoré : red flags des gates, messages (leads qualifiés seulement,
+    et pas si write_message=False), fiche de la chaîne dans l'index, puis le Lead.
+    metrics reçoit les compteurs de cascade (tier_*) et de messages.
+    """
+    metrics = metrics or RunMetrics()
+    analysis["red_flags"] = gates_flags + analysis.get("red_flags", [])
+    metrics.count(f"tier_{analysis['tier']}")
+    if analysis["tier"] == "escalated" and (analysis["triage_score"] >= QUALIFIED_SCORE) == analysis["needs_editor"]:
+        metrics.count("tier_agreements")
+
+    # Second temps : les messages ne sont rédigés que pour les leads qualifiés
+    if analysis.get("needs_editor") and write_message:
+        with metrics.span("message", video.get("id")):
+            messages, output_tokens = write_messages(details, analysis, lang_version, client, cache=cache)
+        metrics.count("messages")
+        metrics.count("message_output_tokens", output_tokens)
+    else:
+        messages = {"message_option_1": "", "message_option_2": ""}
+        metrics.count("messages_skipped")
+    analysis.update(messages)
+    analysis["prospecting_message"] = messages["message_option_1"]
+
+    channel_id = video.get("channel_id") or details.get("channel_id")
+    # Réponse IA inexploitable (panne, JSON invalide) : pas de score dans l'index, la chaîne reste éligible
+    if "json_invalid" not in analysis["red_flags"]:
+        channel_index.record(channel_id, decision="scored", lead_score=analysis.get("lead_score"), video_url=video['url'])
+    if analysis.get("needs_editor"):
+        channel_index.set_status(channel_id, "lead", details.get("channel"))
+    return Lead(
+        channel=details.get("channel"),
+        channel_id=channel_id,
+        video_title=details.get("title"),
+        url=video['url'],
+        upload_date=format_date(details.get("upload_date") or ""),
+        subscriber_count=details.get("subscriber_count"),
+        view_count=details.get("view_count"),
+        analysis=analysis
+    )
+
+def _strip_code_fence(raw_response: str) -> str:
+    cleaned = raw_response.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("```")[1]
+        if cleaned.startswith("json"):
+            cleaned = cleaned[4:]
+    return cleaned.strip()
+
+def parse_batch_analysis(raw_response: str, lang_version: str) -> dict[str, dict]:
+    """Parsing d'une réponse de lot : {id candidat: analyse}. Vide si la réponse est inexploitable."""
     try:
-        cleaned = raw_response.strip()
-        if cleaned.startswith("```"):
-            cleaned = cleaned.split("```")[1]
-            if cleaned.startswith("json"):
-                cleaned = cleaned[4:]
-        
-        parsed = json.loads(cleaned.strip())
-        
-        # Validation structure
-        return {
-            "lead_score": parsed.get("lead_score", 0),
-            "needs_editor": parsed.get("needs_editor", False),
-            "reason": parsed.get("reason", "N/A"),
-            "evidence": parsed.get("evidence", []),
-            "prospecting_message": parsed.get("prospecting_message", "N/A"),
-            "red_flags": parsed.get("red_flags", []),
-            "language_version": lang_version
-        }
+        parsed = json.loads(_strip_code_fence(raw_response))
+    except Exception:
+        return {}
+    if isinstance(parsed, dict):
+        # Certains modèles enveloppent le tableau : {"results": [...]}
+        parsed = next((v for v in parsed.values() if isinstance(v, list)), [])
+    if not isinstance(parsed, list):
+        return {}
+
+    analyses = {}
+    for item in parsed:
+        if isinstance(item, dict) and item.get("id") is not None:
+            analyses[str(item["id"])] = _normalize_analysis(item, lang_version)
+    return analyses
+
+def parse_messages(raw_response: str) -> dict:
+    """Parsing de la réponse de rédaction (fallback "N/A")."""
+    try:
+        parsed = json.loads(_strip_code_fence(raw_response))
+        return {"message_option_1": parsed.get("message_option_1") or "N/A",
+                "message_option_2": parsed.get("message_option_2") or "N/A"}
+    except Exception:
+        return {"message_option_1": "N/A", "message_option_2": "N/A"}
+
+def parse_analysis(raw_response: str, lang_version: str) -> dict:
+    """Parsing robuste de la réponse JSON du modèle (fallback json_invalid)."""
+    try:
+        return _normalize_analysis(json.loads(_strip_code_fence(raw_response)), lang_version)
     except Exception:
         return {
-            "lead_score": 0,
-            "needs_editor": False,
+            "judgment_score": 0,
+            "polished": False,
             "reason": "Erreur parsing JSON IA",
             "evidence": [],
-            "prospecting_message": "N/A",
             "red_flags": ["json_invalid"],
             "language_version": lang_version
         }
 
+def _normalize_analysis(parsed: dict, lang_version: str) -> dict:
+    """Validation structure : on ne garde que les champs attendus, avec valeurs par défaut."""
+    return {
+        "judgment_score": parsed.get("judgment_score", 0),
+        "polished": parsed.get("polished", False),
+        "reason": parsed.get("reason", "N/A"),
+        "evidence": parsed.get("evidence", []),
+        "red_flags": parsed.get("red_flags", []),
+        "language_version": lang_version
+    }
+
 # --- CSV GENERATION ---
+CSV_FIELDNAMES = [
+    "run_timestamp", "niche", "query_used", "channel", 
+    "video_title", "video_url", "upload_date", "subscriber_count", 
+    "view_count", "lead_score", "needs_editor", 
+    "language_version", "reason", "evidence", "prospecting_message", "red_flags"
+]
+
+def csv_row(res: dict, query: str, timestamp: str) -> dict:
+    """Ligne CSV d'un lead (format prospects.csv)."""
+    return {
+        "run_timestamp": timestamp,
+        "niche": query,
+        "query_used": query,
+        "channel": res.get("channel"),
+        "video_title": res.get("video_title"),
+        "video_url": res.get("url"),
+        "upload_date": res.get("upload_date"),
+        "subscriber_count": res.get("subscriber_count"),
+        "view_count": res.get("view_count"),
+        "lead_score": res.get("analysis", {}).get("lead_score"),
+        "needs_editor": res.get("analysis", {}).get("needs_editor"),
+        "language_version": res.get("analysis", {}).get("language_version"),
+        "reason": res.get("analysis", {}).get("reason"),
+        "evidence": "; ".join(res.get("analysis", {}).get("evidence", [])),
+        "prospecting_message": res.get("analysis", {}).get("prospecting_message"),
+        "red_flags": ";".join(res.get("analysis", {}).get("red_flags", []))
+    }
+
 def generate_csv_string(results: list, query: str) -> str:
     """Génère le contenu CSV en mémoire."""
     output = io.StringIO()
-    fieldnames = [
-        "run_timestamp", "niche", "query_used", "channel", 
-        "video_title", "video_url", "upload_date", "subscriber_count", 
-        "view_count", "lead_score", "needs_editor", 
-        "language_version", "reason", "evidence", "prospecting_message", "red_flags"
-    ]
-    
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDNAMES)
     writer.writeheader()
     
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     for res in results:
-        writer.writerow({
-            "run_timestamp": timestamp,
-            "niche": query,
-            "query_used": query,
-            "channel": res.get("channel"),
-            "video_title": res.get("video_title"),
-            "video_url": res.get("url"),
-            "upload_date": res.get("upload_date"),
-            "subscriber_count": res.get("subscriber_count"),
-            "view_count": res.get("view_count"),
-            "lead_score": res.get("analysis", {}).get("lead_score"),
-            "needs_editor": res.get("analysis", {}).get("needs_editor"),
-            "language_version": res.get("analysis", {}).get("language_version"),
-            "reason": res.get("analysis", {}).get("reason"),
-            "evidence": "; ".join(res.get("analysis", {}).get("evidence", [])),
-            "prospecting_message": res.get("analysis", {}).get("prospecting_message"),
-            "red_flags": ";".join(res.get("analysis", {}).get("red_flags", []))
-        })
+        writer.writerow(csv_row(res, query, timestamp))
     
     return output.getvalue()
 
+class LeadSink:
+    """
+    Écriture incrémentale sur disque des événements de iter_prospector, au fil de l'eau.
+    - .csv   : une ligne par lead (mêmes colonnes que generate_csv_string), en-tête si fichier neuf
+    - .jsonl : un objet JSON par lead ou rejet ({"type": "lead" | "rejection", ...})
+    - "-"    : JSON Lines sur la sortie standard (mode headless, voir prospector_cli.py)
+    Chaque ligne est flushée : un run interrompu laisse un fichier exploitable.
+    """
+
+    def __init__(self, path: str, query: str):
+        self.path = path
+        self.query = query
+        self.format = "jsonl" if path == "-" or path.endswith((".jsonl", ".ndjson")) else "csv"
+        self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._owns_file = path != "-" # La sortie standard n'est jamais fermée par le sink
+        if self._owns_file:
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._file = open(path, "a", encoding="utf-8", newline="")
+        else:
+            is_new = True
+            self._file = sys.stdout
+        self._writer = None
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDNAMES)
+            if is_new:
+                self._writer.writeheader()
+        self.written = 0
+
+    def write(self, kind: str, payload: dict, query: str | None = None):
+        """query remplace la niche du sink pour cette ligne (sink partagé par plusieurs runs)."""
+        query = query or self.query
+        if self.format == "csv":
+            if kind != "lead":
+                return
+            self._writer.writerow(csv_row(payload, query, self.timestamp))
+        elif kind == "lead":
+            record = {"type": "lead", **csv_row(payload, query, self.timestamp)}
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        elif kind == "rejection":
+            record = {"type": "rejection", "run_timestamp": self.timestamp, "niche": query, **payload}
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            return
+        self._file.flush()
+        self.written += 1
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --- PIPELINE ---
+DEFAULT_LLM_WORKERS = 2
+BATCH_MAX_WAIT = 2.0 # s
+_DONE = object() # Sentinel de fin de flux entre étages
+
+def _start_stage(name, fn, inbox, outbox, workers, events, metrics=None, key=None, on_error=None):
+    """
+    Lance un étage du pipeline : `workers` threads appliquent fn() à chaque élément de inbox
+    et poussent ses sorties dans outbox (file bornée => backpressure sur l'étage amont).
+    Le sentinel _DONE est transmis en aval quand le dernier thread de l'étage a fini, même en
+    cas d'erreur : un élément en échec est signalé (log) puis passé à on_error(item), un thread
+    qui meurt émet un événement ("error", message) et vide sa file pour ne pas bloquer l'amont.
+    Avec metrics, chaque appel à fn() est chronométré (hors attente de la file aval) ;
+    key(item) donne l'ID du candidat (ou la liste d'IDs d'un lot).
+    """
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def loop():
+        closed = False
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    closed = True
+                    inbox.put(_DONE) # Réveille les autres threads de l'étage
+                    break
+                try:
+                    if metrics:
+                        with metrics.span(name, key(item) if key else None):
+                            outs = list(fn(item))
+                    else:
+                        outs = fn(item)
+                    for out in outs:
+                        outbox.put(out)
+                except Exception as e:
+                    events.put(("log", f"⚠️ Erreur étage {name}: {e}"))
+                    if on_error:
+                        on_error(item)
+        except Exception as e:
+            events.put(("error", f"Étage {name} interrompu : {e}"))
+            if not closed:
+                _drain(inbox)
+                inbox.put(_DONE)
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                outbox.put(_DONE)
+
+    for i in range(workers):
+        threading.Thread(target=loop, name=f"{name}-{i}", daemon=True).start()
+
+def _drain(inbox):
+    """Consomme inbox jusqu'au sentinel, sans traiter : l'étage amont ne reste pas bloqué sur une file pleine."""
+    while inbox.get() is not _DONE:
+        pass
+
+def _start_batcher(inbox, outbox, batch_size, max_wait=BATCH_MAX_WAIT):
+    """
+    Regroupe les éléments de inbox en listes de batch_size éléments au plus.
+    Un lot incomplet part quand aucun nouvel élément n'arrive pendant max_wait secondes.
+    """
+    def loop():
+        batch = []
+        try:
+            while True:
+                try:
+                    item = inbox.get(timeout=max_wait if batch else None)
+                except queue.Empty:
+                    outbox.put(batch)
+                    batch = []
+                    continue
+                if item is _DONE:
+                    break
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    outbox.put(batch)
+                    batch = []
+            if batch:
+                outbox.put(batch)
+        finally:
+            outbox.put(_DONE)
+
+    threading.Thread(target=loop, name="batch", daemon=True).start()
+
 # --- MAIN RUNNER FUNCTION (FOR STREAMLIT) ---
-def run_prospector(niche, language, max_analyze, subs_min=0, subs_max=500000, api_key=None, logger=None):
+def iter_prospector(niche, language, max_analyze, subs_min=0, subs_max=500000, api_key=None, logger=None,
+                    fetch_workers=DEFAULT_FETCH_WORKERS, llm_workers=DEFAULT_LLM_WORKERS,
+                    cache_ttl_hours=METADATA_TTL_HOURS, use_llm_cache=True, batch_size=DEFAULT_BATCH_SIZE,
+                    channel_policy=DEFAULT_CHANNEL_POLICY, resume=True, skip_known_leads=True,
+                    cascade_band=DEFAULT_CASCADE_BAND, rank_factor=DEFAULT_RANK_FACTOR):
     """
-    Fonction principale appelée par Streamlit ou CLI.
-    Retourne un dictionnaire avec {summary, rows, rejections, csv_content}
+    Version streaming du Prospector : générateur d'événements (kind, payload) au fil de l'eau.
+    - ("rejection", {channel, reason, url}) dès qu'un candidat est écarté
+    - ("lead", {channel, video_title, url, ..., analysis}) dès qu'un candidat est scoré
+    - ("summary", {...}) en dernier
+    Rien n'est accumulé : la mémoire reste constante quel que soit max_analyze.
+    cache_ttl_hours=0 désactive le cache disque des métadonnées,
+    use_llm_cache=False force un nouvel appel Groq pour chaque candidat,
+    batch_size > 1 score plusieurs candidats par appel Groq,
+    channel_policy choisit combien de vidéos par chaîne sont analysées (voir CHANNEL_POLICIES),
+    resume reprend un run interrompu (mêmes paramètres, même jour) depuis son journal,
+    skip_known_leads ignore les chaînes déjà prospectées ou contactées lors des runs précédents,
+    cascade_band règle la cascade de modèles (voir analyze_cascade ; None = grand modèle pour tous),
+    rank_factor > 1 filtre max_analyze x rank_factor candidats et n'envoie à l'IA que les max_analyze mieux
+    classés localement (voir prospector_ranking ; défaut 1 = ordre de la recherche).
     """
     
     def log(msg):
@@ -307,82 +1044,497 @@ def run_prospector(niche, language, max_analyze, subs_min=0, subs_max=500000, ap
             print(msg)
 
     log(f"🚀 Démarrage Prospector pour '{niche}' ({language})")
+    metrics = RunMetrics()
+    groq_snapshot = GROQ_SCHEDULER.stats()
+    triage_snapshot = GROQ_TRIAGE_SCHEDULER.stats()
+    youtube_snapshot = YOUTUBE_SCHEDULER.stats()
     
     client = get_groq_client(api_key)
     if not client:
         raise ValueError("Clé API Groq manquante")
 
-    # 1. Recherche
-    log(f"🔍 Recherche de candidats (target: {max_analyze})...")
-    raw_videos = search_search_videos(niche, max_analyze * 3) # x3 pour marge
-    log(f"   -> {len(raw_videos)} vidéos brutes trouvées.")
+    # Journal de reprise : un run interrompu avec les mêmes paramètres repart de là où il s'est arrêté
+    journal = RunJournal.for_run(niche, language, max_analyze, subs_min, subs_max)
+    state = journal.load() if resume else None
+    if not state or state["done"] or state["videos"] is None:
+        state = None
+        journal.reset()
+    resumed = state["candidates"] if state else {}
+
+    # 1. Recherche : source paginée, consommée par le pipeline au rythme du taux de passage
+    if state:
+        log(f"♻️ Reprise du run interrompu : {len(resumed)} candidats déjà traités, {len(state['videos'])} vidéos en file.")
+    else:
+        log(f"🔍 Recherche de candidats (target: {max_analyze})...")
+    search_limit = max_analyze * SEARCH_MAX_FACTOR
+    searched = [0] # Vidéos trouvées (journal compris) : un compteur, pas la liste
+    search_pages = [0]
 
     analyzed_count = 0
-    final_results = []
-    rejections = []
+    qualified_count = 0
+    rejected_count = 0
+    metadata_cache = MetadataCache(ttl_hours=cache_ttl_hours) if cache_ttl_hours else None
+    llm_cache = LLMCache() if use_llm_cache else None
+    channel_index = ChannelIndex()
+    if channel_policy not in CHANNEL_POLICIES:
+        raise ValueError(f"Politique chaîne inconnue : {channel_policy}")
+    dedupe_channels = channel_policy != "all"
+    # Classement local : les gates retiennent un vivier plus large, dont seuls les mieux classés vont à l'IA
+    ranking = bool(rank_factor) and rank_factor > 1
+    pool_target = math.ceil(max_analyze * rank_factor) if ranking else max_analyze
+    rank_window_size = window_size(pool_target)
     
-    # 2. Analyse
+    # 2. Analyse : pipeline fetch -> gates -> IA
+    # Chaque étage a ses propres threads et une file bornée en entrée : les appels Groq
+    # se font pendant que les métadonnées des vidéos suivantes sont récupérées.
     log("🧠 Analyse approfondie en cours...")
-    
-    for vid in raw_videos:
-        if analyzed_count >= max_analyze:
-            break
-            
-        details = get_video_details(vid['url'])
-        if not details:
-            continue
-            
-        # Filtre Date
-        if not is_video_recent(details.get("upload_date"), days=30):
-            d = format_date(details.get("upload_date", ""))
-            rejections.append({"channel": details.get("channel", "Inconnu"), "reason": f"Trop vieux ({d})", "url": vid['url']})
-            continue
 
-        # Hard Gates
-        is_allowed, reason, gates_flags = prequalify(details, subs_min, subs_max)
-        if not is_allowed:
-            rejections.append({"channel": details.get("channel", "Inconnu"), "reason": reason, "url": vid['url']})
-            continue
-            
-        log(f"   Running AI on: {details.get('channel')}...")
-        
-        # AI Analysis
-        analysis = analyze_candidate(details, language, client)
-        analysis["red_flags"] = gates_flags + analysis.get("red_flags", [])
+    fetch_workers = max(1, min(int(fetch_workers), YTDLP_MAX_WORKERS))
+    llm_workers = max(1, int(llm_workers))
+    batch_size = max(1, int(batch_size))
+    fetch_q = queue.Queue(maxsize=fetch_workers * 2)
+    gate_q = queue.Queue(maxsize=fetch_workers * 2)
+    llm_q = queue.Queue(maxsize=llm_workers * batch_size * 2)
+    rank_q = queue.Queue(maxsize=rank_window_size * 2) if ranking else llm_q
+    batch_q = queue.Queue(maxsize=llm_workers)
+    # Tout ce qui touche au logger (et donc à l'UI Streamlit) repasse par le thread appelant
+    events = queue.Queue()
+    quota_reached = threading.Event()
+    cancelled = threading.Event()
+
+    fetches_avoided = [0]
+    channel_skips = [0]
+    replayed = {"feed": 0, "gate": 0} # Candidats rejoués depuis le journal (un compteur par thread)
+    retained_channels = set() # Chaînes déjà envoyées à l'IA pendant ce run
+    # Flux de candidats : envoyés dans le pipeline / sortis (retenus ou écartés), pour le taux de passage
+    flow = {"sent": 0, "resolved": 0}
+    passed = [0]
+    progress = threading.Condition()
+    fetch_started = {} # video_id -> début de récupération, retiré quand le candidat sort du pipeline
+
+    def reject(vid, channel, reason):
+        rejection = {"channel": channel, "reason": reason, "url": vid['url']}
+        journal.append(REJECTED, vid.get("id"), rejection=rejection)
+        events.put(("rejection", rejection))
+
+    def channel_gate(vid):
+        """Rejet via l'index des chaînes (sans récupération) ; None si la vidéo doit être récupérée."""
+        channel_id = vid.get("channel_id")
+        if dedupe_channels and channel_id in retained_channels:
+            return "Chaîne déjà retenue dans ce run"
+        return indexed_channel_reason(channel_index.get(channel_id), subs_min, subs_max, dedupe_channels, skip_known_leads)
+
+    def sent(n_resolved=0):
+        with progress:
+            flow["sent"] += 1
+            flow["resolved"] += n_resolved
+
+    def resolved():
+        with progress:
+            flow["resolved"] += 1
+            progress.notify_all()
+
+    def pass_rate():
+        # Lissage de Laplace : optimiste tant que rien n'a été observé
+        return (passed[0] + 1) / (flow["resolved"] + 2)
+
+    def next_page_size():
+        """
+        Taille de la prochaine page de recherche : ce qui manque pour l'objectif une fois comptés
+        les candidats encore dans le pipeline (au taux de passage observé). Attend tant que les
+        candidats en vol suffisent probablement ; 0 = objectif atteint.
+        """
+        with progress:
+            while not quota_reached.is_set():
+                in_flight = flow["sent"] - flow["resolved"]
+                rate = pass_rate()
+                missing = pool_target - passed[0] - in_flight * rate
+                if missing > 0:
+                    return min(SEARCH_PAGE_MAX, max(SEARCH_PAGE_MIN, math.ceil(missing / rate)))
+                progress.wait(timeout=1.0)
+        return 0
+
+    def pages():
+        """Pages de candidats : celles du journal d'abord (reprise), puis la recherche paginée."""
+        seen = set()
+        if state:
+            seen.update(v.get("id") for v in state["videos"])
+            searched[0] += len(state["videos"])
+            yield state["videos"]
+            if state["search"]["exhausted"]:
+                return
+        # Reprise : le curseur repart après les pages journalisées, qui ne sont pas redemandées
+        cursor = get_engine().open_search(niche, search_limit, state["search"]["position"] if state else 0)
+        while not cursor.exhausted and cursor.position < search_limit:
+            size = next_page_size()
+            if not size:
+                return
+            with metrics.span("search"):
+                page = search_page(cursor, min(size, search_limit - cursor.position))
+            page = [v for v in page if v["id"] not in seen]
+            seen.update(v["id"] for v in page)
+            search_pages[0] += 1
+            searched[0] += len(page)
+            journal.append(SEARCH, videos=page, position=cursor.position, exhausted=cursor.exhausted)
+            events.put(("log", f"   -> Page {search_pages[0]} : {len(page)} vidéos (taux de passage {pass_rate():.0%})"))
+            yield page
+
+    def feed():
+        try:
+            for page in pages():
+                for vid in select_videos_per_channel(page, channel_policy):
+                    if quota_reached.is_set():
+                        break
+                    record = resumed.get(vid.get("id"))
+                    if record and record["stage"] == REJECTED:
+                        replayed["feed"] += 1
+                        sent(n_resolved=1)
+                        events.put(("rejection", record["rejection"]))
+                        continue
+                    if record:
+                        # Déjà filtré / scoré lors du run interrompu : passe directement aux gates
+                        sent()
+                        fetch_q.put(vid)
+                        continue
+                    # Pré-filtre sur les champs 'flat' : pas de récupération complète pour les rejets évidents
+                    is_allowed, reason, _ = prequalify_flat(vid, days=30)
+                    if not is_allowed:
+                        fetches_avoided[0] += 1
+                        sent(n_resolved=1)
+                        reject(vid, vid.get("channel", "Inconnu"), reason)
+                        continue
+                    reason = channel_gate(vid)
+                    if reason:
+                        channel_skips[0] += 1
+                        sent(n_resolved=1)
+                        reject(vid, vid.get("channel", "Inconnu"), reason)
+                        continue
+                    sent()
+                    fetch_q.put(vid)
+                if quota_reached.is_set():
+                    break
+        except Exception as e:
+            # Recherche ou pré-filtres en échec : le run se termine avec ce qui est déjà en file
+            events.put(("error", f"Alimentation interrompue : {e}"))
+        finally:
+            fetch_q.put(_DONE)
+
+    def fetch(vid):
+        # Early stop : on vide la file sans lancer de nouvelles requêtes
+        if quota_reached.is_set():
+            return []
+        record = resumed.get(vid.get("id"))
+        if record:
+            details = record.get("details")
+            return [(vid, VideoDetails.from_dict(details) if details else record.get("lead"), record)]
+        fetch_started[vid.get("id")] = time.perf_counter()
+        with metrics.span("fetch", vid.get("id")):
+            details = get_video_details_cached(vid, metadata_cache)
+        metrics.count("fetches")
+        return [(vid, details, None)]
+
+    def fetch_failed(vid):
+        fetch_started.pop(vid.get("id"), None)
+        resolved()
+
+    def admit(channel_id):
+        retained_channels.add(channel_id)
+        passed[0] += 1
+        if passed[0] >= pool_target:
+            quota_reached.set()
+
+    def gate(item):
+        outs = []
+        try:
+            outs = gate_candidate(item)
+            return outs
+        finally:
+            if not outs:
+                fetch_started.pop(item[0].get("id"), None)
+            resolved()
+
+    def gate_candidate(item):
+        vid, details, record = item
+        # Objectif atteint (vivier complet ou budget IA dépensé) : le reste est ignoré sans être compté comme rejet
+        if passed[0] >= pool_target or quota_reached.is_set() or not details:
+            return []
+
+        # Reprise : lead déjà scoré => rejoué tel quel ; candidat déjà filtré => directement à l'IA
+        if record:
+            replayed["gate"] += 1
+            admit(vid.get("channel_id") or details.get("channel_id"))
+            if record["stage"] == SCORED:
+                with rank_lock:
+                    selected[0] += 1 # Déjà passé par l'IA : compte dans son budget
+                events.put(("lead", Lead.from_dict(record["lead"])))
+                return []
+            return [(vid, details, record["flags"])]
+
+        # Date, hard gates, lead déjà obtenu
+        channel_id = vid.get("channel_id") or details.get("channel_id")
+        reason, gates_flags = gate_details(details, channel_id, channel_index, subs_min, subs_max, skip_known_leads)
+        if reason:
+            reject(vid, details.get("channel", "Inconnu"), reason)
+            return []
+
+        # Une vidéo par chaîne (les doublons récupérés avant que la chaîne soit connue s'arrêtent ici)
+        if dedupe_channels and channel_id and channel_id in retained_channels:
+            reject(vid, details.get("channel", "Inconnu"), "Chaîne déjà retenue dans ce run")
+            return []
+
+        admit(channel_id)
+        journal.append(PASSED, vid.get("id"), details=details, flags=gates_flags)
+        return [(vid, details, gates_flags)]
+
+    selected = [0] # Candidats envoyés à l'IA (ou déjà scorés, en reprise)
+    rank_lock = threading.Lock()
+
+    def rank_window(window, final=False):
+        """Envoie à l'IA le 1/rank_factor le mieux classé de la fenêtre (tout le budget restant en fin de flux)."""
+        with rank_lock:
+            remaining = max(0, max_analyze - selected[0])
+        keep = remaining if final else min(remaining, math.ceil(len(window) / rank_factor))
+        with metrics.span("rank", [vid.get("id") for vid, _, _ in window]):
+            top, rest, scores = select_top([details for _, details, _ in window], niche, keep)
+        with rank_lock:
+            selected[0] += len(top)
+            if selected[0] >= max_analyze:
+                quota_reached.set() # Budget IA dépensé : plus de récupérations ni de gates pour rien
+        for i in top:
+            llm_q.put(window[i])
+        for position, i in enumerate(rest, len(top) + 1):
+            vid, details, _ = window[i]
+            fetch_started.pop(vid.get("id"), None)
+            metrics.count("ranked_out")
+            reject(vid, details.get("channel", "Inconnu"),
+                   f"Classement local : {position}e sur {len(window)} (score {scores[i]:+.2f})")
+
+    def ranker():
+        window = []
+        closed = False
+        try:
+            while True:
+                try:
+                    item = rank_q.get(timeout=RANK_MAX_WAIT if window else None)
+                except queue.Empty:
+                    # Flux lent : une petite fenêtre attend la suite (classée seule, elle retomberait
+                    # sur l'ordre de la recherche)
+                    if len(window) >= RANK_MIN_WINDOW:
+                        rank_window(window)
+                        window = []
+                    continue
+                if item is _DONE:
+                    closed = True
+                    break
+                window.append(item)
+                if len(window) >= rank_window_size:
+                    rank_window(window)
+                    window = []
+            if window:
+                rank_window(window, final=True)
+        except Exception as e:
+            events.put(("error", f"Classement local interrompu : {e}"))
+            if not closed:
+                _drain(rank_q)
+        finally:
+            llm_q.put(_DONE)
+
+    def score(batch):
+        if cancelled.is_set():
+            return []
+        for _, details, _ in batch:
+            events.put(("log", f"   Running AI on: {details.get('channel')}..."))
         
-        # Adaptation pour Streamlit (mapping message options)
-        analysis["message_option_1"] = analysis.get("prospecting_message")
-        analysis["message_option_2"] = "Option alternative non générée par ce modèle."
-
-        result_pkg = {
-            "channel": details.get("channel"),
-            "video_title": details.get("title"),
-            "url": vid['url'],
-            "upload_date": format_date(details.get("upload_date", "")),
-            "subscriber_count": details.get("subscriber_count"),
-            "view_count": details.get("view_count"),
-            "analysis": analysis
+        # AI Analysis (un appel Groq pour tout le lot, par modèle de la cascade)
+        analyses = analyze_cascade([details for _, details, _ in batch], language, client, cache=llm_cache,
+                                   band=cascade_band)
+
+        leads = []
+        for (vid, details, gates_flags), analysis in zip(batch, analyses):
+            lead = build_lead(vid, details, gates_flags, analysis, language, client, channel_index, cache=llm_cache,
+                              metrics=metrics, write_message=not cancelled.is_set())
+            journal.append(SCORED, vid.get("id"), lead=lead)
+            started = fetch_started.pop(vid.get("id"), None)
+            if started is not None:
+                metrics.record("lead", time.perf_counter() - started, vid.get("id"))
+            leads.append(("lead", lead))
+        return leads
+
+    threading.Thread(target=feed, name="feed", daemon=True).start()
+    # Récupération en échec : le candidat ne passera pas par gate, il sort du flux ici
+    _start_stage("fetch", fetch, fetch_q, gate_q, fetch_workers, events, on_error=fetch_failed)
+    _start_stage("gate", gate, gate_q, rank_q, 1, events, # 1 thread : compteur de quota sans verrou
+                 metrics=metrics, key=lambda item: item[0].get("id"))
+    if ranking:
+        threading.Thread(target=ranker, name="rank", daemon=True).start()
+    _start_batcher(llm_q, batch_q, batch_size)
+    _start_stage("llm", score, batch_q, events, llm_workers, events,
+                 metrics=metrics, key=lambda batch: [vid.get("id") for vid, _, _ in batch],
+                 on_error=lambda batch: [fetch_started.pop(vid.get("id"), None) for vid, _, _ in batch])
+
+    errors = []
+    try:
+        for kind, payload in iter(events.get, _DONE):
+            if kind == "log":
+                log(payload)
+            elif kind == "error":
+                # Étage interrompu : plus de nouveaux candidats, ceux en vol finissent normalement
+                errors.append(payload)
+                log(f"❌ {payload}")
+                quota_reached.set()
+            elif kind == "rejection":
+                rejected_count += 1
+                yield kind, payload
+            elif kind == "lead":
+                analyzed_count += 1
+                if payload["analysis"].get("needs_editor"):
+                    qualified_count += 1
+                status = "✅" if payload["analysis"].get("needs_editor") else "❌"
+                log(f"      {status} Score: {payload['analysis'].get('lead_score')} - {payload['channel']}")
+                yield kind, payload
+
+        if flow["resolved"]:
+            log(f"   📈 Taux de passage observé : {passed[0] / flow['resolved']:.0%} "
+                f"({searched[0]} vidéos en {search_pages[0]} page(s) de recherche)")
+
+        if channel_skips[0]:
+            log(f"   ⚡ Index des chaînes : {channel_skips[0]} récupérations évitées")
+
+        if fetches_avoided[0]:
+            log(f"   ⚡ Pré-filtre recherche : {fetches_avoided[0]} récupérations complètes évitées")
+
+        if metadata_cache:
+            cache_stats = metadata_cache.stats()
+            log(f"   💾 Cache métadonnées : {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        else:
+            cache_stats = {"hits": 0, "misses": 0, "expired": 0}
+
+        if llm_cache:
+            llm_stats = llm_cache.stats()
+            log(f"   💾 Cache IA : {llm_stats['hits']} analyses réutilisées "
+                f"({llm_stats['tokens_saved']} tokens, {llm_stats['seconds_saved']}s économisés)")
+        else:
+            llm_stats = {"hits": 0, "misses": 0, "tokens_saved": 0, "seconds_saved": 0.0}
+
+        rate_limits = {"groq": GROQ_SCHEDULER.stats_since(groq_snapshot), "groq_triage": GROQ_TRIAGE_SCHEDULER.stats_since(triage_snapshot),
+                       "youtube": YOUTUBE_SCHEDULER.stats_since(youtube_snapshot)}
+        for name, stats in rate_limits.items():
+            if stats["retries"]:
+                log(f"   ⏳ {name} : {stats['retries']} retries ({stats['throttled']} throttling), concurrence {stats['concurrency']}")
+
+        # Messages non rédigés pour les leads non qualifiés : sortie moyenne d'un message réellement rédigé
+        # (ou estimation), au débit de génération du modèle
+        written = metrics.counters.get("messages", 0)
+        skipped = metrics.counters.get("messages_skipped", 0)
+        message_tokens = metrics.counters.get("message_output_tokens", 0)
+        tokens_per_message = message_tokens / written if message_tokens else MESSAGE_TOKENS_ESTIMATE
+        two_phase = {
+            "messages_written": written,
+            "messages_skipped": skipped,
+            "message_output_tokens": message_tokens,
+            "output_tokens_saved": int(skipped * tokens_per_message),
+            "seconds_saved": round(skipped * tokens_per_message / GROQ_OUTPUT_TOKENS_PER_SECOND, 1),
         }
-        
-        final_results.append(result_pkg)
-        analyzed_count += 1
-        
-        status = "✅" if analysis.get("needs_editor") else "❌"
-        log(f"      {status} Score: {analysis.get('lead_score')} - {details.get('channel')}")
+        if skipped:
+            log(f"   ✂️ Messages rédigés pour {written} leads qualifiés seulement : "
+                f"~{two_phase['output_tokens_saved']} tokens de sortie, ~{two_phase['seconds_saved']}s économisés")
+
+        # Cascade : qui a décidé, et accord des deux modèles sur les cas renotés
+        escalated = metrics.counters.get("tier_escalated", 0)
+        cascade = {
+            "band": cascade_band,
+            "triage_model": GROQ_TRIAGE_MODEL_ID if cascade_band is not None else None,
+            "triage": metrics.counters.get("tier_triage", 0),
+            "escalated": escalated,
+            "large": metrics.counters.get("tier_large", 0),
+            "agreement": round(metrics.counters.get("tier_agreements", 0) / escalated, 3) if escalated else None,
+        }
+        if cascade_band is not None and (cascade["triage"] or escalated):
+            log(f"   🪜 Cascade : {cascade['triage']} décidés par {GROQ_TRIAGE_MODEL_ID}, {escalated} renotés par {GROQ_MODEL_ID}"
+                + (f" (accord {cascade['agreement']:.0%})" if escalated else ""))
 
-    # 3. Synthèse
-    qualified = [r for r in final_results if r["analysis"].get("needs_editor")]
+        # Classement local : rendement en leads qualifiés par appel IA (scoring + messages)
+        llm_calls = rate_limits["groq"]["calls"] + rate_limits["groq_triage"]["calls"]
+        ranking_summary = {
+            "factor": rank_factor if ranking else None,
+            "pool": passed[0] if ranking else None,
+            "selected": selected[0] if ranking else analyzed_count,
+            "ranked_out": metrics.counters.get("ranked_out", 0),
+            "qualified_per_llm_call": round(qualified_count / llm_calls, 3) if llm_calls else None,
+        }
+        if ranking and ranking_summary["ranked_out"]:
+            log(f"   🏅 Classement local : {selected[0]} meilleurs candidats sur {passed[0]} envoyés à l'IA")
+        if llm_calls:
+            log(f"   🎯 Rendement : {ranking_summary['qualified_per_llm_call']:.2f} lead qualifié par appel IA ({llm_calls} appels)")
+
+        performance = metrics.to_dict(
+            metadata_cache_hits=cache_stats["hits"],
+            network_fetches=metrics.counters.get("fetches", 0) - cache_stats["hits"],
+            llm_cache_hits=llm_stats["hits"],
+            llm_calls=llm_calls,
+            retries=sum(stats["retries"] for stats in rate_limits.values()),
+            tokens=rate_limits["groq"]["tokens"] + rate_limits["groq_triage"]["tokens"],
+            output_tokens_saved=two_phase["output_tokens_saved"],
+        )
+        stages = performance["stages"]
+        log("   ⏱️ " + " | ".join(f"{name} {s['total_seconds']}s (p95 {s['p95']}s)" for name, s in stages.items())
+            + f" | {performance['counters']['tokens']} tokens")
+
+        # 3. Synthèse
+        summary = {
+            "total_found": searched[0],
+            "search_pages": search_pages[0],
+            "pass_rate": round(passed[0] / flow["resolved"], 3) if flow["resolved"] else 0.0,
+            "analyzed": analyzed_count,
+            "qualified": qualified_count,
+            "rejected": rejected_count,
+            "fetches_avoided": fetches_avoided[0],
+            "channel_skips": channel_skips[0],
+            "resumed": replayed["feed"] + replayed["gate"],
+            "metadata_cache": cache_stats,
+            "llm_cache": llm_stats,
+            "two_phase": two_phase,
+            "cascade": cascade,
+            "ranking": ranking_summary,
+            "rate_limits": rate_limits,
+            "performance": performance,
+            "errors": errors
+        }
+
+        journal.append(DONE, summary=summary)
+    finally:
+        # Aussi à la fermeture anticipée du générateur (annulation d'un job, lecteur CLI fermé) :
+        # les étages se vident sans nouveaux appels réseau, journal et bases SQLite sont fermés
+        quota_reached.set()
+        cancelled.set()
+        journal.close()
+        for store in (metadata_cache, llm_cache, channel_index):
+            if store:
+                store.close()
     
-    summary = {
-        "total_found": len(raw_videos),
-        "analyzed": analyzed_count,
-        "qualified": len(qualified)
-    }
+    log(f"🏁 Fini ! {qualified_count} leads qualifiés trouvés.")
+    yield "summary", summary
+
+def run_prospector(niche, language, max_analyze, subs_min=0, subs_max=500000, api_key=None, logger=None, **options):
+    """
+    Fonction principale appelée par Streamlit ou CLI.
+    Retourne un dictionnaire avec {summary, rows, rejections, csv_content}
+    Options : voir iter_prospector (dont cette fonction collecte simplement les événements).
+    """
+    final_results = []
+    rejections = []
+    summary = {}
+    for kind, payload in iter_prospector(niche, language, max_analyze, subs_min, subs_max,
+                                         api_key=api_key, logger=logger, **options):
+        if kind == "lead":
+            final_results.append(payload)
+        elif kind == "rejection":
+            rejections.append(payload)
+        elif kind == "summary":
+            summary = payload
     
     csv_content = generate_csv_string(final_results, niche)
     
-    log(f"🏁 Fini ! {len(qualified)} leads qualifiés trouvés.")
-    
     return {
         "summary": summary,
         "rows": final_results,
@@ -406,21 +1558,48 @@ def main():
         max_v = int(input("🔢 Max analyse [5]: ").strip() or "5")
     except:
         max_v = 5
+
+    try:
+        workers = int(input(f"⚡ Requêtes parallèles [{DEFAULT_FETCH_WORKERS}]: ").strip() or DEFAULT_FETCH_WORKERS)
+    except:
+        workers = DEFAULT_FETCH_WORKERS
+
+    try:
+        ai_workers = int(input(f"🧠 Appels IA parallèles [{DEFAULT_LLM_WORKERS}]: ").strip() or DEFAULT_LLM_WORKERS)
+    except:
+        ai_workers = DEFAULT_LLM_WORKERS
         
-    # Lancement
-    results = run_prospector(
-        niche=niche, 
-        language=lang, 
-        max_analyze=max_v,
-        subs_min=0,     # Default CLI
-        subs_max=500000 # Default CLI
-    )
+    # Historique : import local, prospector_warehouse importe ce module (csv_row)
+    from prospector_warehouse import LeadWarehouse, warehouse_available
+    warehouse = LeadWarehouse().writer(niche) if warehouse_available() else None
+
+    # Lancement : chaque lead est écrit dans le CSV dès qu'il est scoré
+    if os.path.exists("prospects_cli.csv"):
+        os.remove("prospects_cli.csv")
+    try:
+        with LeadSink("prospects_cli.csv", niche) as sink:
+            for kind, payload in iter_prospector(
+                niche=niche, 
+                language=lang, 
+                max_analyze=max_v,
+                subs_min=0,     # Default CLI
+                subs_max=500000, # Default CLI
+                fetch_workers=workers,
+                llm_workers=ai_workers
+            ):
+                if kind == "summary":
+                    with open("prospects_cli_performance.json", "w", encoding="utf-8") as f:
+                        json.dump(payload["performance"], f, ensure_ascii=False, indent=2)
+                sink.write(kind, payload)
+                if warehouse:
+                    warehouse.write(kind, payload)
+    finally:
+        if warehouse:
+            warehouse.close()
     
-    # Save CSV local
-    if results["csv_content"]:
-        with open("prospects_cli.csv", "w", encoding="utf-8") as f:
-            f.write(results["csv_content"])
+    if sink.written:
         print("\n💾 Saved to prospects_cli.csv")
+    print("⏱️ Mesures de performance : prospects_cli_performance.json")
 
 if __name__ == "__main__":
     main()